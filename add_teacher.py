@@ -1,6 +1,7 @@
 
 import sqlite3
-from werkzeug.security import generate_password_hash
+
+from passwords import hash_password
 
 DB_NAME = "students.db"
 
@@ -12,7 +13,7 @@ department = "BCA"            # must match student department
 conn = sqlite3.connect(DB_NAME)
 cur = conn.cursor()
 
-password_hash = generate_password_hash(password)
+password_hash = hash_password(password)
 
 cur.execute("""
 INSERT INTO teachers (username, password_hash, name, department)
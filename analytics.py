@@ -0,0 +1,292 @@
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+
+import bitsets
+import partitions
+
+PRESENT = 1
+ABSENT = 0
+NOT_MARKED = -1
+
+EXCELLENT_PERCENT = 90
+LOW_PERCENT = 75
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+# ---------- MATRIX ----------
+
+class AttendanceMatrix:
+    # students x days, int8: 1 present, 0 absent, -1 not marked.
+    # Columns are the days on which anyone in the department was marked.
+
+    def __init__(self, students, dates, data):
+        self.students = students
+        self.dates = dates
+        self.data = data
+
+    @property
+    def present(self):
+        return self.data == PRESENT
+
+    @property
+    def absent(self):
+        return self.data == ABSENT
+
+
+def department_students(conn, department):
+    return conn.execute(
+        "SELECT id, roll_no, name FROM students WHERE department = ? ORDER BY roll_no, id",
+        (department,),
+    ).fetchall()
+
+
+def load_matrix(conn, department, date_from=None, date_to=None, students=None):
+    if students is None:
+        students = department_students(conn, department)
+
+    # One pass over the covering (date, status, student_id) index: a row per
+    # day holding every "student_id * 2 + present" for that day as one string.
+    # The unary + keeps SQLite from driving the scan through the per-student
+    # index, which would mean a table lookup for every attendance row.
+    # Archived terms hold disjoint date ranges, so their rows just append.
+    rows = []
+    for table in partitions.sources(conn, date_from, date_to):
+        rows.extend(conn.execute(
+            f"""
+            SELECT a.date, group_concat((a.student_id << 1) | (a.status = 'Present'))
+            FROM {table} a
+            WHERE a.date BETWEEN ? AND ?
+              AND +a.student_id IN (SELECT id FROM main.students WHERE department = ?)
+            GROUP BY a.date
+            ORDER BY a.date
+            """,
+            (date_from or "", date_to or "9999-12-31", department),
+        ).fetchall())
+
+    data = np.full((len(students), len(rows)), NOT_MARKED, dtype=np.int8)
+    if not rows:
+        return AttendanceMatrix(students, [], data)
+
+    packed = [np.array(values.split(","), dtype=np.int64) for _, values in rows]
+    col_idx = np.repeat(np.arange(len(rows)), [len(p) for p in packed])
+    packed = np.concatenate(packed)
+
+    ids = np.array([row["id"] for row in students], dtype=np.int64)
+    sorter = np.argsort(ids)
+    row_idx = sorter[np.searchsorted(ids, packed >> 1, sorter=sorter)]
+
+    data[row_idx, col_idx] = packed & 1
+    return AttendanceMatrix(students, [day for day, _ in rows], data)
+
+
+def load_matrix_bits(conn, department, date_from=None, date_to=None, students=None):
+    # Same matrix as load_matrix(), built from the per-term bitmaps in
+    # attendance_bits: one row per student and term instead of one per day,
+    # unpacked with np.unpackbits. Archived terms need no ATTACH.
+    if students is None:
+        students = department_students(conn, department)
+
+    span = bitsets.department_range(conn, department)
+    if span is None:
+        return AttendanceMatrix(students, [], np.full((len(students), 0), NOT_MARKED, dtype=np.int8))
+    date_from = max(date_from or span[0], span[0])
+    date_to = min(date_to or span[1], span[1])
+
+    ids = np.array([row["id"] for row in students], dtype=np.int64)
+    sorter = np.argsort(ids)
+    dates = []
+    blocks = []
+    for term in bitsets.terms_between(date_from, date_to):
+        rows = conn.execute(bitsets.DEPARTMENT_BITS_SQL, (term.name, department)).fetchall()
+        if not rows:
+            continue
+        size = bitsets.mask_size(term)
+        row_idx = sorter[np.searchsorted(ids, np.array([r[0] for r in rows], dtype=np.int64), sorter=sorter)]
+        present = np.zeros((len(students), size), dtype=np.uint8)
+        marked = np.zeros((len(students), size), dtype=np.uint8)
+        present[row_idx] = np.frombuffer(b"".join(r[1] for r in rows), dtype=np.uint8).reshape(-1, size)
+        marked[row_idx] = np.frombuffer(b"".join(r[2] for r in rows), dtype=np.uint8).reshape(-1, size)
+
+        days = bitsets.term_days(term)
+        present = np.unpackbits(present, axis=1, bitorder="little")[:, :days]
+        marked = np.unpackbits(marked, axis=1, bitorder="little")[:, :days]
+
+        # only the days inside the range on which anyone was marked
+        first = max(bitsets.offset(term, date_from), 0)
+        last = min(bitsets.offset(term, date_to), days - 1)
+        columns = first + np.flatnonzero(marked[:, first:last + 1].any(axis=0))
+        if not len(columns):
+            continue
+        block = np.where(marked[:, columns], present[:, columns], NOT_MARKED).astype(np.int8)
+        blocks.append(block)
+        dates.extend(bitsets.day_at(term, int(n)) for n in columns)
+
+    if not blocks:
+        return AttendanceMatrix(students, [], np.full((len(students), 0), NOT_MARKED, dtype=np.int8))
+    return AttendanceMatrix(students, dates, np.hstack(blocks))
+
+
+# ---------- VECTORIZED MEASURES ----------
+
+def counts(matrix):
+    presents = matrix.present.sum(axis=1)
+    absents = matrix.absent.sum(axis=1)
+    return presents, absents
+
+
+def percentages(presents, absents):
+    # unrounded: thresholds apply to the exact value, display rounds it
+    total = presents + absents
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(total > 0, presents / np.maximum(total, 1) * 100, 0.0)
+    return total, percent
+
+
+def categories(presents, absents):
+    total, percent = percentages(presents, absents)
+    return np.select(
+        [total == 0, percent >= EXCELLENT_PERCENT, percent >= LOW_PERCENT],
+        ["No Data", "Excellent", "Good"],
+        default="Needs Improvement",
+    )
+
+
+def rolling_percent(matrix, window=7):
+    # attendance % over the last `window` day columns, for every column;
+    # NaN where the student was not marked at all inside the window
+    n_students, n_days = matrix.data.shape
+    if n_days == 0:
+        return np.full((n_students, 0), np.nan)
+    window = min(window, n_days)
+
+    pad = np.zeros((n_students, 1), dtype=np.int32)
+    present = np.hstack([pad, np.cumsum(matrix.present, axis=1, dtype=np.int32)])
+    marked = np.hstack([pad, np.cumsum(matrix.data != NOT_MARKED, axis=1, dtype=np.int32)])
+    present = present[:, window:] - present[:, :-window]
+    marked = marked[:, window:] - marked[:, :-window]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(marked > 0, present / np.maximum(marked, 1) * 100, np.nan)
+
+
+def absence_streaks(matrix):
+    # (current, longest) run of absences per student; days the student was
+    # not marked neither extend nor break a run
+    data = matrix.data
+    n_students, n_days = data.shape
+    if n_days == 0:
+        zeros = np.zeros(n_students, dtype=np.int32)
+        return zeros, zeros
+
+    present = data == PRESENT
+    absent = data == ABSENT
+
+    # absences after the last present day
+    any_present = present.any(axis=1)
+    last_present = np.where(any_present, n_days - 1 - np.argmax(present[:, ::-1], axis=1), -1)
+    after_last = np.arange(n_days)[None, :] > last_present[:, None]
+    current = (absent & after_last).sum(axis=1)
+
+    # absences between two present days share the same running present count
+    group = np.cumsum(present, axis=1)
+    keys = (np.arange(n_students)[:, None] * (n_days + 1) + group)[absent]
+    runs = np.bincount(keys, minlength=n_students * (n_days + 1))
+    longest = runs.reshape(n_students, n_days + 1).max(axis=1)
+    return current, longest
+
+
+def weekday_pattern(matrix):
+    # department-wide attendance % for each weekday
+    if not matrix.dates:
+        return []
+    weekday = np.array([date.fromisoformat(d).weekday() for d in matrix.dates])
+    one_hot = np.eye(7, dtype=np.int64)[weekday]
+    presents = matrix.present.sum(axis=0) @ one_hot
+    marked = (matrix.data != NOT_MARKED).sum(axis=0) @ one_hot
+    return [
+        {"day": WEEKDAYS[d], "percent": round(float(presents[d] / marked[d] * 100), 1)}
+        for d in range(7)
+        if marked[d] > 0
+    ]
+
+
+def threshold_alerts(matrix, window=10, threshold=LOW_PERCENT):
+    # students whose attendance over the last `window` days is below threshold
+    if not matrix.dates:
+        return np.zeros(len(matrix.students), dtype=bool)
+    recent = rolling_percent(matrix, window)[:, -1]
+    return np.nan_to_num(recent, nan=100.0) < threshold
+
+
+# ---------- SUMMARY ----------
+
+def build_summary(conn, department, date_from=None, date_to=None, trend_days=30, bits=False):
+    # bits=True reads attendance_bits instead of the row-per-day table
+    load = load_matrix_bits if bits else load_matrix
+    students = department_students(conn, department)
+
+    if date_from or date_to:
+        presents, absents = counts(load(conn, department, date_from, date_to, students))
+    else:
+        # all-time numbers come straight from the attendance_stats counters
+        stats = dict(
+            (r[0], (r[1], r[2]))
+            for r in conn.execute(
+                """
+                SELECT st.student_id, st.presents, st.absents
+                FROM attendance_stats st
+                JOIN students s ON s.id = st.student_id
+                WHERE s.department = ?
+                """,
+                (department,),
+            )
+        )
+        pairs = np.array([stats.get(r["id"], (0, 0)) for r in students], dtype=np.int64).reshape(-1, 2)
+        presents, absents = pairs[:, 0], pairs[:, 1]
+
+    total, percent = percentages(presents, absents)
+    category = categories(presents, absents)
+    low = (total > 0) & (percent < LOW_PERCENT)
+
+    # trends look at a recent window only, so their cost stays bounded
+    trend_end = date.fromisoformat(date_to) if date_to else date.today()
+    trend_start = (trend_end - timedelta(days=trend_days)).isoformat()
+    recent = load(conn, department, trend_start, trend_end.isoformat(), students)
+    current_streak, longest_streak = absence_streaks(recent)
+    alert = threshold_alerts(recent)
+
+    summary = []
+    low_students = []
+    for i, row in enumerate(students):
+        entry = {
+            "id": row["id"],
+            "roll_no": row["roll_no"],
+            "name": row["name"],
+            "presents": int(presents[i]),
+            "absents": int(absents[i]),
+            "total": int(total[i]),
+            "percent": round(float(percent[i]), 1) if total[i] else 0,
+            "category": str(category[i]),
+            "absence_streak": int(current_streak[i]),
+            "longest_streak": int(longest_streak[i]),
+            "recent_alert": bool(alert[i]),
+        }
+        summary.append(entry)
+        if low[i]:
+            low_students.append(entry)
+
+    return {
+        "summary": summary,
+        "low_students": low_students,
+        "weekday_pattern": weekday_pattern(recent),
+        "trend_from": trend_start,
+        "trend_to": trend_end.isoformat(),
+    }
+
+
+async def build_summary_async(conn, department, date_from=None, date_to=None, trend_days=30, bits=False):
+    # NumPy releases the GIL for the heavy parts, so a worker thread keeps
+    # the event loop free while a large department is crunched
+    return await asyncio.to_thread(build_summary, conn, department, date_from, date_to, trend_days, bits)
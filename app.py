@@ -1,36 +1,312 @@
-
-print("Starting Flask app...")
-
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import (
+    Flask, Response, render_template, request, redirect, url_for, flash, session,
+    get_flashed_messages, jsonify, stream_template, stream_with_context,
+)
+import asyncio
+import atexit
+import json
+import os
 import sqlite3
-from datetime import date
-from werkzeug.security import check_password_hash, generate_password_hash
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import attendance_store
+import bitsets
+import cache
+import db
+import import_students
+import jsonapi
+import metrics
+import migrate
+import pagination
+import partitions
+import passwords
+import principals
+import rendering
+import rollup
+import scheduler
+import search
+import snapshots
+
+# analytics (NumPy), export and async_db are imported by the views that use
+# them, so a new worker answers its first request without loading them.
 
 app = Flask(__name__)
 
-# Needed for flash messages & session
-app.secret_key = "some_secret_key_for_flask_session"
+DB_NAME = os.environ.get("STUDENTS_DB", "students.db")
+
+# failed logins per (username, IP); past the limit the attempt is refused
+# before the database or the hash is touched
+login_throttle = passwords.LoginThrottle(max_failures=5, window=300)
+
+# Teacher / Student principals shared across requests; student entries are
+# dropped by forget_student() whenever a route writes that student's row,
+# and in every worker once the 'principals' cache version moves.
+principal_cache = cache.TTLCache(maxsize=1024, ttl=600)
+
+# Built by create_app() from the app's config.
+attendance_writer = None
+dashboard_cache = None
+course_list = None
+metrics_registry = None
+row_fragments = None
+job_scheduler = None
+async_database = None
+
+
+def create_app(config=None):
+    # The routes below are registered on `app` at import; this configures
+    # it, once per process (later calls return the same app). Nothing here
+    # touches the database or compiles templates: the schema check runs on
+    # the first request, connections and the writer thread start on first
+    # use, and templates compile when first rendered (from the bytecode in
+    # TEMPLATE_CACHE_DIR when an earlier process left it there).
+    global attendance_writer, dashboard_cache, course_list, metrics_registry, row_fragments, job_scheduler
+    global async_database
+    if "db_pool" in app.extensions:
+        return app
+    app.config.update(config or {})
+
+    # Needed for flash messages & session; every worker process must share it
+    app.secret_key = app.config.get("SECRET_KEY") or os.environ.get(
+        "SECRET_KEY", "some_secret_key_for_flask_session"
+    )
+
+    # /students listing: rows per page, and whether to stream the full list instead
+    app.config.setdefault("STUDENTS_PAGE_SIZE", 50)
+    app.config.setdefault("STUDENTS_MAX_PAGE_SIZE", 500)
+    app.config.setdefault("STUDENTS_STREAM", False)
+
+    # async mode: read-heavy pages served by async views over aiosqlite (see asgi.py)
+    app.config.setdefault("STUDENTS_ASYNC", os.environ.get("STUDENTS_ASYNC") == "1")
+
+    # create / upgrade the schema before the first request is served
+    app.before_request(ensure_schema)
+
+    # pooled connections, handed out once per request and returned on teardown
+    db.init_app(app, DB_NAME)
+
+    # Attendance saves go through one writer thread that commits concurrent
+    # submissions together; ATTENDANCE_BATCH_DELAY is how long (seconds) it
+    # waits for more submissions after the first one of a batch arrives.
+    app.config.setdefault("ATTENDANCE_WRITE_BEHIND", True)
+    app.config.setdefault("ATTENDANCE_BATCH_DELAY", 0.005)
+    attendance_writer = attendance_store.AttendanceWriter(
+        DB_NAME, max_delay=app.config["ATTENDANCE_BATCH_DELAY"]
+    )
+    atexit.register(attendance_writer.stop)
+
+    # Attendance pages read the per-term bitmaps in attendance_bits (see
+    # bitsets.py) instead of the row-per-day table; both are always written.
+    app.config.setdefault("ATTENDANCE_BITSETS", True)
+
+    # Password hashing: method/cost per deployment (werkzeug format, e.g.
+    # "scrypt:32768:8:1" or "pbkdf2:sha256:600000") and the number of worker
+    # processes that verify hashes off the request thread (0 = inline).
+    app.config.setdefault("PASSWORD_HASH_METHOD", os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1"))
+    app.config.setdefault("PASSWORD_HASH_WORKERS", int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)))
+    passwords.init_app(app)
+
+    # With several worker processes (gunicorn.conf.py) SHARED_CACHE_PATH names
+    # a SQLite file through which they share the dashboard and course caches.
+    app.config.setdefault("SHARED_CACHE_PATH", os.environ.get("SHARED_CACHE_PATH"))
+    shared_cache_path = app.config["SHARED_CACHE_PATH"]
+
+    # Dashboard numbers per (department, date). Entries are dropped as soon as
+    # students or attendance of that department change; the TTL only bounds
+    # staleness from writes made outside this process (or, when shared,
+    # outside the app).
+    if shared_cache_path:
+        dashboard_cache = cache.SharedCache(shared_cache_path, "dashboard", maxsize=256, ttl=300)
+    else:
+        dashboard_cache = cache.TTLCache(maxsize=256, ttl=300)
+
+    # Dropdown courses for students() and attendance(); reloaded only after a
+    # student insert/delete or course change bumps cache_versions.courses.
+    course_list = cache.VersionedValue(
+        "courses", load_courses,
+        shared=cache.SharedCache(shared_cache_path, "courses", maxsize=16, ttl=3600) if shared_cache_path else None,
+    )
+
+    # Request/SQL/template timings at /metrics. PROFILE_SLOW_REQUESTS_MS turns
+    # on the sampling profiler for requests slower than that.
+    app.config.setdefault("PROFILE_SLOW_REQUESTS_MS", (
+        float(os.environ["PROFILE_SLOW_REQUESTS_MS"]) if os.environ.get("PROFILE_SLOW_REQUESTS_MS") else None
+    ))
+    metrics_registry = metrics.init_app(app)
+    metrics_registry.add(metrics.Gauge(
+        "app_cache", "In-process cache counters since start.", ("cache", "event"), cache_counters,
+    ))
+    metrics_registry.add(metrics.Gauge(
+        "attendance_writer", "Write-behind queue counters since start.", ("event",),
+        lambda: {(k,): v for k, v in attendance_writer.stats().items()},
+    ))
+
+    # Nightly jobs (see nightly_jobs()) on a scheduler thread that each
+    # worker starts with its first request; the lease in the jobs table lets
+    # one worker run each job. The summary page shows the nightly snapshot
+    # until it is older than SUMMARY_SNAPSHOT_MAX_AGE seconds.
+    app.config.setdefault("SCHEDULER_ENABLED", os.environ.get("SCHEDULER_ENABLED", "1") == "1")
+    app.config.setdefault("NIGHTLY_AT", os.environ.get("NIGHTLY_AT", "02:00"))
+    app.config.setdefault("SUMMARY_SNAPSHOTS", True)
+    app.config.setdefault("SUMMARY_SNAPSHOT_MAX_AGE", 36 * 3600)
+    job_durations = metrics_registry.add(metrics.Histogram(
+        "scheduler_job_duration_seconds", "Background job run time, by job and outcome.",
+        ("job", "status"), metrics.JOB_BUCKETS,
+    ))
+    metrics_registry.add(metrics.Gauge(
+        "scheduler_job_last_success_timestamp_seconds", "Unix time of the last successful run, by job.",
+        ("job",), job_last_success,
+    ))
+    job_scheduler = scheduler.Scheduler(
+        DB_NAME, nightly_jobs(app.config["NIGHTLY_AT"]),
+        on_finish=lambda name, status, seconds: job_durations.observe((name, status), seconds),
+    )
+    atexit.register(job_scheduler.stop)
+    if app.config["SCHEDULER_ENABLED"]:
+        app.before_request(job_scheduler.ensure_running)
+
+    # Templates compile on first use (TEMPLATE_PRECOMPILE=1 compiles them all
+    # now), with their bytecode kept in TEMPLATE_CACHE_DIR; per-row fragment
+    # cache for the big tables, ETag/Last-Modified helpers.
+    app.config.setdefault("TEMPLATE_CACHE_DIR", os.environ.get("TEMPLATE_CACHE_DIR", "template_cache"))
+    app.config.setdefault("TEMPLATE_PRECOMPILE", os.environ.get("TEMPLATE_PRECOMPILE") == "1")
+    row_fragments = rendering.init_app(app)
+
+    app.json = jsonapi.CompactJSONProvider(app)
+
+    if app.config["STUDENTS_ASYNC"]:
+        import async_db
+
+        async_database = async_db.AsyncDatabase(DB_NAME)
+        atexit.register(async_database.close)
+        app.view_functions.update(ASYNC_VIEWS)
+    return app
+
+
+# Schema check: once per process, before its first request. upgrade() is
+# idempotent, so workers starting together only wait for whichever of them
+# applies a pending migration.
+schema_lock = threading.Lock()
+schema_checked = False
+
 
-DB_NAME = "students.db"
+def ensure_schema():
+    global schema_checked
+    if schema_checked:
+        return
+    with schema_lock:
+        if not schema_checked:
+            migrate.upgrade(DB_NAME)
+            schema_checked = True
 
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return db.get_db()
+
+
+def nightly_jobs(at):
+    return [
+        scheduler.Job("rollup_refresh", refresh_rollup_job, at),
+        scheduler.Job("summary_snapshots", summary_snapshots_job, at),
+    ]
+
+
+def refresh_rollup_job(conn):
+    rollup.refresh_stale(conn)
+    conn.commit()
+
+
+def summary_snapshots_job(conn):
+    snapshots.recompute(conn, bits=app.config["ATTENDANCE_BITSETS"])
+
+
+def job_last_success():
+    return {
+        (name,): at for name, at in get_db_connection().execute(
+            "SELECT name, last_success FROM jobs WHERE last_success IS NOT NULL"
+        )
+    }
+
+
+def load_courses(conn):
+    return [row["course"] for row in conn.execute(
+        "SELECT DISTINCT course FROM students ORDER BY course"
+    ).fetchall()]
+
+
+def invalidate_dashboard(*departments):
+    departments = set(departments)
+    dashboard_cache.invalidate(lambda key: key[0] in departments)
+
+
+def cache_counters():
+    counters = {}
+    for name, c in (
+        ("dashboard", dashboard_cache), ("principals", principal_cache), ("row_fragments", row_fragments.cache),
+    ):
+        stats = c.stats()
+        for event in ("hits", "misses", "evictions", "size"):
+            counters[(name, event)] = stats[event]
+    stats = course_list.stats()
+    counters[("courses", "hits")] = stats["hits"]
+    counters[("courses", "misses")] = stats["misses"]
+    return counters
 
 
 # ---------- AUTH HELPERS ----------
 
+def current_teacher():
+    teacher_id = session.get("teacher_id")
+    if teacher_id is None:
+        return None
+    teacher = principals.load_teacher(get_db_connection(), principal_cache, teacher_id)
+    if teacher is None:
+        # the account is gone; don't keep trusting the cookie
+        for key in ("teacher_id", "teacher_name", "teacher_department"):
+            session.pop(key, None)
+    return teacher
+
+
 def require_login():
-    if "teacher_id" not in session:
+    if current_teacher() is None:
         flash("Please login as a teacher to continue.", "danger")
         return False
     return True
 
 
 def current_department():
-    return session.get("teacher_department")
+    teacher = current_teacher()
+    return teacher.department if teacher else None
+
+
+def department_student(id):
+    # the student, if it belongs to the logged-in teacher's department
+    teacher = current_teacher()
+    student = principals.load_student(get_db_connection(), principal_cache, id)
+    return student if teacher and teacher.can_manage(student) else None
+
+
+def current_student():
+    student_id = session.get("student_id")
+    if student_id is None:
+        return None
+    student = principals.load_student(get_db_connection(), principal_cache, student_id)
+    if student is None:
+        for key in ("student_id", "student_name", "student_roll_no"):
+            session.pop(key, None)
+    return student
+
+
+def parse_date_arg(name):
+    # ISO date from the query string, or None when missing / malformed
+    value = request.args.get(name, "").strip()
+    try:
+        return date.fromisoformat(value).isoformat() if value else None
+    except ValueError:
+        flash(f"Ignoring invalid date: {value}", "danger")
+        return None
 
 
 # ---------- ROUTES ----------
@@ -47,24 +323,58 @@ def login():
         username = request.form["username"]
         password = request.form["password"]
 
-        conn = get_db_connection()
-        teacher = conn.execute(
-            "SELECT * FROM teachers WHERE username = ?", (username,)
-        ).fetchone()
-        conn.close()
+        key = ("teacher", username, request.remote_addr)
+        if login_throttle.blocked(key):
+            flash("Too many failed attempts. Try again in a few minutes.", "danger")
+            return render_template("login.html"), 429
 
-        if teacher and check_password_hash(teacher["password_hash"], password):
-            session["teacher_id"] = teacher["id"]
-            session["teacher_name"] = teacher["name"]
-            session["teacher_department"] = teacher["department"]
+        try:
+            teacher = authenticate_teacher(username, password)
+        except passwords.HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "danger")
+            return render_template("login.html"), 503
+
+        if teacher:
+            login_throttle.reset(key)
+            start_teacher_session(teacher)
             flash("Login successful.", "success")
             return redirect(url_for("home"))
         else:
+            login_throttle.record_failure(key)
             flash("Invalid username or password.", "danger")
 
     return render_template("login.html")
 
 
+def authenticate_teacher(username, password):
+    # the teacher's row when the password matches, else None; raises
+    # passwords.HashingBusy when no hashing worker is free
+    conn = get_db_connection()
+    teacher = conn.execute(
+        "SELECT * FROM teachers WHERE username = ?", (username,)
+    ).fetchone()
+    if not (teacher and passwords.verify_password(teacher["password_hash"], password)):
+        return None
+    if passwords.needs_rehash(teacher["password_hash"]):
+        # hashing settings changed since this password was stored; when the
+        # pool is busy the next login tries again
+        try:
+            conn.execute(
+                "UPDATE teachers SET password_hash = ? WHERE id = ?",
+                (passwords.hash_password(password), teacher["id"]),
+            )
+            conn.commit()
+        except passwords.HashingBusy:
+            pass
+    return teacher
+
+
+def start_teacher_session(teacher):
+    session["teacher_id"] = teacher["id"]
+    session["teacher_name"] = teacher["name"]
+    session["teacher_department"] = teacher["department"]
+
+
 @app.route("/register", methods=["GET", "POST"])
 def register_teacher():
     # Simple protection so random users can't register
@@ -88,8 +398,11 @@ def register_teacher():
             flash("Invalid admin code. You are not allowed to register teachers.", "danger")
             return redirect(url_for("register_teacher"))
 
-        from werkzeug.security import generate_password_hash
-        password_hash = generate_password_hash(password)
+        try:
+            password_hash = passwords.hash_password(password)
+        except passwords.HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "danger")
+            return redirect(url_for("register_teacher"))
 
         conn = get_db_connection()
         try:
@@ -103,9 +416,8 @@ def register_teacher():
             conn.commit()
             flash("Teacher registered successfully. You can now log in.", "success")
         except sqlite3.IntegrityError:
+            conn.rollback()
             flash("Username already exists. Choose another.", "danger")
-        finally:
-            conn.close()
 
         return redirect(url_for("login"))
 
@@ -129,62 +441,50 @@ def home():
         return redirect(url_for("login"))
 
     department = current_department()
+    today = date.today().isoformat()
 
-    conn = get_db_connection()
-    students_rows = conn.execute(
-        "SELECT * FROM students WHERE department = ? ORDER BY roll_no",
-        (department,)
-    ).fetchall()
+    unchanged = rendering.not_modified(
+        get_db_connection(), department, today, since=rendering.start_of_day(date.today())
+    )
+    if unchanged is not None:
+        return unchanged
 
-    today = date.today().isoformat()
+    key = (department, today)
+    stats = dashboard_cache.get(key)
+    if stats is None:
+        conn = get_db_connection()
+        stats = dict(conn.execute(HOME_STATS_SQL, (today, department)).fetchone())
+        dashboard_cache.set(key, stats)
 
-    # check if attendance for today exists for this department
-    row = conn.execute(
-        """
-        SELECT COUNT(*) as c
-        FROM attendance a
-        JOIN students s ON a.student_id = s.id
-        WHERE a.date = ? AND s.department = ?
-        """,
-        (today, department),
-    ).fetchone()
-    today_marked = (row["c"] > 0)
+    return render_home(stats)
 
-    total_students = len(students_rows)
 
-    # total attendance records for this department
-    summary_row = conn.execute(
-        """
-        SELECT COUNT(*) as c
-        FROM attendance a
-        JOIN students s ON a.student_id = s.id
-        WHERE s.department = ?
-        """,
-        (department,),
-    ).fetchone()
-    total_attendance_records = summary_row["c"] if summary_row else 0
+# one pass over the department's students covers all four numbers
+HOME_STATS_SQL = """
+SELECT COUNT(*) AS total_students,
+       COALESCE(SUM(st.total), 0) AS total_records,
+       COUNT(a.status) AS marked_today,
+       COALESCE(SUM(a.status = 'Present'), 0) AS present_today
+FROM students s
+LEFT JOIN attendance_stats st ON st.student_id = s.id
+LEFT JOIN attendance a ON a.student_id = s.id AND a.date = ?
+WHERE s.department = ?
+"""
 
-    # calculate today's class attendance percentage
-    present_row = conn.execute(
-        """
-        SELECT COUNT(*) as c
-        FROM attendance a
-        JOIN students s ON a.student_id = s.id
-        WHERE a.date = ? AND s.department = ? AND a.status = 'Present'
-        """,
-        (today, department),
-    ).fetchone()
-    present_today = present_row["c"] if present_row else 0
+
+def render_home(stats):
+    today_marked = stats["marked_today"] > 0
+    total_students = stats["total_students"]
+    total_attendance_records = stats["total_records"]
+    present_today = stats["present_today"]
 
     if total_students > 0 and today_marked:
         class_attendance_percent = round(present_today / total_students * 100, 1)
     else:
         class_attendance_percent = 0
 
-    conn.close()
     return render_template(
         "home.html",
-        students=students_rows,
         today_marked=today_marked,
         total_students=total_students,
         total_attendance_records=total_attendance_records,
@@ -204,63 +504,116 @@ def students():
     selected_course = request.args.get("course", "").strip()
 
     conn = get_db_connection()
-
-    # Get distinct course list for dropdown
-    course_rows = conn.execute(
-        "SELECT DISTINCT course FROM students ORDER BY course"
-    ).fetchall()
-    courses = [r["course"] for r in course_rows]
-
-    # Build query based on filters
-    if selected_course and q:
-        like = f"%{q}%"
-        students_rows = conn.execute(
-            """
+    # course list for dropdown (cached until a student's course changes); it
+    # spans every department, so its version is part of the ETag
+    courses_version, courses = course_list.get_versioned(conn)
+    unchanged = rendering.not_modified(conn, current_department(), courses_version)
+    if unchanged is not None:
+        return unchanged
+
+    where, params = students_filter(q, selected_course)
+
+    stream = request.args.get("stream") == "1" or app.config["STUDENTS_STREAM"]
+    if stream:
+        # whole list, rows handed to the template straight off the cursor.
+        # Flash messages are read now, before the session cookie goes out.
+        get_flashed_messages(with_categories=True)
+        cursor = conn.execute(
+            f"""
             SELECT * FROM students
-            WHERE course = ?
-              AND (roll_no LIKE ? OR name LIKE ? OR course LIKE ?)
-            ORDER BY course, roll_no
+            WHERE {" AND ".join(where)}
+            ORDER BY course, roll_no, id
             """,
-            (selected_course, like, like, like),
-        ).fetchall()
-    elif selected_course:
-        students_rows = conn.execute(
-            """
-            SELECT * FROM students
-            WHERE course = ?
-            ORDER BY course, roll_no
-            """,
-            (selected_course,),
-        ).fetchall()
-    elif q:
-        like = f"%{q}%"
-        students_rows = conn.execute(
-            """
-            SELECT * FROM students
-            WHERE roll_no LIKE ? OR name LIKE ? OR course LIKE ?
-            ORDER BY course, roll_no
-            """,
-            (like, like, like),
-        ).fetchall()
-    else:
-        students_rows = conn.execute(
-            """
-            SELECT * FROM students
-            ORDER BY course, roll_no
-            """,
-        ).fetchall()
+            params,
+        )
+        # stream_template keeps the request context (and our connection)
+        # alive until the last row is rendered
+        return Response(stream_template(
+            "index.html",
+            students=iter(cursor),
+            q=q,
+            courses=courses,
+            selected_course=selected_course,
+            next_cursor=None,
+            first_page=True,
+            per_page=None,
+        ))
+
+    sql, params, per_page, after = students_page_query(where, params)
+    students_rows = conn.execute(sql, params).fetchall()
+    return render_students_page(students_rows, q, courses, selected_course, per_page, after)
+
+
+def students_filter(q, selected_course):
+    # Build query based on filters (always within the teacher's department)
+    where = ["department = ?"]
+    params = [current_department()]
+    if selected_course:
+        where.append("course = ?")
+        params.append(selected_course)
+    match = search.fts_query(q)
+    if match:
+        where.append(search.matching_ids_sql())
+        params.append(match)
+    return where, params
+
+
+def students_page_query(where, params):
+    # keyset pagination on (course, roll_no, id); one extra row tells us
+    # whether there is a next page
+    per_page = pagination.page_size(
+        request.args.get("per_page"),
+        app.config["STUDENTS_PAGE_SIZE"],
+        app.config["STUDENTS_MAX_PAGE_SIZE"],
+    )
+    after = pagination.decode_cursor(request.args.get("after"))
+    if after:
+        where = where + ["(course, roll_no, id) > (?, ?, ?)"]
+        params = params + list(after)
+
+    sql = f"""
+        SELECT * FROM students
+        WHERE {" AND ".join(where)}
+        ORDER BY course, roll_no, id
+        LIMIT ?
+        """
+    return sql, params + [per_page + 1], per_page, after
+
+
+def render_students_page(students_rows, q, courses, selected_course, per_page, after):
+    next_cursor = None
+    if len(students_rows) > per_page:
+        students_rows = students_rows[:per_page]
+        next_cursor = pagination.encode_cursor(students_rows[-1])
 
-    conn.close()
     return render_template(
         "index.html",
         students=students_rows,
         q=q,
         courses=courses,
         selected_course=selected_course,
+        next_cursor=next_cursor,
+        first_page=after is None,
+        per_page=per_page,
     )
 
 
 
+# Typeahead search (department-wise), best matches first
+@app.route("/students/search.json")
+def students_search():
+    if current_teacher() is None:
+        return jsonify({"error": "login required"}), 401
+
+    q = request.args.get("q", "").strip()
+    limit = pagination.page_size(request.args.get("limit"), 10, 50)
+
+    conn = get_db_connection()
+    rows = search.top_matches(conn, current_department(), q, limit)
+    return jsonify([dict(r) for r in rows])
+
+
+
 # Add student (assigned to current teacher's department)
 @app.route("/add", methods=["GET", "POST"])
 def add_student():
@@ -293,7 +646,7 @@ def add_student():
             (roll_no, name, email, course, semester, phone, department),
         )
         conn.commit()
-        conn.close()
+        invalidate_dashboard(department)
 
         flash("Student added successfully.", "success")
         return redirect(url_for("students"))
@@ -303,6 +656,42 @@ def add_student():
 
 
 
+# Bulk import from CSV / Excel (into current teacher's department)
+@app.route("/students/import", methods=["GET", "POST"])
+def import_students_view():
+    if not require_login():
+        return redirect(url_for("login"))
+
+    department = current_department()
+    result = None
+
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if not upload or not upload.filename:
+            flash("Choose a CSV or Excel file to import.", "danger")
+            return redirect(url_for("import_students_view"))
+
+        conn = get_db_connection()
+        try:
+            rows = import_students.read_rows(upload.stream, upload.filename)
+            result = import_students.import_rows(conn, rows, department)
+        except ValueError as exc:
+            # chunks committed before the error are in the table already
+            invalidate_dashboard(department)
+            flash(str(exc), "danger")
+            return redirect(url_for("import_students_view"))
+
+        if result["inserted"]:
+            invalidate_dashboard(department)
+        flash(
+            f"Imported {result['inserted']} students, {len(result['errors'])} rows rejected.",
+            "success" if not result["errors"] else "info",
+        )
+
+    return render_template("import_students.html", result=result)
+
+
+
 # Edit student (ensure same department)
 @app.route("/edit/<int:id>", methods=["GET", "POST"])
 def edit_student(id):
@@ -310,14 +699,9 @@ def edit_student(id):
         return redirect(url_for("login"))
 
     department = current_department()
-    conn = get_db_connection()
-    student = conn.execute(
-        "SELECT * FROM students WHERE id = ? AND department = ?",
-        (id, department),
-    ).fetchone()
+    student = department_student(id)
 
     if not student:
-        conn.close()
         return "Student not found or not in your department.", 404
 
     if request.method == "POST":
@@ -328,6 +712,7 @@ def edit_student(id):
         semester = request.form["semester"]
         phone = request.form["phone"]
 
+        conn = get_db_connection()
         conn.execute(
             """
             UPDATE students
@@ -337,12 +722,12 @@ def edit_student(id):
             (roll_no, name, email, course, semester, phone, id, department),
         )
         conn.commit()
-        conn.close()
+        principals.forget_student(principal_cache, id)
+        invalidate_dashboard(department)
 
         flash("Student details updated successfully.", "success")
         return redirect(url_for("students"))
 
-    conn.close()
     return render_template("edit_student.html", student=student)
 
 @app.route("/students/<int:id>/set_login", methods=["GET", "POST"])
@@ -351,14 +736,9 @@ def set_student_login(id):
         return redirect(url_for("login"))
 
     department = current_department()
-    conn = get_db_connection()
-    student = conn.execute(
-        "SELECT * FROM students WHERE id = ? AND department = ?",
-        (id, department),
-    ).fetchone()
+    student = department_student(id)
 
     if not student:
-        conn.close()
         return "Student not found or not in your department.", 404
 
     if request.method == "POST":
@@ -367,26 +747,34 @@ def set_student_login(id):
 
         if not username or not password:
             flash("Username and password are required.", "danger")
-            conn.close()
             return redirect(url_for("set_student_login", id=id))
 
-        password_hash = generate_password_hash(password)
+        try:
+            password_hash = passwords.hash_password(password)
+        except passwords.HashingBusy:
+            flash("The server is busy. Please try again in a moment.", "danger")
+            return redirect(url_for("set_student_login", id=id))
 
-        conn.execute(
-            """
-            UPDATE students
-            SET student_username = ?, student_password_hash = ?
-            WHERE id = ? AND department = ?
-            """,
-            (username, password_hash, id, department),
-        )
-        conn.commit()
-        conn.close()
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                """
+                UPDATE students
+                SET student_username = ?, student_password_hash = ?
+                WHERE id = ? AND department = ?
+                """,
+                (username, password_hash, id, department),
+            )
+            conn.commit()
+            principals.forget_student(principal_cache, id)
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            flash("Username already taken by another student.", "danger")
+            return redirect(url_for("set_student_login", id=id))
 
         flash("Student login credentials set successfully.", "success")
         return redirect(url_for("students"))
 
-    conn.close()
     return render_template("set_student_login.html", student=student)
 
 @app.route("/student/login", methods=["GET", "POST"])
@@ -395,22 +783,43 @@ def student_login():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "").strip()
 
+        key = ("student", username, request.remote_addr)
+        if login_throttle.blocked(key):
+            flash("Too many failed attempts. Try again in a few minutes.", "danger")
+            return render_template("student_login.html"), 429
+
         conn = get_db_connection()
         student = conn.execute(
             "SELECT * FROM students WHERE student_username = ?",
             (username,),
         ).fetchone()
-        conn.close()
 
         if student and student["student_password_hash"]:
-            if check_password_hash(student["student_password_hash"], password):
+            try:
+                valid = passwords.verify_password(student["student_password_hash"], password)
+            except passwords.HashingBusy:
+                flash("The server is busy. Please try again in a moment.", "danger")
+                return render_template("student_login.html"), 503
+
+            if valid:
+                login_throttle.reset(key)
+                if passwords.needs_rehash(student["student_password_hash"]):
+                    try:
+                        conn.execute(
+                            "UPDATE students SET student_password_hash = ? WHERE id = ?",
+                            (passwords.hash_password(password), student["id"]),
+                        )
+                        conn.commit()
+                    except passwords.HashingBusy:
+                        pass
                 # set student session
                 session["student_id"] = student["id"]
                 session["student_name"] = student["name"]
                 session["student_roll_no"] = student["roll_no"]
                 flash("Student login successful.", "success")
                 return redirect(url_for("student_dashboard"))
-        
+
+        login_throttle.record_failure(key)
         flash("Invalid username or password.", "danger")
 
     return render_template("student_login.html")
@@ -425,46 +834,53 @@ def student_logout():
 
 @app.route("/student/dashboard")
 def student_dashboard():
-    student_id = session.get("student_id")
-    if not student_id:
+    if "student_id" not in session:
         flash("Please login as student.", "danger")
         return redirect(url_for("student_login"))
 
-    conn = get_db_connection()
-    student = conn.execute(
-        "SELECT * FROM students WHERE id = ?",
-        (student_id,),
-    ).fetchone()
-
+    student = current_student()
     if not student:
-        conn.close()
         flash("Student not found.", "danger")
         return redirect(url_for("student_login"))
 
-    records = conn.execute(
-        """
-        SELECT date, status
-        FROM attendance
-        WHERE student_id = ?
-        ORDER BY date DESC
-        """,
-        (student_id,),
-    ).fetchall()
-    conn.close()
-
-    total = len(records)
-    presents = sum(1 for r in records if r["status"] == "Present")
-    absents = sum(1 for r in records if r["status"] == "Absent")
-    percent = (presents / total * 100) if total > 0 else 0
+    conn = get_db_connection()
+    records, counts = student_history(conn, student.id)
+    return render_student_dashboard(student, records, counts)
+
+
+STUDENT_RECORDS_SQL = """
+SELECT date, status
+FROM {attendance}
+WHERE student_id = ?
+ORDER BY date DESC
+"""
+
+
+def student_records(conn, student_id):
+    # newest term first, so the concatenation stays in date DESC order
+    records = []
+    for table in partitions.sources(conn, newest_first=True):
+        records.extend(conn.execute(STUDENT_RECORDS_SQL.format(attendance=table), (student_id,)))
+    return records
+
+
+def student_history(conn, student_id):
+    # (records newest first, counts)
+    if app.config["ATTENDANCE_BITSETS"]:
+        records, counts = bitsets.student_history(conn, student_id)
+        return records, attendance_store.counts_from_row(counts)
+    return student_records(conn, student_id), attendance_store.student_counts(conn, student_id)
 
+
+def render_student_dashboard(student, records, counts):
     return render_template(
         "student_dashboard.html",
         student=student,
         records=records,
-        total=total,
-        presents=presents,
-        absents=absents,
-        percent=round(percent, 1),
+        total=counts["total"],
+        presents=counts["presents"],
+        absents=counts["absents"],
+        percent=counts["percent"],
     )
 
 
@@ -482,7 +898,8 @@ def delete_student(id):
         (id, department),
     )
     conn.commit()
-    conn.close()
+    principals.forget_student(principal_cache, id)
+    invalidate_dashboard(department)
 
     flash("Student deleted successfully.", "success")
     return redirect(url_for("students"))
@@ -494,61 +911,66 @@ def attendance():
     if not require_login():
         return redirect(url_for("login"))
 
+    department = current_department()
     conn = get_db_connection()
 
     # list of all distinct courses for dropdown
-    courses = [row["course"] for row in conn.execute(
-        "SELECT DISTINCT course FROM students ORDER BY course"
-    ).fetchall()]
+    courses = course_list.get(conn)
 
     # which course is selected? (works for GET and POST)
     selected_course = request.values.get("course", "")
 
-    # choose students based on selected course
+    # choose students based on selected course; only the teacher's own
+    # department is listed, and so only they can be marked below
     if selected_course:
         students = conn.execute(
-            "SELECT * FROM students WHERE course = ? ORDER BY roll_no",
-            (selected_course,),
+            "SELECT * FROM students WHERE course = ? AND department = ? ORDER BY roll_no",
+            (selected_course, department),
         ).fetchall()
     else:
         # default: show no students until a course is chosen
         students = []
 
     if request.method == "POST":
-        date_str = request.form["date"]
-        present_ids = request.form.getlist("present_ids")  # list of ids as strings
+        date_str = request.form.get("date", "").strip()
+        present_ids = attendance_store.parse_ids(request.form.getlist("present_ids"))
 
-        # Remove old records for this date (for these students)
-        if selected_course:
-            # delete attendance for this course and date
-            conn.execute(
-                """
-                DELETE FROM attendance
-                WHERE date = ?
-                  AND student_id IN (
-                      SELECT id FROM students WHERE course = ?
-                  )
-                """,
-                (date_str, selected_course),
-            )
+        if not selected_course:
+            flash("Select a course before saving attendance.", "danger")
+            return redirect(url_for("attendance"))
+        try:
+            date_str = date.fromisoformat(date_str).isoformat()
+        except ValueError:
+            flash(f"Invalid date: {date_str or '(empty)'}", "danger")
+            return redirect(url_for("attendance", course=selected_course))
+
+        archived = partitions.archived_term(conn, date_str)
+        if archived is not None:
+            flash(f"{date_str} is in archived term {archived['term']}; it is read-only.", "danger")
+            return redirect(url_for("attendance"))
+
+        # upsert only the rows whose status changed
+        student_ids = [s["id"] for s in students]
+        if app.config["ATTENDANCE_WRITE_BEHIND"]:
+            # grouped with other teachers' saves; returns once committed
+            counts = attendance_writer.save(selected_course, date_str, student_ids, present_ids)
         else:
-            conn.execute("DELETE FROM attendance WHERE date = ?", (date_str,))
-
-        for s in students:
-            sid = str(s["id"])
-            status = "Present" if sid in present_ids else "Absent"
-            conn.execute(
-                "INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
-                (s["id"], date_str, status),
+            counts = attendance_store.save_course_attendance(
+                conn, selected_course, date_str, student_ids, present_ids,
             )
-
-        conn.commit()
-        conn.close()
-        flash(f"Attendance saved for {date_str} ({selected_course or 'All courses'})", "success")
+            conn.commit()
+        if counts["inserted"] or counts["updated"]:
+            invalidate_dashboard(department)
+
+        flash(
+            f"Attendance saved for {date_str} ({selected_course}): "
+            f"{counts['inserted']} new, {counts['updated']} changed, "
+            f"{counts['unchanged']} unchanged.",
+            "success",
+        )
         return redirect(url_for("attendance"))
 
     today = date.today().isoformat()
-    conn.close()
     return render_template(
         "attendance.html",
         students=students,
@@ -565,41 +987,21 @@ def student_attendance(id):
     if not require_login():
         return redirect(url_for("login"))
 
-    department = current_department()
-    conn = get_db_connection()
-    student = conn.execute(
-        "SELECT * FROM students WHERE id = ? AND department = ?",
-        (id, department),
-    ).fetchone()
+    student = department_student(id)
     if not student:
-        conn.close()
         return "Student not found or not in your department.", 404
 
-    records = conn.execute(
-        """
-        SELECT date, status
-        FROM attendance
-        WHERE student_id = ?
-        ORDER BY date DESC
-        """,
-        (id,),
-    ).fetchall()
-
-    total = len(records)
-    presents = sum(1 for r in records if r["status"] == "Present")
-    absents = sum(1 for r in records if r["status"] == "Absent")
-    percent = (presents / total * 100) if total > 0 else 0
-
-    conn.close()
+    conn = get_db_connection()
+    records, counts = student_history(conn, id)
 
     return render_template(
         "student_attendance.html",
         student=student,
         records=records,
-        total=total,
-        presents=presents,
-        absents=absents,
-        percent=round(percent, 1),
+        total=counts["total"],
+        presents=counts["presents"],
+        absents=counts["absents"],
+        percent=counts["percent"],
     )
 
 
@@ -610,37 +1012,41 @@ def attendance_by_date():
         return redirect(url_for("login"))
 
     department = current_department()
-    date_str = request.args.get("date")
-    if not date_str:
-        date_str = date.today().isoformat()
+    # the bitmaps are addressed by day offset, so the date has to parse
+    date_str = parse_date_arg("date") or date.today().isoformat()
+
+    return render_by_date(date_str, by_date_rows(get_db_connection(), department, date_str))
+
+
+def by_date_rows(conn, department, date_str):
+    if app.config["ATTENDANCE_BITSETS"]:
+        return bitsets.by_date(conn, department, date_str)
+    with partitions.table_for(conn, date_str) as table:
+        return conn.execute(BY_DATE_SQL.format(attendance=table), (date_str, department)).fetchall()
 
-    conn = get_db_connection()
-    rows = conn.execute(
-        """
-        SELECT s.roll_no, s.name, a.status
-        FROM students s
-        LEFT JOIN attendance a
-          ON a.student_id = s.id AND a.date = ?
-        WHERE s.department = ?
-        ORDER BY s.roll_no
-        """,
-        (date_str, department),
-    ).fetchall()
-    conn.close()
 
+BY_DATE_SQL = """
+SELECT s.roll_no, s.name, a.status
+FROM students s
+LEFT JOIN {attendance} a
+  ON a.student_id = s.id AND a.date = ?
+WHERE s.department = ?
+ORDER BY s.roll_no
+"""
+
+
+def by_date_records(rows):
     records = []
-    present_count = 0
-    absent_count = 0
-    not_marked = 0
+    counts = {"present": 0, "absent": 0, "not_marked": 0}
 
     for r in rows:
         status = r["status"]
         if status == "Present":
-            present_count += 1
+            counts["present"] += 1
         elif status == "Absent":
-            absent_count += 1
+            counts["absent"] += 1
         else:
-            not_marked += 1
+            counts["not_marked"] += 1
             status = "Not Marked"
 
         records.append(
@@ -650,17 +1056,121 @@ def attendance_by_date():
                 "status": status,
             }
         )
+    return records, counts
+
 
+def render_by_date(date_str, rows):
+    records, counts = by_date_records(rows)
     return render_template(
         "attendance_by_date.html",
         date_str=date_str,
         records=records,
-        present_count=present_count,
-        absent_count=absent_count,
-        not_marked=not_marked,
+        present_count=counts["present"],
+        absent_count=counts["absent"],
+        not_marked=counts["not_marked"],
+    )
+
+
+# Month / term calendar of daily attendance (department-wise)
+@app.route("/attendance/calendar")
+def attendance_calendar():
+    if not require_login():
+        return redirect(url_for("login"))
+
+    department = current_department()
+    selected_course = request.args.get("course", "").strip()
+    kind, period, date_from, date_to = calendar_period()
+
+    conn = get_db_connection()
+    # the default month follows today's date; the dropdown spans departments
+    courses_version, courses = course_list.get_versioned(conn)
+    unchanged = rendering.not_modified(conn, department, date_from, date_to, courses_version)
+    if unchanged is not None:
+        return unchanged
+
+    days = rollup_days(conn, department, date_from, date_to, selected_course)
+    before = date.fromisoformat(date_from) - timedelta(days=1)
+    after = date.fromisoformat(date_to) + timedelta(days=1)
+    if kind == "term":
+        previous, following = partitions.term_for(before).name, partitions.term_for(after).name
+    else:
+        previous, following = before.isoformat()[:7], after.isoformat()[:7]
+
+    marked = sum(d["present"] + d["absent"] for d in days)
+    return render_template(
+        "attendance_calendar.html",
+        weeks=rollup.weeks(date_from, date_to, {d["date"]: d for d in days}),
+        kind=kind,
+        period=period,
+        previous=previous,
+        following=following,
+        courses=courses,
+        selected_course=selected_course,
+        days_taken=len(days),
+        percent=attendance_store.percent_of(sum(d["present"] for d in days), marked),
     )
 
 
+def calendar_period():
+    # ("term", "2024-T1", from, to) for ?term=, else ("month", "2024-03",
+    # from, to) for ?month= (default: this month)
+    term_name = request.args.get("term", "").strip()
+    if term_name:
+        try:
+            term = partitions.term_named(term_name)
+            return "term", term.name, term.date_from, term.date_to
+        except (ValueError, IndexError):
+            flash(f"Ignoring invalid term: {term_name}", "danger")
+
+    month = request.args.get("month", "").strip()
+    if month:
+        try:
+            return ("month", month, *rollup.month_range(month))
+        except ValueError:
+            flash(f"Ignoring invalid month: {month}", "danger")
+    month = date.today().isoformat()[:7]
+    return ("month", month, *rollup.month_range(month))
+
+
+def rollup_days(conn, department, date_from, date_to, course=None):
+    # courses whose students changed since the last read are recomputed first
+    if rollup.refresh_stale(conn, department):
+        conn.commit()
+    return rollup.days(conn, department, date_from, date_to, course or None)
+
+
+# Attendance export for a date range (department-wise), streamed
+@app.route("/attendance/export")
+def attendance_export():
+    if not require_login():
+        return redirect(url_for("login"))
+
+    department = current_department()
+    date_from = parse_date_arg("from")
+    date_to = parse_date_arg("to")
+
+    import export
+
+    fmt = request.args.get("format", "csv")
+    if fmt not in export.FORMATS:
+        return "Unsupported export format. Use csv, jsonl or parquet.", 400
+    if fmt == "parquet" and not export.parquet_available():
+        return "Parquet export needs pyarrow installed on the server.", 501
+
+    mimetype, extension = export.FORMATS[fmt]
+    filename = f"attendance_{department}_{date_from or 'start'}_{date_to or 'end'}.{extension}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    conn = get_db_connection()
+    chunks = export.stream(conn, department, date_from, date_to, fmt)
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        chunks = export.gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+
 # Attendance summary (department-wise)
 @app.route("/attendance/summary")
 def attendance_summary():
@@ -668,66 +1178,462 @@ def attendance_summary():
         return redirect(url_for("login"))
 
     department = current_department()
+    # optional date range; without one the all-time counters are used
+    date_from = parse_date_arg("from")
+    date_to = parse_date_arg("to")
+
     conn = get_db_connection()
-    rows = conn.execute(
-        """
-        SELECT s.id,
-               s.roll_no,
-               s.name,
-               SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) AS presents,
-               SUM(CASE WHEN a.status = 'Absent' THEN 1 ELSE 0 END)  AS absents,
-               COUNT(a.id) AS total_days
-        FROM students s
-        LEFT JOIN attendance a ON a.student_id = s.id
-        WHERE s.department = ?
-        GROUP BY s.id, s.roll_no, s.name
-        ORDER BY s.roll_no;
-        """,
-        (department,),
-    ).fetchall()
-    conn.close()
-
-    summary = []
-    low_students = []
+    snapshot_at = summary_snapshot_time(conn, department, date_from, date_to)
+    # the trend window ends today unless a range end is given
+    unchanged = rendering.not_modified(
+        conn, department, date.today().isoformat(), snapshot_at,
+        since=max(rendering.start_of_day(date.today()), snapshot_at or 0)
+    )
+    if unchanged is not None:
+        return unchanged
 
-    for r in rows:
-        total = r["total_days"] or 0
-        presents = r["presents"] or 0
-        absents = r["absents"] or 0
-        percent = (presents / total * 100) if total > 0 else 0
-
-        # Decide Category
-        if total == 0:
-            category = "No Data"
-        elif percent >= 90:
-            category = "Excellent"
-        elif percent >= 75:
-            category = "Good"
-        else:
-            category = "Needs Improvement"
-
-        entry = {
-            "roll_no": r["roll_no"],
-            "name": r["name"],
-            "presents": presents,
-            "absents": absents,
-            "total": total,
-            "percent": round(percent, 1),
-            "category": category,
-        }
-        summary.append(entry)
-
-        # Collect Low Attendance Students (<75%)
-        if total > 0 and percent < 75:
-            low_students.append(entry)
+    if snapshot_at is not None:
+        report, snapshot_at = snapshots.latest(conn, department)
+        return render_summary(report, date_from, date_to, snapshot_at)
+
+    import analytics
 
+    report = analytics.build_summary(
+        conn, department, date_from, date_to, bits=app.config["ATTENDANCE_BITSETS"]
+    )
+    return render_summary(report, date_from, date_to)
+
+
+def summary_snapshot_time(conn, department, date_from, date_to):
+    # computed_at of the nightly snapshot when the page may show it: the
+    # all-time view, no ?live=1, the snapshot is recent enough and nothing
+    # in the department changed after it was taken
+    if date_from or date_to or request.args.get("live") == "1" or not app.config["SUMMARY_SNAPSHOTS"]:
+        return None
+    computed_at = snapshots.computed_at(conn, department)
+    if computed_at is None or computed_at < time.time() - app.config["SUMMARY_SNAPSHOT_MAX_AGE"]:
+        return None
+    # changed_at has whole seconds: a change in the snapshot's second counts
+    _, changed_at = rendering.department_version(conn, department)
+    if changed_at is not None and changed_at >= int(computed_at):
+        return None
+    return computed_at
+
+
+def render_summary(report, date_from, date_to, snapshot_at=None):
     return render_template(
         "attendance_summary.html",
-        summary=summary,
-        low_students=low_students
+        summary=report["summary"],
+        low_students=report["low_students"],
+        weekday_pattern=report["weekday_pattern"],
+        trend_from=report["trend_from"],
+        trend_to=report["trend_to"],
+        date_from=date_from,
+        date_to=date_to,
+        snapshot_at=datetime.fromtimestamp(snapshot_at).strftime("%Y-%m-%d %H:%M") if snapshot_at else None,
     )
 
 
+# ---------- JSON API (v1) ----------
+# The same data as the HTML pages for the mobile client and integrations,
+# under /api/v1. Session cookie auth (POST /api/v1/login); writes only
+# accept application/json, which a cross-site form cannot send. GETs take
+# ?fields=a,b to return only those columns and answer 304 like the pages.
+
+API_STUDENT_FIELDS = ("id", "roll_no", "name", "email", "course", "semester", "phone")
+API_STATS_FIELDS = ("id", "roll_no", "name", "presents", "absents", "total", "percent", "last_date")
+API_BY_DATE_FIELDS = ("roll_no", "name", "status")
+API_DAILY_FIELDS = ("date", "present", "absent", "not_marked", "percent")
+API_SUMMARY_FIELDS = (
+    "id", "roll_no", "name", "presents", "absents", "total", "percent",
+    "category", "absence_streak", "longest_streak", "recent_alert",
+)
+API_MAX_IDS = 1000
+API_MAX_MARKS = 100
+
+API_STATS_SQL = """
+SELECT s.id, s.roll_no, s.name,
+       COALESCE(st.presents, 0) AS presents,
+       COALESCE(st.absents, 0) AS absents,
+       COALESCE(st.total, 0) AS total,
+       st.last_date
+FROM students s
+LEFT JOIN attendance_stats st ON st.student_id = s.id
+WHERE s.department = ? AND s.id IN (SELECT value FROM json_each(?))
+"""
+
+
+@app.errorhandler(jsonapi.ApiError)
+def api_error(exc):
+    return jsonify({"error": exc.message}), exc.status
+
+
+def api_teacher():
+    teacher = current_teacher()
+    if teacher is None:
+        raise jsonapi.ApiError(401, "login required")
+    return teacher
+
+
+def api_json_body():
+    body = request.get_json(silent=True) if request.is_json else None
+    if not isinstance(body, dict):
+        raise jsonapi.ApiError(415 if not request.is_json else 400, "expected a JSON object body")
+    return body
+
+
+@app.route("/api/v1/login", methods=["POST"])
+def api_login():
+    body = api_json_body()
+    username = str(body.get("username", ""))
+    password = str(body.get("password", ""))
+
+    key = ("teacher", username, request.remote_addr)
+    if login_throttle.blocked(key):
+        raise jsonapi.ApiError(429, "too many failed attempts")
+    try:
+        teacher = authenticate_teacher(username, password)
+    except passwords.HashingBusy:
+        raise jsonapi.ApiError(503, "server busy, retry shortly") from None
+    if not teacher:
+        login_throttle.record_failure(key)
+        raise jsonapi.ApiError(401, "invalid username or password")
+
+    login_throttle.reset(key)
+    start_teacher_session(teacher)
+    return jsonify({"id": teacher["id"], "name": teacher["name"], "department": teacher["department"]})
+
+
+@app.route("/api/v1/students")
+def api_students():
+    teacher = api_teacher()
+    fields = jsonapi.fields_arg(request.args.get("fields"), API_STUDENT_FIELDS)
+
+    conn = get_db_connection()
+    unchanged = rendering.not_modified(conn, teacher.department)
+    if unchanged is not None:
+        return unchanged
+
+    where, params = students_filter(request.args.get("q", "").strip(), request.args.get("course", "").strip())
+    sql, params, per_page, _ = students_page_query(where, params)
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = pagination.encode_cursor(rows[-1])
+    return jsonify({"students": jsonapi.pick(rows, fields), "next": next_cursor})
+
+
+@app.route("/api/v1/students/<int:id>")
+def api_student(id):
+    api_teacher()
+    fields = jsonapi.fields_arg(request.args.get("fields"), API_STUDENT_FIELDS)
+    student = department_student(id)
+    if not student:
+        raise jsonapi.ApiError(404, "student not found in your department")
+    return jsonify({field: getattr(student, field) for field in fields})
+
+
+@app.route("/api/v1/students/<int:id>/attendance")
+def api_student_attendance(id):
+    api_teacher()
+    if not department_student(id):
+        raise jsonapi.ApiError(404, "student not found in your department")
+    records, counts = student_history(get_db_connection(), id)
+    return jsonify({
+        "counts": counts,
+        "records": [{"date": r["date"], "status": r["status"]} for r in records],
+    })
+
+
+# Batch: counters for many students in one query, e.g. ?ids=4,8,15
+@app.route("/api/v1/students/stats")
+def api_student_stats():
+    teacher = api_teacher()
+    ids = jsonapi.ids_arg(request.args.get("ids"), API_MAX_IDS)
+    fields = jsonapi.fields_arg(request.args.get("fields"), API_STATS_FIELDS)
+
+    conn = get_db_connection()
+    found = {}
+    for row in conn.execute(API_STATS_SQL, (teacher.department, json.dumps(ids))):
+        entry = dict(row)
+        entry["percent"] = attendance_store.percent_of(entry["presents"], entry["total"])
+        found[entry["id"]] = entry
+    return jsonify({
+        "students": jsonapi.pick([found[i] for i in ids if i in found], fields),
+        "missing": [i for i in ids if i not in found],
+    })
+
+
+@app.route("/api/v1/attendance/by-date")
+def api_attendance_by_date():
+    teacher = api_teacher()
+    date_str = jsonapi.date_value(request.args.get("date"), "date") or date.today().isoformat()
+    fields = jsonapi.fields_arg(request.args.get("fields"), API_BY_DATE_FIELDS)
+
+    conn = get_db_connection()
+    unchanged = rendering.not_modified(
+        conn, teacher.department, date_str, since=rendering.start_of_day(date.today())
+    )
+    if unchanged is not None:
+        return unchanged
+
+    records, counts = by_date_records(by_date_rows(conn, teacher.department, date_str))
+    return jsonify({"date": date_str, "counts": counts, "records": jsonapi.pick(records, fields)})
+
+
+# Per-day totals for any range, e.g. ?from=2024-01-01&to=2024-06-30
+@app.route("/api/v1/attendance/daily")
+def api_attendance_daily():
+    teacher = api_teacher()
+    date_from, date_to = rollup.month_range(date.today().isoformat()[:7])
+    date_from = jsonapi.date_value(request.args.get("from"), "from") or date_from
+    date_to = jsonapi.date_value(request.args.get("to"), "to") or date_to
+    course = request.args.get("course", "").strip()
+    fields = jsonapi.fields_arg(request.args.get("fields"), API_DAILY_FIELDS)
+
+    conn = get_db_connection()
+    unchanged = rendering.not_modified(conn, teacher.department, date_from, date_to)
+    if unchanged is not None:
+        return unchanged
+
+    days = rollup_days(conn, teacher.department, date_from, date_to, course)
+    return jsonify({"from": date_from, "to": date_to, "days": jsonapi.pick(days, fields)})
+
+
+@app.route("/api/v1/attendance/summary")
+def api_attendance_summary():
+    teacher = api_teacher()
+    date_from = jsonapi.date_value(request.args.get("from"), "from")
+    date_to = jsonapi.date_value(request.args.get("to"), "to")
+    fields = jsonapi.fields_arg(request.args.get("fields"), API_SUMMARY_FIELDS)
+
+    conn = get_db_connection()
+    snapshot_at = summary_snapshot_time(conn, teacher.department, date_from, date_to)
+    unchanged = rendering.not_modified(
+        conn, teacher.department, date.today().isoformat(), snapshot_at,
+        since=max(rendering.start_of_day(date.today()), snapshot_at or 0),
+    )
+    if unchanged is not None:
+        return unchanged
+
+    if snapshot_at is not None:
+        report, snapshot_at = snapshots.latest(conn, teacher.department)
+    else:
+        import analytics
+
+        report = analytics.build_summary(
+            conn, teacher.department, date_from, date_to, bits=app.config["ATTENDANCE_BITSETS"]
+        )
+    return jsonify({
+        "from": date_from,
+        "to": date_to,
+        "snapshot_at": snapshot_at,
+        "trend_from": report["trend_from"],
+        "trend_to": report["trend_to"],
+        "weekday_pattern": report["weekday_pattern"],
+        "students": jsonapi.pick(report["summary"], fields),
+    })
+
+
+# Open low-attendance alerts (written by the nightly snapshot job)
+@app.route("/api/v1/alerts")
+def api_alerts():
+    teacher = api_teacher()
+    rows = snapshots.open_alerts(get_db_connection(), teacher.department)
+    return jsonify({"alerts": [dict(row) for row in rows]})
+
+
+# Batch: several (course, date) sheets in one call:
+#   {"marks": [{"course": "BCA-1", "date": "2024-03-01", "present": [4, 8]}, ...]}
+# Students of the course not listed in "present" are marked absent, as on
+# the form. Every entry is checked before anything is written.
+@app.route("/api/v1/attendance", methods=["POST"])
+def api_mark_attendance():
+    teacher = api_teacher()
+    marks = api_json_body().get("marks")
+    if not isinstance(marks, list) or not marks:
+        raise jsonapi.ApiError(400, "marks must be a non-empty list")
+    if len(marks) > API_MAX_MARKS:
+        raise jsonapi.ApiError(400, f"at most {API_MAX_MARKS} marks per request")
+
+    conn = get_db_connection()
+    sheets = []
+    for n, mark in enumerate(marks):
+        if not isinstance(mark, dict):
+            raise jsonapi.ApiError(400, f"marks[{n}] must be an object")
+        course = mark.get("course")
+        date_str = jsonapi.date_value(mark.get("date"), f"marks[{n}].date")
+        present = mark.get("present", [])
+        if not isinstance(course, str) or not course or date_str is None:
+            raise jsonapi.ApiError(400, f"marks[{n}] needs a course (string) and a date")
+        if not isinstance(present, list) or not all(type(i) is int for i in present):
+            raise jsonapi.ApiError(400, f"marks[{n}].present must be a list of student ids")
+
+        archived = partitions.archived_term(conn, date_str)
+        if archived is not None:
+            raise jsonapi.ApiError(409, f"{date_str} is in archived term {archived['term']}; it is read-only")
+        student_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM students WHERE course = ? AND department = ? ORDER BY roll_no",
+            (course, teacher.department),
+        )]
+        if not student_ids:
+            raise jsonapi.ApiError(404, f"no students of course {course} in your department")
+        sheets.append((course, date_str, student_ids, set(present)))
+
+    if app.config["ATTENDANCE_WRITE_BEHIND"]:
+        # all submitted before waiting, so the writer commits them together
+        futures = [attendance_writer.submit(*sheet) for sheet in sheets]
+        try:
+            results = [future.result(30) for future in futures]
+        except TimeoutError:
+            # still queued behind other saves; they may yet be applied
+            raise jsonapi.ApiError(503, "attendance writer busy, retry shortly") from None
+    else:
+        results = [attendance_store.save_course_attendance(conn, *sheet) for sheet in sheets]
+        conn.commit()
+    if any(counts["inserted"] or counts["updated"] for counts in results):
+        invalidate_dashboard(teacher.department)
+
+    return jsonify({"results": [
+        {"course": course, "date": date_str, **counts}
+        for (course, date_str, _, _), counts in zip(sheets, results)
+    ]})
+
+
+# ---------- ASYNC MODE ----------
+# With STUDENTS_ASYNC=1 these replace the sync views of the same endpoints
+# (so url_for() is unchanged) and wait on async_db instead of holding a
+# pooled connection. Auth checks still use the sync helpers; they are
+# answered from principal_cache almost every time.
+
+async def home_async():
+    if not require_login():
+        return redirect(url_for("login"))
+
+    department = current_department()
+    today = date.today().isoformat()
+
+    unchanged = rendering.not_modified(
+        get_db_connection(), department, today, since=rendering.start_of_day(date.today())
+    )
+    if unchanged is not None:
+        return unchanged
+
+    key = (department, today)
+    stats = dashboard_cache.get(key)
+    if stats is None:
+        stats = dict(await async_database.fetchone(HOME_STATS_SQL, (today, department)))
+        dashboard_cache.set(key, stats)
+
+    return render_home(stats)
+
+
+async def students_async():
+    if request.args.get("stream") == "1" or app.config["STUDENTS_STREAM"]:
+        # the streamed listing renders off a sync cursor
+        return students()
+
+    if not require_login():
+        return redirect(url_for("login"))
+
+    courses_version, courses = course_list.get_versioned(get_db_connection())
+    unchanged = rendering.not_modified(get_db_connection(), current_department(), courses_version)
+    if unchanged is not None:
+        return unchanged
+
+    q = request.args.get("q", "").strip()
+    selected_course = request.args.get("course", "").strip()
+
+    where, params = students_filter(q, selected_course)
+    sql, params, per_page, after = students_page_query(where, params)
+    students_rows = await async_database.fetchall(sql, params)
+    return render_students_page(students_rows, q, courses, selected_course, per_page, after)
+
+
+async def student_dashboard_async():
+    if "student_id" not in session:
+        flash("Please login as student.", "danger")
+        return redirect(url_for("student_login"))
+
+    student = current_student()
+    if not student:
+        flash("Student not found.", "danger")
+        return redirect(url_for("student_login"))
+
+    if app.config["ATTENDANCE_BITSETS"]:
+        rows = await async_database.fetchall(bitsets.STUDENT_BITS_SQL, (student.id,))
+        records, counts = bitsets.history_from_rows(rows)
+        return render_student_dashboard(student, records, attendance_store.counts_from_row(counts))
+
+    if partitions.has_archives(get_db_connection()):
+        # archived terms are attached per query on the sync connection
+        return student_dashboard()
+
+    records, counts = await asyncio.gather(
+        async_database.fetchall(STUDENT_RECORDS_SQL.format(attendance="attendance"), (student.id,)),
+        async_database.fetchone(attendance_store.STUDENT_COUNTS_SQL, (student.id,)),
+    )
+    return render_student_dashboard(student, records, attendance_store.counts_from_row(counts))
+
+
+async def attendance_by_date_async():
+    if not require_login():
+        return redirect(url_for("login"))
+
+    department = current_department()
+    date_str = parse_date_arg("date") or date.today().isoformat()
+
+    if app.config["ATTENDANCE_BITSETS"]:
+        term = partitions.term_for(date_str)
+        rows = await async_database.fetchall(bitsets.BY_DATE_BITS_SQL, (term.name, department))
+        return render_by_date(date_str, bitsets.statuses_on(rows, term, date_str))
+
+    if partitions.archived_term(get_db_connection(), date_str) is not None:
+        return attendance_by_date()
+
+    rows = await async_database.fetchall(BY_DATE_SQL.format(attendance="attendance"), (date_str, department))
+    return render_by_date(date_str, rows)
+
+
+async def attendance_summary_async():
+    if not require_login():
+        return redirect(url_for("login"))
+
+    department = current_department()
+    date_from = parse_date_arg("from")
+    date_to = parse_date_arg("to")
+
+    snapshot_at = summary_snapshot_time(get_db_connection(), department, date_from, date_to)
+    unchanged = rendering.not_modified(
+        get_db_connection(), department, date.today().isoformat(), snapshot_at,
+        since=max(rendering.start_of_day(date.today()), snapshot_at or 0),
+    )
+    if unchanged is not None:
+        return unchanged
+
+    if snapshot_at is not None:
+        report, snapshot_at = snapshots.latest(get_db_connection(), department)
+        return render_summary(report, date_from, date_to, snapshot_at)
+
+    import analytics
+
+    # NumPy work: a worker thread with this request's sync connection
+    report = await analytics.build_summary_async(
+        get_db_connection(), department, date_from, date_to, bits=app.config["ATTENDANCE_BITSETS"]
+    )
+    return render_summary(report, date_from, date_to)
+
+
+ASYNC_VIEWS = {
+    "home": home_async,
+    "students": students_async,
+    "student_dashboard": student_dashboard_async,
+    "attendance_by_date": attendance_by_date_async,
+    "attendance_summary": attendance_summary_async,
+}
+
+
 if __name__ == "__main__":
-    print("Running Flask development server...")
-    app.run(debug=True)
+    # the debugger runs arbitrary code from the browser: opt in explicitly
+    create_app().run(debug=os.environ.get("FLASK_DEBUG") == "1")
@@ -0,0 +1,16 @@
+# ASGI entry point for the async mode:
+#
+#     pip install aiosqlite "flask[async]" uvicorn
+#     uvicorn asgi:application --port 8000
+#
+# Flask is a WSGI framework, so asgiref's adapter runs it for the ASGI
+# server; the read-heavy views are async and wait on async_db.
+import os
+
+os.environ.setdefault("STUDENTS_ASYNC", "1")
+
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+
+from app import create_app  # noqa: E402
+
+application = WsgiToAsgi(create_app())
@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+import threading
+
+import db
+
+# Async data layer for the ASGI deployment (STUDENTS_ASYNC=1).
+#
+# Flask runs every async view on an event loop of its own, so the aiosqlite
+# connections cannot belong to the request. They live on one long-running
+# loop in a background thread instead: a handful of reader connections
+# that views borrow for a query. Writes stay on the sync views, where
+# attendance saves already go through the AttendanceWriter thread.
+
+
+class AsyncDatabase:
+    def __init__(self, db_name, readers=4):
+        try:
+            import aiosqlite
+        except ImportError:
+            raise RuntimeError("Async mode needs aiosqlite installed (pip install aiosqlite 'flask[async]').")
+
+        self._aiosqlite = aiosqlite
+        self.db_name = db_name
+        self.readers = readers
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="async-db", daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+
+    async def _connect(self):
+        conn = await self._aiosqlite.connect(
+            self.db_name, cached_statements=db.STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in db.PRAGMAS:
+            await conn.execute(pragma)
+        return conn
+
+    async def _open(self):
+        self._idle = asyncio.Queue()
+        for _ in range(self.readers):
+            self._idle.put_nowait(await self._connect())
+
+    async def _run(self, coro):
+        # hop from the caller's loop onto ours and wait without blocking
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    # ---------- READS ----------
+
+    async def _query(self, sql, params, one):
+        conn = await self._idle.get()
+        try:
+            async with conn.execute(sql, params) as cursor:
+                return await (cursor.fetchone() if one else cursor.fetchall())
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def fetchall(self, sql, params=()):
+        return await self._run(self._query(sql, params, one=False))
+
+    async def fetchone(self, sql, params=()):
+        return await self._run(self._query(sql, params, one=True))
+
+    # ---------- SHUTDOWN ----------
+
+    async def _close(self):
+        while not self._idle.empty():
+            await self._idle.get_nowait().close()
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
@@ -0,0 +1,307 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import bitsets
+import db
+import partitions
+import rollup
+
+UPSERT_SQL = """
+INSERT INTO attendance (student_id, date, status)
+VALUES (?, ?, ?)
+ON CONFLICT (student_id, date) DO UPDATE SET status = excluded.status
+"""
+
+# attendance_stats as it should be, computed from the raw rows of one
+# partition (the hot table or an archived term)
+EXPECTED_STATS_SQL = """
+SELECT student_id,
+       SUM(status = 'Present') AS presents,
+       SUM(status = 'Absent') AS absents,
+       COUNT(*) AS total,
+       MAX(date) AS last_date
+FROM {attendance}
+WHERE student_id IN (SELECT id FROM main.students)
+GROUP BY student_id
+"""
+
+
+# ---------- SAVE ----------
+
+def save_course_attendance(conn, course, date_str, student_ids, present_ids):
+    # Writes one day of attendance for a course. Only rows that are new or
+    # whose status actually changed are sent to SQLite, in a single
+    # executemany upsert. The caller commits.
+    present = set(present_ids)
+
+    existing = dict(conn.execute(
+        """
+        SELECT a.student_id, a.status
+        FROM attendance a
+        JOIN students s ON s.id = a.student_id
+        WHERE a.date = ? AND s.course = ?
+        """,
+        (date_str, course),
+    ).fetchall())
+
+    changes = []
+    inserted = updated = unchanged = 0
+    for sid in student_ids:
+        status = "Present" if sid in present else "Absent"
+        old_status = existing.get(sid)
+        if old_status == status:
+            unchanged += 1
+            continue
+        if old_status is None:
+            inserted += 1
+        else:
+            updated += 1
+        changes.append((sid, date_str, status))
+
+    # attendance_stats follows along through the triggers from migration 5
+    if changes:
+        conn.executemany(UPSERT_SQL, changes)
+        bitsets.set_days(conn, changes)
+        rollup.refresh_day(conn, course, date_str)
+
+    return {"inserted": inserted, "updated": updated, "unchanged": unchanged}
+
+
+# ---------- WRITE-BEHIND QUEUE ----------
+
+class AttendanceWriter:
+    # One thread, one connection, all attendance saves. Submissions that
+    # arrive within `max_delay` seconds of each other are applied in the same
+    # transaction, so a burst of teachers costs one commit (and one fsync)
+    # instead of one each, and nobody queues on SQLite's write lock.
+    # submit() hands back a Future that resolves once the batch containing
+    # the save has committed.
+
+    def __init__(self, db_name, max_delay=0.005, max_batch=64, synchronous="FULL"):
+        self.db_name = db_name
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        self.batches = 0
+        self.saves = 0
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # a forked web worker gets its own writer thread on first save
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._forget_thread)
+
+    def _forget_thread(self):
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, course, date_str, student_ids, present_ids):
+        future = Future()
+        self._ensure_running()
+        self._jobs.put((future, (course, date_str, list(student_ids), set(present_ids))))
+        return future
+
+    def save(self, course, date_str, student_ids, present_ids, timeout=30):
+        return self.submit(course, date_str, student_ids, present_ids).result(timeout)
+
+    def _ensure_running(self):
+        with self._lock:
+            # also replaces a thread that died, so later saves do not just
+            # wait out their timeout
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="attendance-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _next_batch(self):
+        first = self._jobs.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                # stop() was called; finish this batch first
+                self._jobs.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        conn = db.connect(self.db_name)
+        # an acknowledged save must survive a power cut; batching is what
+        # keeps that affordable
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self._apply(conn, batch)
+        finally:
+            conn.close()
+
+    def _apply(self, conn, batch):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, args in batch:
+                # a savepoint per save keeps one bad submission from
+                # sinking the rest of the batch
+                conn.execute("SAVEPOINT save")
+                try:
+                    results.append((future, save_course_attendance(conn, *args), None))
+                    conn.execute("RELEASE save")
+                except Exception as exc:   # reported to that save's caller only
+                    conn.execute("ROLLBACK TO save")
+                    conn.execute("RELEASE save")
+                    results.append((future, None, exc))
+            conn.commit()
+        except Exception as exc:
+            if conn.in_transaction:
+                conn.rollback()
+            for future, _ in batch:
+                future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.saves += len(batch)
+        for future, counts, exc in results:
+            if exc is None:
+                future.set_result(counts)
+            else:
+                future.set_exception(exc)
+
+    def stop(self):
+        # drains what is already queued, then ends the thread
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "saves": self.saves,
+            "queued": self._jobs.qsize(),
+            "saves_per_batch": round(self.saves / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+def parse_ids(values):
+    # checkbox values arrive as strings; ignore anything that is not an id
+    return {int(v) for v in values if v.isdigit()}
+
+
+# ---------- COUNTERS ----------
+
+def percent_of(presents, total):
+    return round(presents / total * 100, 1) if total > 0 else 0
+
+
+STUDENT_COUNTS_SQL = "SELECT presents, absents, total FROM attendance_stats WHERE student_id = ?"
+
+
+def student_counts(conn, student_id):
+    return counts_from_row(conn.execute(STUDENT_COUNTS_SQL, (student_id,)).fetchone())
+
+
+def counts_from_row(row):
+    presents, absents, total = tuple(row) if row else (0, 0, 0)
+    return {
+        "presents": presents,
+        "absents": absents,
+        "total": total,
+        "percent": percent_of(presents, total),
+    }
+
+
+def expected_stats(conn):
+    # {student_id: (presents, absents, total, last_date)} summed over the
+    # hot table and every archived term
+    expected = {}
+    for table in partitions.sources(conn):
+        for sid, presents, absents, total, last_date in conn.execute(
+            EXPECTED_STATS_SQL.format(attendance=table)
+        ):
+            have = expected.get(sid)
+            if have is not None:
+                presents += have[0]
+                absents += have[1]
+                total += have[2]
+                last_date = max(last_date, have[3])
+            expected[sid] = (presents, absents, total, last_date)
+    return expected
+
+
+def find_drift(conn):
+    # rows where the stored counters disagree with the attendance table
+    expected = expected_stats(conn)
+    stored = {
+        r[0]: tuple(r[1:])
+        for r in conn.execute(
+            "SELECT student_id, presents, absents, total, last_date FROM attendance_stats"
+        )
+    }
+    drift = []
+    for sid in sorted(expected.keys() | stored.keys()):
+        want = expected.get(sid)
+        have = stored.get(sid)
+        # a zeroed counter row is the same as no row at all
+        if have is not None and have[2] == 0 and want is None:
+            continue
+        if want != have:
+            drift.append((sid, have, want))
+    return drift
+
+
+def rebuild_stats(conn):
+    expected = expected_stats(conn)
+    conn.execute("DELETE FROM attendance_stats")
+    conn.executemany(
+        "INSERT INTO attendance_stats (student_id, presents, absents, total, last_date) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(sid,) + row for sid, row in expected.items()],
+    )
+    conn.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or rebuild the attendance_stats counters.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--db", default="students.db", help="path to the SQLite database")
+    args = parser.parse_args(argv)
+
+    # db.connect: archived terms are attached through file: URIs
+    conn = db.connect(args.db)
+    drift = find_drift(conn)
+    for sid, have, want in drift:
+        print(f"student {sid}: stored {have}, expected {want}")
+    print(f"{len(drift)} student(s) out of sync.")
+
+    if args.command == "rebuild":
+        rebuild_stats(conn)
+        print("attendance_stats rebuilt from the attendance table.")
+    conn.close()
+
+    if args.command == "verify" and drift:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
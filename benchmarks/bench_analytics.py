@@ -0,0 +1,85 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import analytics
+from benchmarks.synthetic import build_db
+
+# the attendance_summary() query and Python loop this module replaced
+LOOP_SQL = """
+SELECT s.id, s.roll_no, s.name,
+       SUM(CASE WHEN a.status = 'Present' THEN 1 ELSE 0 END) AS presents,
+       SUM(CASE WHEN a.status = 'Absent' THEN 1 ELSE 0 END) AS absents,
+       COUNT(a.id) AS total_days
+FROM students s
+LEFT JOIN attendance a ON a.student_id = s.id
+WHERE s.department = ?
+GROUP BY s.id, s.roll_no, s.name
+ORDER BY s.roll_no
+"""
+
+
+def loop_summary(conn, department):
+    summary = []
+    for r in conn.execute(LOOP_SQL, (department,)):
+        total = r["total_days"] or 0
+        percent = (r["presents"] / total * 100) if total > 0 else 0
+        if total == 0:
+            category = "No Data"
+        elif percent >= 90:
+            category = "Excellent"
+        elif percent >= 75:
+            category = "Good"
+        else:
+            category = "Needs Improvement"
+        summary.append((r["roll_no"], percent, category))
+    return summary
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    fn()
+    print(f"{label:40s} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attendance analytics on a students x days matrix.")
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "analytics.db")
+    # one department holding every student, school days ending around today
+    start = date.today() - timedelta(days=args.days * 7 // 5)
+    dates = build_db(path, students=args.students, days=args.days, start=start)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("UPDATE students SET department = 'BCA'")
+    conn.commit()
+
+    print(f"{args.students} students x {len(dates)} days")
+    timed("old GROUP BY + Python loop", lambda: loop_summary(conn, "BCA"))
+
+    matrix = None
+
+    def load():
+        nonlocal matrix
+        matrix = analytics.load_matrix(conn, "BCA")
+
+    timed("load int8 matrix", load)
+    timed("counts + categories", lambda: analytics.categories(*analytics.counts(matrix)))
+    timed("rolling 7-day percent", lambda: analytics.rolling_percent(matrix, 7))
+    timed("absence streaks", lambda: analytics.absence_streaks(matrix))
+    timed("weekday pattern", lambda: analytics.weekday_pattern(matrix))
+    timed("threshold alerts", lambda: analytics.threshold_alerts(matrix))
+    timed("build_summary (all time, 30-day trend)", lambda: analytics.build_summary(conn, "BCA"))
+    timed("build_summary (full date range)", lambda: analytics.build_summary(
+        conn, "BCA", date_from=dates[0], date_to=dates[-1]))
+    print(f"matrix size {matrix.data.nbytes / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import gzip
+import os
+import tempfile
+import time
+
+from benchmarks.bench_templates import median_ms
+from benchmarks.synthetic import TEACHER_PASSWORD, build_db, teacher_username
+
+
+def body_size(client, url):
+    body = client.get(url).get_data()
+    return len(body), len(gzip.compress(body))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Payload bytes and latency: HTML pages vs the JSON API.")
+    parser.add_argument("--students", type=int, default=10_000, help="spread over 5 departments")
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=100, help="students per batch stats call")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "api.db")
+    build_db(path, students=args.students, days=args.days, teachers_per_department=1)
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    import app as app_module
+    import jsonapi
+
+    app_module.create_app()
+
+    app_module.app.config["STUDENTS_MAX_PAGE_SIZE"] = args.students
+    client = app_module.app.test_client()
+    client.post("/login", data={"username": teacher_username("BCA"), "password": TEACHER_PASSWORD})
+    client.get("/home")   # shows (and drops) the login flash message
+    print(f"JSON encoder: {'orjson' if jsonapi.orjson else 'json (stdlib)'}")
+
+    department_rows = args.students // 5
+    day = client.get("/api/v1/students/stats?ids=1&fields=last_date").get_json()["students"][0]["last_date"]
+    pairs = [
+        ("by date", f"/attendance/by-date?date={day}", f"/api/v1/attendance/by-date?date={day}"),
+        ("by date, 2 fields", f"/attendance/by-date?date={day}",
+         f"/api/v1/attendance/by-date?date={day}&fields=roll_no,status"),
+        ("summary", "/attendance/summary", "/api/v1/attendance/summary"),
+        ("summary, 2 fields", "/attendance/summary", "/api/v1/attendance/summary?fields=roll_no,percent"),
+        ("students page", f"/students?per_page={department_rows}",
+         f"/api/v1/students?per_page={department_rows}"),
+        ("students page, 2 fields", f"/students?per_page={department_rows}",
+         f"/api/v1/students?per_page={department_rows}&fields=id,name"),
+    ]
+    print(f"\n{department_rows} students in the department; bytes raw / gzip, median latency")
+    print(f"{'':24s} {'HTML':>22s} {'JSON':>22s}")
+    for label, html_url, api_url in pairs:
+        html_bytes, html_gz = body_size(client, html_url)
+        api_bytes, api_gz = body_size(client, api_url)
+        html_ms, _ = median_ms(client, html_url, args.requests)
+        api_ms, status = median_ms(client, api_url, args.requests)
+        assert status == 200, (api_url, status)
+        print(f"{label:24s} {html_bytes:9d} / {html_gz:7d} {html_ms:6.1f} ms"
+              f" {api_bytes:9d} / {api_gz:7d} {api_ms:6.1f} ms")
+
+    # one page per student vs one batch call
+    ids = [s["id"] for s in client.get(
+        f"/api/v1/students?per_page={args.batch}&fields=id"
+    ).get_json()["students"]]
+    start = time.perf_counter()
+    html_bytes = sum(len(client.get(f"/students/{i}/attendance").get_data()) for i in ids)
+    html_ms = (time.perf_counter() - start) * 1000
+    batch_url = "/api/v1/students/stats?ids=" + ",".join(map(str, ids))
+    api_bytes, _ = body_size(client, batch_url)
+    api_ms, _ = median_ms(client, batch_url, args.requests)
+    print(f"\nstats of {len(ids)} students: {len(ids)} HTML pages {html_bytes} bytes {html_ms:.1f} ms,"
+          f" 1 batch call {api_bytes} bytes {api_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import argparse
+import http.cookiejar
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from benchmarks.bench_connections import percentile
+from benchmarks.synthetic import build_db
+
+ROUTES = [
+    "/home",
+    "/students",
+    "/attendance/by-date",
+    "/attendance/summary",
+]
+
+SERVERS = {
+    # threaded werkzeug server, plain sync views
+    "sync": lambda port: [
+        sys.executable, "-c",
+        f"from app import create_app; create_app().run(port={port}, threaded=True, use_reloader=False)",
+    ],
+    # uvicorn + asgi.py, async read views over aiosqlite
+    "async": lambda port: [
+        sys.executable, "-m", "uvicorn", "asgi:application",
+        "--port", str(port), "--log-level", "warning",
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/login", timeout=2).close()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit(f"server on port {port} did not come up")
+
+
+def logged_in_opener(base):
+    opener = urllib.request.build_opener(
+        urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+    )
+    data = urllib.parse.urlencode({"username": "bench", "password": "bench"}).encode()
+    opener.open(base + "/login", data=data).close()
+    return opener
+
+
+def run_load(base, clients, duration):
+    times = {route: [] for route in ROUTES}
+    errors = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client(offset):
+        opener = logged_in_opener(base)
+        local = {route: [] for route in ROUTES}
+        i = offset
+        while time.perf_counter() < stop:
+            route = ROUTES[i % len(ROUTES)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                with opener.open(base + route, timeout=60) as response:
+                    response.read()
+            except (urllib.error.URLError, ConnectionError) as exc:
+                errors.append(str(exc))
+                continue
+            local[route].append(time.perf_counter() - start)
+        with lock:
+            for route, samples in local.items():
+                times[route].extend(samples)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return times, errors
+
+
+def describe(label, times, errors, duration):
+    print(f"\n=== {label} ===")
+    everything = [t for samples in times.values() for t in samples]
+    for route, samples in list(times.items()) + [("all routes", everything)]:
+        if samples:
+            print(f"{route:22s} req/s {len(samples) / duration:8.1f}"
+                  f"  p50 {statistics.median(samples) * 1000:8.2f} ms"
+                  f"  p99 {percentile(samples, 99) * 1000:8.2f} ms")
+    print(f"errors {len(errors)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync WSGI vs async ASGI mode under concurrent load.")
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "async.db")
+    print(f"Building {args.students} students x {args.days} days ...")
+    build_db(path, students=args.students, days=args.days)
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for mode in args.modes.split(","):
+        port = free_port()
+        env = dict(os.environ, STUDENTS_DB=path, PASSWORD_HASH_WORKERS="0")
+        env["STUDENTS_ASYNC"] = "1" if mode == "async" else "0"
+        server = subprocess.Popen(SERVERS[mode](port), cwd=root, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            base = f"http://127.0.0.1:{port}"
+            data = urllib.parse.urlencode({
+                "username": "bench", "password": "bench", "name": "Bench",
+                "department": "BCA", "code": "admin123",
+            }).encode()
+            urllib.request.urlopen(base + "/register", data=data).close()
+
+            times, errors = run_load(base, args.clients, args.duration)
+            describe(f"{mode}, {args.clients} clients", times, errors, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
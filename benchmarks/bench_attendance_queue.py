@@ -0,0 +1,127 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import attendance_store
+import db
+from benchmarks.bench_connections import percentile
+from benchmarks.synthetic import build_db
+
+
+def course_rosters(path):
+    conn = sqlite3.connect(path)
+    rosters = {}
+    for sid, course in conn.execute("SELECT id, course FROM students ORDER BY roll_no"):
+        rosters.setdefault(course, []).append(sid)
+    conn.close()
+    return rosters
+
+
+def direct_saver(path, synchronous, busy_timeout):
+    # what attendance() does without the queue: each request saves and
+    # commits on its own connection
+    local = threading.local()
+
+    def save(course, day, students, present):
+        if not hasattr(local, "conn"):
+            local.conn = db.connect(path)
+            local.conn.execute(f"PRAGMA synchronous = {synchronous}")
+            local.conn.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        conn = local.conn
+        try:
+            attendance_store.save_course_attendance(conn, course, day, students, present)
+            conn.commit()
+        except sqlite3.OperationalError:
+            conn.rollback()
+            raise
+
+    return save
+
+
+def run(save, rosters, teachers, submissions, seed):
+    times = []
+    errors = []
+    lock = threading.Lock()
+    courses = sorted(rosters)
+    barrier = threading.Barrier(teachers)
+
+    def teacher(n):
+        rng = random.Random(seed + n)
+        course = courses[n % len(courses)]
+        students = rosters[course]
+        local = []
+        barrier.wait()
+        for k in range(submissions):
+            # every teacher saves a new period at the same moment, each on
+            # their own run of days
+            day = (date(2031, 1, 1) + timedelta(days=n * submissions + k)).isoformat()
+            present = {sid for sid in students if rng.random() < 0.85}
+            start = time.perf_counter()
+            try:
+                save(course, day, students, present)
+            except sqlite3.OperationalError as exc:
+                with lock:
+                    errors.append(str(exc))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            times.extend(local)
+
+    threads = [threading.Thread(target=teacher, args=(n,)) for n in range(teachers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return times, errors, time.perf_counter() - start
+
+
+def describe(label, times, errors, elapsed):
+    print(f"\n=== {label} ===")
+    if times:
+        print(f"saves/s {len(times) / elapsed:8.1f}"
+              f"  p50 {statistics.median(times) * 1000:7.2f} ms"
+              f"  p99 {percentile(times, 99) * 1000:7.2f} ms")
+    locked = sum("locked" in e for e in errors)
+    total = len(times) + len(errors)
+    print(f"errors {len(errors)} of {total} ({locked} 'database is locked')")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent attendance saves: direct commits vs the writer queue.")
+    parser.add_argument("--students", type=int, default=2_000, help="spread over 20 courses")
+    parser.add_argument("--teachers", type=int, default=40)
+    parser.add_argument("--submissions", type=int, default=20, help="saves per teacher")
+    parser.add_argument("--synchronous", default="FULL", choices=["NORMAL", "FULL"])
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="ms, direct mode")
+    parser.add_argument("--max-delay", type=float, default=0.005, help="queue batching window, s")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    paths = {}
+    for mode in ("direct", "queue"):
+        paths[mode] = os.path.join(workdir, f"{mode}.db")
+        build_db(paths[mode], students=args.students, days=0)
+    rosters = course_rosters(paths["direct"])
+
+    save = direct_saver(paths["direct"], args.synchronous, args.busy_timeout)
+    results = run(save, rosters, args.teachers, args.submissions, seed=1)
+    describe(f"direct commit per save, {args.teachers} teachers, synchronous={args.synchronous}", *results)
+
+    writer = attendance_store.AttendanceWriter(
+        paths["queue"], max_delay=args.max_delay, synchronous=args.synchronous
+    )
+    results = run(writer.save, rosters, args.teachers, args.submissions, seed=1)
+    writer.stop()
+    describe(f"writer queue, {args.teachers} teachers, synchronous={args.synchronous}", *results)
+    print("writer", writer.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+import attendance_store
+import db
+from benchmarks.synthetic import build_db
+
+
+# ---------- SAVE STRATEGIES ----------
+
+def old_save(conn, course, date_str, students, present_ids):
+    # the original attendance() POST: delete the course/day, insert row by row,
+    # membership checked against a list of strings
+    present_list = [str(sid) for sid in present_ids]
+    conn.execute(
+        """
+        DELETE FROM attendance
+        WHERE date = ?
+          AND student_id IN (SELECT id FROM students WHERE course = ?)
+        """,
+        (date_str, course),
+    )
+    for sid in students:
+        status = "Present" if str(sid) in present_list else "Absent"
+        conn.execute(
+            "INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+            (sid, date_str, status),
+        )
+    conn.commit()
+
+
+def new_save(conn, course, date_str, students, present_ids):
+    attendance_store.save_course_attendance(conn, course, date_str, students, set(present_ids))
+    conn.commit()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run(size, repeat, rng):
+    path = os.path.join(tempfile.mkdtemp(), f"save_{size}.db")
+    # one department, one course: every student ends up in "BCA-1"
+    build_db(path, students=size, days=0)
+    conn = db.connect(path)
+    conn.execute("UPDATE students SET department = 'BCA', course = 'BCA-1'")
+    conn.commit()
+    students = [r[0] for r in conn.execute("SELECT id FROM students ORDER BY roll_no")]
+
+    present = {sid for sid in students if rng.random() < 0.85}
+    # a re-save where 5% of the class flipped status
+    flipped = set(present)
+    for sid in rng.sample(students, max(1, size // 20)):
+        flipped ^= {sid}
+
+    results = {}
+    for i, (label, fn) in enumerate((("old", old_save), ("new", new_save))):
+        first = []
+        resave = []
+        for n in range(repeat):
+            # each strategy saves its own days
+            day = (date(2030, 1, 1) + timedelta(days=i * repeat + n)).isoformat()
+            first.append(timed(fn, conn, "BCA-1", day, students, present))
+            resave.append(timed(fn, conn, "BCA-1", day, students, flipped))
+        results[label] = (min(first), min(resave))
+    conn.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attendance save: delete+insert loop vs diff upsert.")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    print(f"{'students':>9s} {'path':>4s} {'first save':>12s} {'5% re-save':>12s}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        results = run(size, args.repeat, rng)
+        for label, (first, resave) in results.items():
+            print(f"{size:9d} {label:>4s} {first * 1000:9.2f} ms {resave * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import tempfile
+from datetime import date, timedelta
+
+import analytics
+import attendance_store
+import bitsets
+import db
+import partitions
+from benchmarks.bench_partitions import median_ms
+from benchmarks.synthetic import build_db
+
+
+def table_bytes(conn, table):
+    # the table plus every index on it, from the dbstat virtual table
+    return conn.execute(
+        """
+        SELECT SUM(pgsize) FROM dbstat
+        WHERE name = ? OR name IN (SELECT name FROM sqlite_master WHERE tbl_name = ? AND type = 'index')
+        """,
+        (table, table),
+    ).fetchone()[0] or 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Row-per-day attendance vs per-term bitmaps.")
+    parser.add_argument("--students", type=int, default=2_000, help="spread over 5 departments")
+    parser.add_argument("--years", default="1,2,4", help="comma-separated history lengths")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app_module = None
+    for years in (float(y) for y in args.years.split(",")):
+        path = os.path.join(tempfile.mkdtemp(), "bitsets.db")
+        start = date.today() - timedelta(days=round(years * 365))
+        dates = build_db(path, students=args.students, start=start, years=years)
+        if app_module is None:
+            os.environ["STUDENTS_DB"] = path
+            os.environ["PASSWORD_HASH_WORKERS"] = "0"
+            import app as app_module
+
+            app_module.create_app()
+
+        conn = db.connect(path)
+        student = conn.execute("SELECT id, department FROM students ORDER BY id LIMIT 1").fetchone()
+        department, student_id = student["department"], student["id"]
+        day = dates[-1]
+        term = partitions.term_for(day)
+
+        def rows_by_date():
+            return conn.execute(app_module.BY_DATE_SQL.format(attendance="attendance"), (day, department)).fetchall()
+
+        def rows_history():
+            return (app_module.student_records(conn, student_id),
+                    attendance_store.student_counts(conn, student_id))
+
+        queries = [
+            ("student history + counts", rows_history, lambda: bitsets.student_history(conn, student_id)),
+            ("by-date", rows_by_date, lambda: bitsets.by_date(conn, department, day)),
+            ("summary, current term",
+             lambda: analytics.build_summary(conn, department, term.date_from, day),
+             lambda: analytics.build_summary(conn, department, term.date_from, day, bits=True)),
+            ("summary, full history",
+             lambda: analytics.build_summary(conn, department, dates[0], day),
+             lambda: analytics.build_summary(conn, department, dates[0], day, bits=True)),
+        ]
+
+        rows = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        bit_rows = conn.execute("SELECT COUNT(*) FROM attendance_bits").fetchone()[0]
+        row_size = table_bytes(conn, "attendance")
+        bit_size = table_bytes(conn, "attendance_bits")
+
+        print(f"\n=== {years:g} years, {args.students} students, {len(dates)} days ===")
+        print(f"attendance      {rows:10d} rows {row_size / 1e6:8.1f} MB  ({row_size / max(rows, 1):5.1f} B/mark)")
+        print(f"attendance_bits {bit_rows:10d} rows {bit_size / 1e6:8.1f} MB  ({bit_size / max(rows, 1):5.1f} B/mark)")
+        print(f"{'':28s} {'rows':>10s} {'bitmaps':>10s}")
+        for label, by_rows, by_bits in queries:
+            print(f"{label:28s} {median_ms(by_rows, args.repeat):7.2f} ms {median_ms(by_bits, args.repeat):7.2f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
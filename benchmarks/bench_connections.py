@@ -0,0 +1,145 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+import db
+from benchmarks.synthetic import build_db
+
+READ_SQL = """
+SELECT COUNT(*) FROM attendance a
+JOIN students s ON a.student_id = s.id
+WHERE a.date = ? AND s.department = ?
+"""
+
+
+# ---------- CONNECTION STRATEGIES ----------
+
+class ConnectPerCall:
+    # what app.py used to do: a fresh connection, default rollback journal
+    def __init__(self, path):
+        self.path = path
+
+    def acquire(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn):
+        conn.close()
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_load(strategy, day, course_ids, readers, writers, duration):
+    read_times = []
+    write_times = []
+    errors = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def reader():
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                conn = strategy.acquire()
+                try:
+                    conn.execute(READ_SQL, (day, "BCA")).fetchone()
+                finally:
+                    strategy.release(conn)
+            except sqlite3.OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            read_times.extend(local)
+
+    def writer():
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                conn = strategy.acquire()
+                try:
+                    # same shape as the attendance() save: delete + reinsert the course
+                    conn.executemany(
+                        "DELETE FROM attendance WHERE student_id = ? AND date = ?",
+                        [(sid, day) for sid in course_ids],
+                    )
+                    conn.executemany(
+                        "INSERT INTO attendance (student_id, date, status) VALUES (?, ?, 'Present')",
+                        [(sid, day) for sid in course_ids],
+                    )
+                    conn.commit()
+                finally:
+                    strategy.release(conn)
+            except sqlite3.OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            write_times.extend(local)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return read_times, write_times, errors
+
+
+def describe(label, read_times, write_times, errors, duration):
+    print(f"\n=== {label} ===")
+    for kind, samples in (("read", read_times), ("write", write_times)):
+        if samples:
+            print(f"{kind:5s}  ops/s {len(samples) / duration:8.1f}"
+                  f"  p50 {statistics.median(samples) * 1000:7.2f} ms"
+                  f"  p99 {percentile(samples, 99) * 1000:7.2f} ms")
+        else:
+            print(f"{kind:5s}  no successful operations")
+    print(f"errors {len(errors)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connect-per-call vs pooled WAL connections.")
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    old_path = os.path.join(workdir, "connect_per_call.db")
+    new_path = os.path.join(workdir, "pooled.db")
+    dates = build_db(old_path, students=args.students, days=args.days)
+    build_db(new_path, students=args.students, days=args.days)
+
+    conn = sqlite3.connect(old_path)
+    course_ids = [r[0] for r in conn.execute("SELECT id FROM students WHERE course = 'BCA-1'")]
+    conn.close()
+    day = dates[-1]
+
+    results = run_load(ConnectPerCall(old_path), day, course_ids,
+                       args.readers, args.writers, args.duration)
+    describe("connect per call, rollback journal", *results, args.duration)
+
+    pool = db.ConnectionPool(new_path, max_size=args.readers + args.writers)
+    results = run_load(pool, day, course_ids, args.readers, args.writers, args.duration)
+    pool.close_all()
+    describe("pooled connections, WAL + tuned PRAGMAs", *results, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import build_db
+
+
+def login(client):
+    client.post("/register", data={
+        "username": "bench", "password": "bench", "name": "Bench",
+        "department": "BCA", "code": "admin123",
+    })
+    client.post("/login", data={"username": "bench", "password": "bench"})
+
+
+def hammer(client, requests, write_every, course, course_ids):
+    samples = []
+    for n in range(requests):
+        if write_every and n and n % write_every == 0:
+            # a teacher saving attendance invalidates the department's entry;
+            # a different student is present each time so something changes
+            present = str(course_ids[n % len(course_ids)])
+            client.post("/attendance", data={"course": course, "date": "2031-01-01",
+                                             "present_ids": [present]})
+        start = time.perf_counter()
+        client.get("/home")
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/home latency with and without the stats cache.")
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--write-every", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "dashboard.db")
+    build_db(path, students=args.students, days=args.days)
+    os.environ["STUDENTS_DB"] = path
+
+    conn = sqlite3.connect(path)
+    course_ids = [r[0] for r in conn.execute("SELECT id FROM students WHERE course = 'BCA-1'")]
+    conn.close()
+
+    import app as app_module
+
+    app_module.create_app()
+
+    client = app_module.app.test_client()
+    login(client)
+    cache = app_module.dashboard_cache
+
+    for label, maxsize in (("no cache", 0), ("cached", 256)):
+        cache.maxsize = maxsize
+        cache.clear()
+        cache.hits = cache.misses = cache.evictions = 0
+        samples = hammer(client, args.requests, args.write_every, "BCA-1", course_ids)
+        print(f"{label:9s} mean {statistics.mean(samples) * 1000:7.2f} ms"
+              f"  p50 {statistics.median(samples) * 1000:7.2f} ms"
+              f"  max {max(samples) * 1000:7.2f} ms  cache {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
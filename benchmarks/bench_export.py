@@ -0,0 +1,84 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import build_db
+
+
+def rss_mb(field="VmRSS"):
+    # resident memory from /proc (Linux). RssAnon leaves out file-backed
+    # pages, i.e. the database pages SQLite maps in through mmap_size, which
+    # the kernel can drop at any time. Elsewhere fall back to the peak RSS.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream /attendance/export and watch memory.")
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=200, help="50k x 200 = 10M rows")
+    parser.add_argument("--format", default="csv", choices=["csv", "jsonl", "parquet"])
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--max-growth-mb", type=float, default=64.0,
+                        help="fail if anonymous RSS grows more than this while streaming")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "export.db")
+    print(f"Building {args.students} students x {args.days} days ...")
+    build_db(path, students=args.students, days=args.days)
+    os.environ["STUDENTS_DB"] = path
+
+    import app as app_module
+
+    app_module.create_app()
+
+    client = app_module.app.test_client()
+    client.post("/register", data={
+        "username": "bench", "password": "bench", "name": "Bench",
+        "department": "BCA", "code": "admin123",
+    })
+    client.post("/login", data={"username": "bench", "password": "bench"})
+
+    headers = {"Accept-Encoding": "gzip"} if args.gzip else {}
+    baseline = rss_mb()
+    peak = baseline
+    anon_baseline = rss_mb("RssAnon")
+    anon_peak = anon_baseline
+    total_bytes = 0
+    chunks = 0
+
+    start = time.perf_counter()
+    response = client.get(f"/attendance/export?format={args.format}", headers=headers, buffered=False)
+    for chunk in response.response:
+        total_bytes += len(chunk)
+        chunks += 1
+        if chunks % 50 == 0:
+            peak = max(peak, rss_mb())
+            anon_peak = max(anon_peak, rss_mb("RssAnon"))
+    response.close()
+    elapsed = time.perf_counter() - start
+    peak = max(peak, rss_mb())
+    anon_peak = max(anon_peak, rss_mb("RssAnon"))
+
+    # the BCA teacher only sees one department out of five
+    rows = args.students // 5 * args.days
+    print(f"format {args.format}{' + gzip' if args.gzip else ''}: {rows} rows, "
+          f"{total_bytes / 1e6:.1f} MB in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s)")
+    print(f"RSS before {baseline:.1f} MB, peak {peak:.1f} MB (includes mmapped database pages)")
+    print(f"anonymous RSS before {anon_baseline:.1f} MB, peak {anon_peak:.1f} MB, "
+          f"growth {anon_peak - anon_baseline:.1f} MB")
+
+    if anon_peak - anon_baseline > args.max_growth_mb:
+        raise SystemExit(f"Anonymous RSS grew by more than {args.max_growth_mb} MB while streaming")
+
+
+if __name__ == "__main__":
+    main()
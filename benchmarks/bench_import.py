@@ -0,0 +1,70 @@
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+import time
+
+import import_students
+import migrate
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(import_students.COLUMNS)
+        for n in range(rows):
+            writer.writerow([f"R{n:07d}", f"Student {n}", f"s{n}@example.edu",
+                             f"BCA-{n % 4 + 1}", n % 6 + 1, ""])
+
+
+def per_row_import(db_path, csv_path, limit):
+    # what onboarding costs today: one INSERT + commit per student (add_student)
+    conn = sqlite3.connect(db_path)
+    with open(csv_path, "rb") as f:
+        for n, (_, raw) in enumerate(import_students.read_csv(f)):
+            if n >= limit:
+                break
+            row, _ = import_students.clean_row(raw)
+            conn.execute(import_students.INSERT_SQL,
+                         tuple(row[c] for c in import_students.COLUMNS) + ("BCA",))
+            conn.commit()
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk student import throughput.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=import_students.CHUNK_SIZE)
+    parser.add_argument("--per-row-sample", type=int, default=2_000,
+                        help="rows to time through the one-commit-per-student path")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    csv_path = os.path.join(workdir, "students.csv")
+    write_csv(csv_path, args.rows)
+
+    bulk_db = os.path.join(workdir, "bulk.db")
+    migrate.upgrade(bulk_db)
+    conn = sqlite3.connect(bulk_db)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    start = time.perf_counter()
+    with open(csv_path, "rb") as f:
+        result = import_students.import_rows(conn, import_students.read_csv(f), "BCA", args.chunk_size)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    print(f"bulk import : {result['inserted']} rows in {elapsed:.2f} s "
+          f"({result['inserted'] / elapsed:,.0f} rows/s, chunk {args.chunk_size})")
+
+    single_db = os.path.join(workdir, "single.db")
+    migrate.upgrade(single_db)
+    start = time.perf_counter()
+    per_row_import(single_db, csv_path, args.per_row_sample)
+    elapsed = time.perf_counter() - start
+    print(f"per-row     : {args.per_row_sample} rows in {elapsed:.2f} s "
+          f"({args.per_row_sample / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import migrate
+from benchmarks.synthetic import build_db
+
+# The hot queries from app.py, with example parameters filled in below.
+QUERIES = {
+    "home: today marked": (
+        """
+        SELECT COUNT(*) FROM attendance a
+        JOIN students s ON a.student_id = s.id
+        WHERE a.date = :day AND s.department = :dept
+        """
+    ),
+    "home: total records": (
+        """
+        SELECT COUNT(*) FROM attendance a
+        JOIN students s ON a.student_id = s.id
+        WHERE s.department = :dept
+        """
+    ),
+    "home: present today": (
+        """
+        SELECT COUNT(*) FROM attendance a
+        JOIN students s ON a.student_id = s.id
+        WHERE a.date = :day AND s.department = :dept AND a.status = 'Present'
+        """
+    ),
+    "home: department students": (
+        "SELECT * FROM students WHERE department = :dept ORDER BY roll_no"
+    ),
+    "attendance: course students": (
+        "SELECT * FROM students WHERE course = :course ORDER BY roll_no"
+    ),
+    "attendance_by_date": (
+        """
+        SELECT s.roll_no, s.name, a.status
+        FROM students s
+        LEFT JOIN attendance a ON a.student_id = s.id AND a.date = :day
+        WHERE s.department = :dept
+        ORDER BY s.roll_no
+        """
+    ),
+    "student_attendance": (
+        "SELECT date, status FROM attendance WHERE student_id = :sid ORDER BY date DESC"
+    ),
+    "student_login": (
+        "SELECT * FROM students WHERE student_username = :username"
+    ),
+}
+
+
+def explain(conn, sql, params):
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [r[3] for r in rows]
+
+
+def timed(conn, sql, params, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(conn, params, repeat, label):
+    print(f"\n=== {label} ===")
+    results = {}
+    for name, sql in QUERIES.items():
+        plan = explain(conn, sql, params)
+        seconds = timed(conn, sql, params, repeat)
+        results[name] = seconds
+        print(f"{name:30s} {seconds * 1000:10.2f} ms")
+        for step in plan:
+            print(f"    {step}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query plans before/after the index migration.")
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=200, help="50k x 200 = 10M attendance rows")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", help="keep the generated database at this path")
+    args = parser.parse_args(argv)
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+    print(f"Building {args.students} students x {args.days} days in {path} ...")
+    dates = build_db(path, students=args.students, days=args.days, schema_version=2)
+
+    conn = sqlite3.connect(path)
+    sid = conn.execute("SELECT id FROM students WHERE department = 'BCA' LIMIT 1").fetchone()[0]
+    conn.execute("UPDATE students SET student_username = 'bench_user' WHERE id = ?", (sid,))
+    conn.commit()
+    params = {"day": dates[-1], "dept": "BCA", "course": "BCA-1", "sid": sid,
+              "username": "bench_user"}
+
+    before = report(conn, params, args.repeat, "schema v2 (no indexes)")
+    conn.close()
+
+    start = time.perf_counter()
+    migrate.upgrade(path)
+    print(f"\nIndex migration took {time.perf_counter() - start:.1f} s")
+
+    conn = sqlite3.connect(path)
+    after = report(conn, params, args.repeat, f"schema v{migrate.LATEST_VERSION} (indexed)")
+    conn.close()
+
+    print("\n=== speedup ===")
+    for name in QUERIES:
+        print(f"{name:30s} {before[name] / max(after[name], 1e-9):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
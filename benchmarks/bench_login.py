@@ -0,0 +1,135 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_connections import percentile
+from benchmarks.synthetic import build_db
+
+PASSWORD = "morning-rush"
+
+
+def seed_logins(path, method, teachers, students):
+    # every account shares one hash so setup does not pay the hash cost
+    # thousands of times; verification cost is the same either way
+    from werkzeug.security import generate_password_hash
+
+    password_hash = generate_password_hash(PASSWORD, method)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO teachers (username, password_hash, name, department) VALUES (?, ?, ?, 'BCA')",
+            [(f"teacher{i}", password_hash, f"Teacher {i}") for i in range(teachers)],
+        )
+        ids = [r[0] for r in conn.execute("SELECT id FROM students ORDER BY id LIMIT ?", (students,))]
+        conn.executemany(
+            "UPDATE students SET student_username = ?, student_password_hash = ? WHERE id = ?",
+            [(f"student{sid}", password_hash, sid) for sid in ids],
+        )
+    conn.close()
+    return [f"teacher{i}" for i in range(teachers)], [f"student{sid}" for sid in ids]
+
+
+def run_storm(flask_app, teachers, students, threads, duration, wrong_rate):
+    # `threads` clients log in as random teachers/students; one bystander
+    # keeps loading a cheap page to show whether logins starve other requests
+    login_times = []
+    page_times = []
+    statuses = {}
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def login_client(seed):
+        rng = random.Random(seed)
+        client = flask_app.test_client()
+        local = []
+        local_status = {}
+        while time.perf_counter() < stop:
+            if rng.random() < 0.2:
+                url, username = "/login", rng.choice(teachers)
+            else:
+                url, username = "/student/login", rng.choice(students)
+            password = "wrong" if rng.random() < wrong_rate else PASSWORD
+            start = time.perf_counter()
+            response = client.post(url, data={"username": username, "password": password})
+            local.append(time.perf_counter() - start)
+            local_status[response.status_code] = local_status.get(response.status_code, 0) + 1
+        with lock:
+            login_times.extend(local)
+            for code, n in local_status.items():
+                statuses[code] = statuses.get(code, 0) + n
+
+    def bystander():
+        client = flask_app.test_client()
+        local = []
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            client.get("/login")
+            local.append(time.perf_counter() - start)
+            time.sleep(0.01)
+        with lock:
+            page_times.extend(local)
+
+    workers = [threading.Thread(target=login_client, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=bystander))
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return login_times, page_times, statuses
+
+
+def describe(label, login_times, page_times, statuses, duration):
+    print(f"\n=== {label} ===")
+    for kind, samples in (("login", login_times), ("page", page_times)):
+        if samples:
+            print(f"{kind:5s}  req/s {len(samples) / duration:8.1f}"
+                  f"  p50 {statistics.median(samples) * 1000:7.2f} ms"
+                  f"  p99 {percentile(samples, 99) * 1000:7.2f} ms")
+    print("status " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Login storm: inline hashing vs the worker pool.")
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--method", default="scrypt:32768:8:1")
+    parser.add_argument("--workers", default=f"0,{os.cpu_count() or 1}",
+                        help="comma separated pool sizes to compare; 0 hashes inline")
+    parser.add_argument("--wrong-rate", type=float, default=0.05,
+                        help="share of attempts with a wrong password")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "login.db")
+    print(f"Building {args.students} students ...")
+    build_db(path, students=args.students, days=5)
+    teachers, students = seed_logins(path, args.method, args.teachers, args.students)
+
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_METHOD"] = args.method
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+    import app as app_module
+    import passwords
+
+    app_module.create_app()
+
+    for workers in (int(w) for w in args.workers.split(",")):
+        passwords.configure(workers=workers)
+        passwords.start()
+        app_module.login_throttle.clear()
+        results = run_storm(app_module.app, teachers, students,
+                            args.threads, args.duration, args.wrong_rate)
+        label = f"{workers} hashing workers" if workers else "inline hashing"
+        describe(f"{label}, {args.threads} clients, {args.method}", *results, args.duration)
+    passwords.shutdown()
+
+
+if __name__ == "__main__":
+    main()
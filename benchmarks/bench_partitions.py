@@ -0,0 +1,97 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+import analytics
+import attendance_store
+import db
+import partitions
+from benchmarks.synthetic import build_db
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def measure(app_module, conn, department, student_id, last_day, repeat):
+    def by_date():
+        with partitions.table_for(conn, last_day) as table:
+            sql = app_module.BY_DATE_SQL.format(attendance=table)
+            return conn.execute(sql, (last_day, department)).fetchall()
+
+    term = partitions.term_for(last_day)
+    month_ago = (date.fromisoformat(last_day) - timedelta(days=30)).isoformat()
+    return {
+        "summary, all time": median_ms(lambda: analytics.build_summary(conn, department), repeat),
+        "summary, current term": median_ms(
+            lambda: analytics.build_summary(conn, department, term.date_from, last_day), repeat),
+        "summary, last 30 days": median_ms(
+            lambda: analytics.build_summary(conn, department, month_ago, last_day), repeat),
+        "by-date, today": median_ms(by_date, repeat),
+        "student records (all terms)": median_ms(lambda: app_module.student_records(conn, student_id), repeat),
+    }
+
+
+def file_mb(path):
+    return os.path.getsize(path) / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Attendance reads before and after archiving closed terms.")
+    parser.add_argument("--students", type=int, default=1_000, help="spread over 5 departments")
+    parser.add_argument("--years", default="1,2,4", help="comma-separated history lengths")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    app_module = None
+    for years in (float(y) for y in args.years.split(",")):
+        workdir = tempfile.mkdtemp()
+        path = os.path.join(workdir, "partitions.db")
+        # history ends today, so the current term stays hot
+        start = date.today() - timedelta(days=round(years * 365))
+        dates = build_db(path, students=args.students, start=start, years=years)
+        last_day = dates[-1]
+        if app_module is None:
+            os.environ["STUDENTS_DB"] = path
+            os.environ["PASSWORD_HASH_WORKERS"] = "0"
+            import app as app_module
+
+            app_module.create_app()
+
+        conn = db.connect(path)
+        student = conn.execute("SELECT id, department FROM students ORDER BY id LIMIT 1").fetchone()
+        department, student_id = student["department"], student["id"]
+
+        before = measure(app_module, conn, department, student_id, last_day, args.repeat)
+        hot_before = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        size_before = file_mb(path)
+
+        start_time = time.perf_counter()
+        done = partitions.archive_closed_terms(conn, workdir, before=last_day)
+        conn.execute("VACUUM")
+        archive_seconds = time.perf_counter() - start_time
+
+        after = measure(app_module, conn, department, student_id, last_day, args.repeat)
+        hot_after = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        drift = attendance_store.find_drift(conn)
+        conn.close()
+
+        print(f"\n=== {years:g} years, {args.students} students, {len(dates)} days ===")
+        print(f"archived {len(done)} term(s) in {archive_seconds:.1f} s; "
+              f"hot rows {hot_before} -> {hot_after}; main file {size_before:.1f} -> {file_mb(path):.1f} MB; "
+              f"counter drift {len(drift)}")
+        print(f"{'':30s} {'before':>10s} {'after':>10s}")
+        for label in before:
+            print(f"{label:30s} {before[label]:8.1f} ms {after[label]:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import build_db
+
+
+def measure(client, url, repeat):
+    # (median ms, SQL statements of the last request)
+    times = []
+    queries = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - start)
+        queries = int(response.headers.get("X-Query-Count", 0))
+    return statistics.median(times) * 1000, queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQL statements and latency per authenticated route.")
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "principals.db")
+    print(f"Building {args.students} students x {args.days} days ...")
+    build_db(path, students=args.students, days=args.days)
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+    import app as app_module
+
+    app_module.create_app()
+
+    flask_app = app_module.app
+    flask_app.config["DB_QUERY_COUNT_HEADER"] = True
+
+    teacher = flask_app.test_client()
+    teacher.post("/register", data={
+        "username": "bench", "password": "bench", "name": "Bench",
+        "department": "BCA", "code": "admin123",
+    })
+    teacher.post("/login", data={"username": "bench", "password": "bench"})
+
+    conn = app_module.db.connect(path)
+    sid = conn.execute("SELECT id FROM students WHERE department = 'BCA' ORDER BY id LIMIT 1").fetchone()[0]
+    conn.close()
+    teacher.post(f"/students/{sid}/set_login", data={"student_username": "s1", "student_password": "pw"})
+
+    student = flask_app.test_client()
+    student.post("/student/login", data={"username": "s1", "password": "pw"})
+
+    routes = [
+        (teacher, "/home"),
+        (teacher, f"/edit/{sid}"),
+        (teacher, f"/students/{sid}/set_login"),
+        (teacher, f"/students/{sid}/attendance"),
+        (student, "/student/dashboard"),
+    ]
+
+    print(f"\n{'route':36s} {'cold ms':>8s} {'cold SQL':>9s} {'warm ms':>8s} {'warm SQL':>9s}")
+    for client, url in routes:
+        app_module.principal_cache.clear()
+        app_module.dashboard_cache.clear()
+        cold_ms, cold_sql = measure(client, url, 1)
+        warm_ms, warm_sql = measure(client, url, args.repeat)
+        print(f"{url:36s} {cold_ms:8.2f} {cold_sql:9d} {warm_ms:8.2f} {warm_sql:9d}")
+
+    print("\nprincipal cache", app_module.principal_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.bench_templates import median_ms
+from benchmarks.synthetic import TEACHER_PASSWORD, build_db, teacher_username
+
+
+def total_ms(client, urls):
+    start = time.perf_counter()
+    for url in urls:
+        response = client.get(url)
+        response.get_data()
+        assert response.status_code == 200, (url, response.status_code)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A month of attendance: 30 by-date pages vs one rollup read.")
+    parser.add_argument("--students", type=int, default=10_000, help="spread over 5 departments")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "rollup.db")
+    start = date.today() - timedelta(days=round(args.years * 365))
+    dates = build_db(path, students=args.students, start=start, years=args.years, teachers_per_department=1)
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    import app as app_module
+    import partitions
+
+    app_module.create_app()
+    client = app_module.app.test_client()
+    client.post("/login", data={"username": teacher_username("BCA"), "password": TEACHER_PASSWORD})
+    client.get("/home")   # shows (and drops) the login flash message
+
+    last = date.fromisoformat(dates[-1])
+    month_days = [(last - timedelta(days=n)).isoformat() for n in range(29, -1, -1)]
+    term = partitions.term_for(last)
+    term_days = [d for d in dates if term.date_from <= d <= term.date_to]
+    month = month_days[0][:7]
+
+    print(f"{args.students // 5} students in the department, {len(dates)} school days")
+    for bits in (True, False):
+        app_module.app.config["ATTENDANCE_BITSETS"] = bits
+        label = "bitmaps" if bits else "rows (LEFT JOIN)"
+        month_ms = total_ms(client, [f"/attendance/by-date?date={d}" for d in month_days])
+        term_ms = total_ms(client, [f"/attendance/by-date?date={d}" for d in term_days])
+        print(f"by-date pages, {label:17s} 30 days {month_ms:8.1f} ms   term ({len(term_days)} days) {term_ms:8.1f} ms")
+
+    calendar_ms, _ = median_ms(client, f"/attendance/calendar?month={month}", args.requests)
+    term_calendar_ms, _ = median_ms(client, f"/attendance/calendar?term={term.name}", args.requests)
+    api_ms, _ = median_ms(client, f"/api/v1/attendance/daily?from={month_days[0]}&to={month_days[-1]}", args.requests)
+    year_ms, _ = median_ms(client, f"/api/v1/attendance/daily?from={dates[0]}&to={dates[-1]}", args.requests)
+    print(f"calendar page, month {calendar_ms:8.2f} ms   term {term_calendar_ms:8.2f} ms")
+    print(f"daily JSON, 30 days  {api_ms:8.2f} ms   all {len(dates)} days {year_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
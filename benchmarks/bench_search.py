@@ -0,0 +1,63 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import search
+from benchmarks.synthetic import build_db
+
+LIKE_SQL = """
+SELECT * FROM students
+WHERE department = ? AND (roll_no LIKE ? OR name LIKE ? OR course LIKE ?)
+ORDER BY course, roll_no, id
+LIMIT 50
+"""
+
+FTS_SQL = f"""
+SELECT * FROM students
+WHERE department = ? AND {search.matching_ids_sql()}
+ORDER BY course, roll_no, id
+LIMIT 50
+"""
+
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Student search: LIKE '%q%' vs FTS5.")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--terms", default="Student 12345,R00042,BCA-3")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    terms = args.terms.split(",")
+    print(f"{'students':>9s} {'term':>15s} {'LIKE':>10s} {'FTS list':>10s} {'typeahead':>10s}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        path = os.path.join(tempfile.mkdtemp(), f"search_{size}.db")
+        build_db(path, students=size, days=0)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+
+        for term in terms:
+            like = f"%{term}%"
+            like_time = best_of(args.repeat, lambda: conn.execute(
+                LIKE_SQL, ("BCA", like, like, like)).fetchall())
+            fts_time = best_of(args.repeat, lambda: conn.execute(
+                FTS_SQL, ("BCA", search.fts_query(term))).fetchall())
+            top_time = best_of(args.repeat, lambda: search.top_matches(conn, "BCA", term))
+            print(f"{size:9d} {term:>15s} {like_time * 1000:7.2f} ms {fts_time * 1000:7.2f} ms"
+                  f" {top_time * 1000:7.2f} ms")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
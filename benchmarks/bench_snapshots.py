@@ -0,0 +1,52 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.bench_templates import median_ms
+from benchmarks.synthetic import TEACHER_PASSWORD, build_db, teacher_username
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summary page: nightly snapshot vs computed live.")
+    parser.add_argument("--students", type=int, default=10_000, help="spread over 5 departments")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "snapshots.db")
+    start = date.today() - timedelta(days=round(args.years * 365))
+    build_db(path, students=args.students, start=start, years=args.years, teachers_per_department=1)
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    os.environ["SCHEDULER_ENABLED"] = "0"
+    import app as app_module
+    import db
+
+    app_module.create_app()
+    client = app_module.app.test_client()
+    client.post("/login", data={"username": teacher_username("BCA"), "password": TEACHER_PASSWORD})
+    client.get("/home")   # shows (and drops) the login flash message
+
+    # a snapshot only serves while it is newer than the department's last
+    # change, which is kept in whole seconds
+    time.sleep(1)
+    conn = db.connect(path)
+    started = time.perf_counter()
+    app_module.job_scheduler.register(conn)
+    app_module.job_scheduler.run_now(conn, "summary_snapshots")
+    job_s = time.perf_counter() - started
+    alerts = conn.execute("SELECT COUNT(*) FROM attendance_alerts WHERE resolved_at IS NULL").fetchone()[0]
+    conn.close()
+
+    live_ms, _ = median_ms(client, "/attendance/summary?live=1", args.requests)
+    snapshot_ms, _ = median_ms(client, "/attendance/summary", args.requests)
+    print(f"{args.students // 5} students in the department")
+    print(f"nightly job, 5 departments {job_s * 1000:9.1f} ms   {alerts} open alert(s)")
+    print(f"summary page, live         {live_ms:9.2f} ms")
+    print(f"summary page, snapshot     {snapshot_ms:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import build_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter: import, create_app() and the first requests,
+# the way a newly started worker sees them.
+WORKER = """
+import json, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+flask_app = app_module.create_app()
+created = time.perf_counter()
+client = flask_app.test_client()
+first = client.get("/login")
+assert first.status_code == 200, first.status_code
+responded = time.perf_counter()
+client.get("/login")
+second = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "create_app": created - imported,
+    "first response": responded - created,
+    "second response": second - responded,
+}))
+"""
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run_worker(env):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", WORKER], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    timings = json.loads(out.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def import_profile(env):
+    # -X importtime: (cumulative us, self us, module) for top-level imports
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in err.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match and len(match.group(3)) <= 3:
+            modules.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+    return sorted(modules, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker cold start: import time and time to first response.")
+    parser.add_argument("--students", type=int, default=2_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--output", help="write the medians to this JSON file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "startup.db")
+    build_db(path, students=args.students, days=5)
+    template_dir = os.path.join(workdir, "template_cache")
+    env = dict(os.environ, STUDENTS_DB=path, PASSWORD_HASH_WORKERS="0", SECRET_KEY="bench",
+               TEMPLATE_CACHE_DIR=template_dir)
+
+    print(f"slowest imports under `import app` (python -X importtime), top {args.top}")
+    print(f"{'cumulative':>12s} {'self':>10s}  module")
+    for cumulative, own, module in import_profile(env)[:args.top]:
+        print(f"{cumulative / 1000:9.1f} ms {own / 1000:7.1f} ms  {module}")
+
+    modes = [
+        ("lazy, no bytecode cache", {}, True),
+        ("lazy, bytecode cache", {}, False),
+        ("precompile, bytecode cache", {"TEMPLATE_PRECOMPILE": "1"}, False),
+    ]
+    columns = ("import", "create_app", "first response", "second response", "process")
+    results = {}
+    print(f"\nmedian of {args.runs} fresh processes, ms")
+    print(f"{'':28s}" + "".join(f"{c:>17s}" for c in columns))
+    for label, extra, cold in modes:
+        runs = []
+        for _ in range(args.runs):
+            if cold:
+                shutil.rmtree(template_dir, ignore_errors=True)
+            runs.append(run_worker(dict(env, **extra)))
+        medians = {c: statistics.median(r[c] for r in runs) * 1000 for c in columns}
+        results[label] = medians
+        print(f"{label:28s}" + "".join(f"{medians[c]:14.1f} ms" for c in columns))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import pagination
+from benchmarks.synthetic import build_db
+
+
+def login(client):
+    client.post("/register", data={
+        "username": "bench", "password": "bench", "name": "Bench",
+        "department": "BCA", "code": "admin123",
+    })
+    client.post("/login", data={"username": "bench", "password": "bench"})
+
+
+def first_byte_and_total(client, url):
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b"")
+    ttfb = time.perf_counter() - start
+    size = len(first)
+    for chunk in chunks:
+        size += len(chunk)
+    total = time.perf_counter() - start
+    response.close()
+    return ttfb, total, size
+
+
+def deep_page_cursor(path):
+    # cursor for the page 50 rows from the end of the department
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(
+        "SELECT * FROM students WHERE department = 'BCA' "
+        "ORDER BY course DESC, roll_no DESC, id DESC LIMIT 1 OFFSET 50"
+    ).fetchone()
+    conn.close()
+    return pagination.encode_cursor(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="/students: keyset pages vs streamed full list.")
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    paths = {}
+    for size in sizes:
+        paths[size] = os.path.join(workdir, f"listing_{size}.db")
+        # x5 so the BCA department alone holds `size` students
+        build_db(paths[size], students=size * 5, days=0)
+
+    os.environ["STUDENTS_DB"] = paths[sizes[0]]
+    import app as app_module
+
+    app_module.create_app()
+
+    pool = app_module.app.extensions["db_pool"]
+    print(f"{'students':>9s} {'mode':>12s} {'ttfb':>10s} {'total':>10s} {'bytes':>11s}")
+    for size in sizes:
+        # point the app's pool at this size's database
+        pool.close_all()
+        pool.db_name = paths[size]
+        client = app_module.app.test_client()
+        login(client)
+
+        for mode, url in (
+            ("first page", "/students"),
+            ("deep page", "/students?after=" + deep_page_cursor(paths[size])),
+            ("stream all", "/students?stream=1"),
+        ):
+            ttfb, total, nbytes = first_byte_and_total(client, url)
+            print(f"{size:9d} {mode:>12s} {ttfb * 1000:7.1f} ms {total * 1000:7.1f} ms {nbytes:11d}")
+
+
+if __name__ == "__main__":
+    main()
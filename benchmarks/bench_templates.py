@@ -0,0 +1,88 @@
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from benchmarks.synthetic import TEACHER_PASSWORD, build_db, teacher_username
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def compile_all(bytecode_dir):
+    # what rendering.init_app() does with TEMPLATE_PRECOMPILE, on a fresh environment
+    env = Environment(
+        loader=FileSystemLoader(os.path.join(ROOT, "templates")),
+        bytecode_cache=FileSystemBytecodeCache(bytecode_dir),
+    )
+    start = time.perf_counter()
+    for name in env.list_templates(extensions=("html",)):
+        env.get_template(name)
+    return time.perf_counter() - start
+
+
+def median_ms(client, url, requests, headers=None):
+    samples = []
+    status = None
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        response.get_data()
+        samples.append(time.perf_counter() - start)
+        status = response.status_code
+    return statistics.median(samples) * 1000, status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Template compile/render cost, row fragments and 304s.")
+    parser.add_argument("--students", type=int, default=10_000, help="spread over 5 departments")
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    bytecode_dir = tempfile.mkdtemp()
+    print(f"compile all templates, cold bytecode cache {compile_all(bytecode_dir) * 1000:7.1f} ms")
+    print(f"compile all templates, warm bytecode cache {compile_all(bytecode_dir) * 1000:7.1f} ms")
+
+    path = os.path.join(tempfile.mkdtemp(), "templates.db")
+    build_db(path, students=args.students, days=args.days, teachers_per_department=1)
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    import app as app_module
+
+    app_module.create_app()
+
+    app_module.app.config["STUDENTS_MAX_PAGE_SIZE"] = args.students
+    client = app_module.app.test_client()
+    client.post("/login", data={"username": teacher_username("BCA"), "password": TEACHER_PASSWORD})
+    client.get("/home")   # shows (and drops) the login flash message
+
+    department_rows = args.students // 5
+    urls = [
+        ("students, one page", f"/students?per_page={department_rows}"),
+        ("students, streamed", "/students?stream=1"),
+        ("attendance summary", "/attendance/summary"),
+    ]
+    fragments = app_module.row_fragments.cache
+    print(f"\n{department_rows} rows per page")
+    print(f"{'':22s} {'no fragments':>14s} {'fragments':>12s} {'304':>10s}")
+    for label, url in urls:
+        fragments.maxsize = 0
+        fragments.clear()
+        plain, _ = median_ms(client, url, args.requests)
+
+        fragments.maxsize = 50_000
+        client.get(url)   # warm the fragments
+        cached, _ = median_ms(client, url, args.requests)
+
+        etag = client.get(url).headers["ETag"]
+        revalidated, status = median_ms(client, url, args.requests, {"If-None-Match": etag})
+        assert status == 304, status
+        print(f"{label:22s} {plain:11.1f} ms {cached:9.1f} ms {revalidated:7.2f} ms")
+    print("fragment cache", fragments.stats())
+
+
+if __name__ == "__main__":
+    main()
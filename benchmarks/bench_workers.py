@@ -0,0 +1,76 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import urllib.parse
+import urllib.request
+
+from benchmarks.bench_async import describe, free_port, run_load, wait_for
+from benchmarks.synthetic import build_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def gunicorn_command(port, workers, threads):
+    return [
+        sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+        "--workers", str(workers), "--threads", str(threads),
+        "--bind", f"127.0.0.1:{port}", "--log-level", "warning",
+        "wsgi:application",
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Requests/s of the prefork server at 1, 2, 4 and 8 workers.")
+    parser.add_argument("--students", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--threads", type=int, default=4, help="per worker")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    args = parser.parse_args(argv)
+
+    if shutil.which("gunicorn") is None:
+        raise SystemExit("pip install gunicorn first")
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "workers.db")
+    print(f"Building {args.students} students x {args.days} days ...")
+    build_db(path, students=args.students, days=args.days)
+    print(f"{os.cpu_count()} CPU core(s) available")
+
+    results = []
+    for workers in (int(w) for w in args.workers.split(",")):
+        port = free_port()
+        env = dict(
+            os.environ, STUDENTS_DB=path, SECRET_KEY="bench",
+            SHARED_CACHE_PATH=os.path.join(workdir, f"cache-{workers}.db"),
+        )
+        server = subprocess.Popen(gunicorn_command(port, workers, args.threads), cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            base = f"http://127.0.0.1:{port}"
+            data = urllib.parse.urlencode({
+                "username": "bench", "password": "bench", "name": "Bench",
+                "department": "BCA", "code": "admin123",
+            }).encode()
+            urllib.request.urlopen(base + "/register", data=data).close()
+
+            times, errors = run_load(base, args.clients, args.duration)
+            describe(f"{workers} worker(s) x {args.threads} threads, {args.clients} clients",
+                     times, errors, args.duration)
+            results.append((workers, sum(len(t) for t in times.values()) / args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print("\nworkers  req/s   vs 1 worker")
+    for workers, rate in results:
+        print(f"{workers:7d} {rate:7.1f}   x{rate / results[0][1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+import argparse
+import http.cookiejar
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from benchmarks.bench_connections import percentile
+from benchmarks.synthetic import TEACHER_PASSWORD, build_db, teacher_username
+
+DEPARTMENT = "BCA"
+COURSE = "BCA-1"
+STUDENT_PASSWORD = "bench"
+
+# endpoints the harness does not drive
+SKIPPED_ENDPOINTS = {"static"}
+
+
+# ---------- SCENARIOS ----------
+# (name, endpoint, client role, build(ctx, i) -> (method, path, form, files))
+# Every endpoint in app.url_map must appear at least once; run() refuses to
+# start otherwise, so a new route cannot silently go unmeasured.
+
+def get(path):
+    return lambda ctx, i: ("GET", path.format(ctx=ctx, i=i), None, None)
+
+
+class JsonBody(dict):
+    # a form that the drivers send as an application/json body (the API)
+    pass
+
+
+def mark_sheet(ctx, i):
+    return ("POST", "/api/v1/attendance", JsonBody(marks=[{
+        "course": COURSE, "date": ctx.days[i % len(ctx.days)],
+        "present": [int(s) for s in ctx.present_ids[i % 2]],
+    }]), None)
+
+
+def import_csv(ctx, i):
+    rows = "".join(f"H{i:05d}{n:03d},Imported {n},,{COURSE},1,\n" for n in range(20))
+    return ("POST", "/students/import", None,
+            {"file": (f"roll_no,name,email,course,semester,phone\n{rows}".encode(), "students.csv")})
+
+
+SCENARIOS = [
+    ("root", "root", "anon", get("/")),
+    ("login form", "login", "anon", get("/login")),
+    ("login submit", "login", "anon", lambda ctx, i: (
+        "POST", "/login", {"username": ctx.teacher, "password": TEACHER_PASSWORD}, None)),
+    ("register form", "register_teacher", "anon", get("/register")),
+    ("register submit", "register_teacher", "anon", lambda ctx, i: (
+        "POST", "/register", {"username": f"new{ctx.run}{i}", "password": "x", "name": "New",
+                              "department": DEPARTMENT, "code": "admin123"}, None)),
+    ("logout", "logout", "anon", get("/logout")),
+    ("home", "home", "teacher", get("/home")),
+    ("students", "students", "teacher", get("/students")),
+    ("students by course", "students", "teacher", get(f"/students?course={COURSE}")),
+    ("students search", "students", "teacher", get("/students?q=Student+1")),
+    ("students streamed", "students", "teacher", get("/students?stream=1")),
+    ("students typeahead", "students_search", "teacher", get("/students/search.json?q=stud")),
+    ("add form", "add_student", "teacher", get("/add")),
+    ("add submit", "add_student", "teacher", lambda ctx, i: (
+        "POST", "/add", {"roll_no": f"A{ctx.run}{i:05d}", "name": "Added", "email": "",
+                         "course": COURSE, "semester": "1", "phone": ""}, None)),
+    ("import form", "import_students_view", "teacher", get("/students/import")),
+    ("import 20 rows", "import_students_view", "teacher", import_csv),
+    ("edit form", "edit_student", "teacher", get("/edit/{ctx.student_id}")),
+    ("edit submit", "edit_student", "teacher", lambda ctx, i: (
+        "POST", f"/edit/{ctx.student_id}", dict(ctx.student_form), None)),
+    ("set login form", "set_student_login", "teacher", get("/students/{ctx.student_id}/set_login")),
+    ("set login submit", "set_student_login", "teacher", lambda ctx, i: (
+        "POST", f"/students/{ctx.student_id}/set_login",
+        {"student_username": ctx.student_username, "student_password": STUDENT_PASSWORD}, None)),
+    ("student login form", "student_login", "anon", get("/student/login")),
+    ("student login submit", "student_login", "anon", lambda ctx, i: (
+        "POST", "/student/login", {"username": ctx.student_username, "password": STUDENT_PASSWORD}, None)),
+    ("student logout", "student_logout", "anon", get("/student/logout")),
+    ("student dashboard", "student_dashboard", "student", get("/student/dashboard")),
+    ("delete", "delete_student", "teacher", lambda ctx, i: (
+        "POST", f"/delete/{ctx.victims.pop()}", None, None)),
+    ("attendance form", "attendance", "teacher", get(f"/attendance?course={COURSE}")),
+    ("attendance save", "attendance", "teacher", lambda ctx, i: (
+        "POST", "/attendance", {"course": COURSE, "date": ctx.days[i % len(ctx.days)],
+                                "present_ids": ctx.present_ids[i % 2]}, None)),
+    ("student attendance", "student_attendance", "teacher", get("/students/{ctx.student_id}/attendance")),
+    ("attendance by date", "attendance_by_date", "teacher", get("/attendance/by-date?date={ctx.last_day}")),
+    ("calendar month", "attendance_calendar", "teacher", get("/attendance/calendar?month={ctx.month}")),
+    ("calendar course", "attendance_calendar", "teacher",
+     get(f"/attendance/calendar?month={{ctx.month}}&course={COURSE}")),
+    ("export 30 days csv", "attendance_export", "teacher",
+     get("/attendance/export?format=csv&from={ctx.month_start}&to={ctx.last_day}")),
+    ("summary all time", "attendance_summary", "teacher", get("/attendance/summary")),
+    ("summary 30 days", "attendance_summary", "teacher",
+     get("/attendance/summary?from={ctx.month_start}&to={ctx.last_day}")),
+    ("summary live", "attendance_summary", "teacher", get("/attendance/summary?live=1")),
+    ("api login", "api_login", "anon", lambda ctx, i: (
+        "POST", "/api/v1/login", JsonBody(username=ctx.teacher, password=TEACHER_PASSWORD), None)),
+    ("api students", "api_students", "teacher", get("/api/v1/students")),
+    ("api students search", "api_students", "teacher", get("/api/v1/students?q=Student+1&fields=id,name")),
+    ("api student", "api_student", "teacher", get("/api/v1/students/{ctx.student_id}")),
+    ("api student attendance", "api_student_attendance", "teacher",
+     get("/api/v1/students/{ctx.student_id}/attendance")),
+    ("api stats 100 ids", "api_student_stats", "teacher", get("/api/v1/students/stats?ids={ctx.stats_ids}")),
+    ("api by date", "api_attendance_by_date", "teacher", get("/api/v1/attendance/by-date?date={ctx.last_day}")),
+    ("api summary", "api_attendance_summary", "teacher", get("/api/v1/attendance/summary")),
+    ("api alerts", "api_alerts", "teacher", get("/api/v1/alerts")),
+    ("api mark attendance", "api_mark_attendance", "teacher", mark_sheet),
+    ("api daily 30 days", "api_attendance_daily", "teacher",
+     get("/api/v1/attendance/daily?from={ctx.month_start}&to={ctx.last_day}")),
+    ("metrics", "metrics", "anon", get("/metrics")),
+]
+
+
+class Context:
+    # ids and values the scenarios need, looked up once after the build
+    def __init__(self, path, dates, victims_needed):
+        import db
+
+        self.run = uuid.uuid4().hex[:6]
+        self.counter = 0
+        self.teacher = teacher_username(DEPARTMENT)
+        self.days = dates[-20:] or ["2024-01-01"]
+        self.last_day = self.days[-1]
+        self.month_start = dates[-30] if len(dates) >= 30 else self.days[0]
+        self.month = self.last_day[:7]
+
+        conn = db.connect(path)
+        student = conn.execute(
+            "SELECT * FROM students WHERE department = ? AND course = ? ORDER BY roll_no LIMIT 1",
+            (DEPARTMENT, COURSE),
+        ).fetchone()
+        self.student_id = student["id"]
+        self.student_username = f"student{student['id']}"
+        self.student_form = {k: str(student[k] or "") for k in ("roll_no", "name", "email", "course", "semester", "phone")}
+
+        course_ids = [r[0] for r in conn.execute("SELECT id FROM students WHERE course = ?", (COURSE,))]
+        # two alternating submissions, so every save changes something
+        self.present_ids = [[str(s) for s in course_ids[::2]], [str(s) for s in course_ids[1::2]]]
+        self.stats_ids = ",".join(str(s) for s in course_ids[:100])
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO students (roll_no, name, course, department) VALUES (?, 'Victim', ?, ?)",
+                [(f"V{self.run}{n:05d}", COURSE, DEPARTMENT) for n in range(victims_needed)],
+            )
+        self.victims = [r[0] for r in conn.execute(
+            "SELECT id FROM students WHERE roll_no LIKE ? ORDER BY id", (f"V{self.run}%",)
+        )]
+        conn.close()
+
+    def next(self):
+        # unique across scenarios and modes (roll numbers, usernames, ...)
+        self.counter += 1
+        return self.counter
+
+
+# ---------- DRIVERS ----------
+
+class ClientDriver:
+    # Flask's test client: no sockets, measures the app alone
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+
+    def session(self):
+        client = self.flask_app.test_client()
+
+        def request(method, path, form=None, files=None):
+            if isinstance(form, JsonBody):
+                response = client.open(path, method=method, json=dict(form))
+            else:
+                data = dict(form or {})
+                for field, (content, filename) in (files or {}).items():
+                    data[field] = (io.BytesIO(content), filename)
+                response = client.open(path, method=method, data=data)
+            body = response.get_data()
+            return response.status_code, response.headers.get("X-Query-Count"), len(body)
+
+        return request
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _multipart(form, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (form or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (content, filename) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class HttpDriver:
+    # a real threaded werkzeug server on a free port, driven over urllib
+    def __init__(self, flask_app):
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self.server = make_server("127.0.0.1", 0, flask_app, threaded=True, request_handler=QuietHandler)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def session(self):
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+        def request(method, path, form=None, files=None):
+            headers = {}
+            data = None
+            if files:
+                data, headers["Content-Type"] = _multipart(form, files)
+            elif isinstance(form, JsonBody):
+                data = json.dumps(form).encode()
+                headers["Content-Type"] = "application/json"
+            elif form is not None or method == "POST":
+                data = urllib.parse.urlencode(form or {}, doseq=True).encode()
+            req = urllib.request.Request(self.base + path, data=data, headers=headers, method=method)
+            try:
+                with opener.open(req, timeout=120) as response:
+                    body = response.read()
+                    return response.status, response.headers.get("X-Query-Count"), len(body)
+            except urllib.error.HTTPError as response:
+                body = response.read()
+                return response.code, response.headers.get("X-Query-Count"), len(body)
+
+        return request
+
+    def close(self):
+        self.server.shutdown()
+
+
+# ---------- RUN ----------
+
+def check_coverage(flask_app):
+    endpoints = {rule.endpoint for rule in flask_app.url_map.iter_rules()} - SKIPPED_ENDPOINTS
+    missing = endpoints - {endpoint for _, endpoint, _, _ in SCENARIOS}
+    if missing:
+        raise SystemExit(f"no benchmark scenario for: {', '.join(sorted(missing))}")
+
+
+def summarize(times, queries, statuses):
+    total = sum(times)
+    return {
+        "requests": len(times),
+        "throughput_rps": round(len(times) / total, 1) if total else 0.0,
+        "mean_ms": round(statistics.fmean(times) * 1000, 3),
+        "p50_ms": round(percentile(times, 50) * 1000, 3),
+        "p95_ms": round(percentile(times, 95) * 1000, 3),
+        "p99_ms": round(percentile(times, 99) * 1000, 3),
+        "queries": statistics.median(queries) if queries else None,
+        "status": Counter(statuses).most_common(1)[0][0],
+        "errors": sum(s >= 500 for s in statuses),
+    }
+
+
+def run_mode(driver, ctx, iterations, warmup, selected):
+    sessions = {role: driver.session() for role in ("anon", "teacher", "student")}
+    sessions["teacher"]("POST", "/login", {"username": ctx.teacher, "password": TEACHER_PASSWORD})
+    sessions["teacher"]("POST", f"/students/{ctx.student_id}/set_login",
+                        {"student_username": ctx.student_username, "student_password": STUDENT_PASSWORD})
+    sessions["student"]("POST", "/student/login",
+                        {"username": ctx.student_username, "password": STUDENT_PASSWORD})
+
+    results = {}
+    for name, endpoint, role, build in SCENARIOS:
+        if selected and name not in selected:
+            continue
+        request = sessions[role]
+        times, queries, statuses = [], [], []
+        for i in range(warmup + iterations):
+            method, path, form, files = build(ctx, ctx.next())
+            start = time.perf_counter()
+            status, query_count, _ = request(method, path, form, files)
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                times.append(elapsed)
+                statuses.append(status)
+                if query_count is not None:
+                    queries.append(int(query_count))
+        if role == "anon":
+            # login scenarios leave the anon session logged in; start clean
+            sessions["anon"] = driver.session()
+        results[name] = dict(summarize(times, queries, statuses), endpoint=endpoint)
+        print(f"  {name:24s} p50 {results[name]['p50_ms']:9.2f} ms  p95 {results[name]['p95_ms']:9.2f} ms"
+              f"  {results[name]['throughput_rps']:8.1f} req/s  queries {results[name]['queries']}"
+              f"  [{results[name]['status']}]")
+    return results
+
+
+# ---------- BASELINE ----------
+
+def compare(current, baseline, threshold, floor_ms):
+    # a scenario regresses when p50 or p95 grew by more than `threshold`
+    # (and by more than floor_ms, to ignore noise on sub-millisecond routes),
+    # when it runs more SQL than before, or when it started failing
+    regressions = []
+    for mode, scenarios in current["results"].items():
+        for name, now in scenarios.items():
+            before = baseline.get("results", {}).get(mode, {}).get(name)
+            if before is None:
+                continue
+            for key in ("p50_ms", "p95_ms"):
+                if now[key] > before[key] * (1 + threshold) and now[key] - before[key] > floor_ms:
+                    regressions.append(f"{mode} / {name}: {key} {before[key]:.2f} -> {now[key]:.2f}")
+            if before["queries"] is not None and now["queries"] is not None and now["queries"] > before["queries"]:
+                regressions.append(f"{mode} / {name}: queries {before['queries']} -> {now['queries']}")
+            if now["errors"] > before["errors"]:
+                regressions.append(f"{mode} / {name}: {now['errors']} server errors")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive every route and record latency and SQL per request.")
+    parser.add_argument("--students", type=int, default=5_000)
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--courses", type=int, default=4, help="per department")
+    parser.add_argument("--teachers", type=int, default=2, help="per department")
+    parser.add_argument("--years", type=float, default=0.5, help="of daily attendance")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--modes", default="client,http")
+    parser.add_argument("--only", default="", help="comma separated scenario names")
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:1000",
+                        help="cheap by default so login routes measure the app, not the KDF")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50/p95 growth")
+    parser.add_argument("--floor-ms", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    modes = [m for m in args.modes.split(",") if m]
+    selected = {s.strip() for s in args.only.split(",") if s.strip()}
+    path = os.path.join(tempfile.mkdtemp(), "harness.db")
+    print(f"Building {args.students} students, {args.departments} departments, {args.years} years ...")
+    dates = build_db(
+        path, students=args.students, seed=args.seed, years=args.years,
+        departments=args.departments, courses_per_department=args.courses,
+        teachers_per_department=args.teachers,
+    )
+
+    os.environ["STUDENTS_DB"] = path
+    os.environ["PASSWORD_HASH_METHOD"] = args.hash_method
+    os.environ["PASSWORD_HASH_WORKERS"] = "0"
+    import app as app_module
+
+    app_module.create_app()
+
+    flask_app = app_module.app
+    flask_app.config["DB_QUERY_COUNT_HEADER"] = True
+    check_coverage(flask_app)
+
+    ctx = Context(path, dates, victims_needed=len(modes) * (args.iterations + args.warmup))
+
+    results = {}
+    for mode in modes:
+        print(f"\n[{mode}]")
+        driver = ClientDriver(flask_app) if mode == "client" else HttpDriver(flask_app)
+        try:
+            results[mode] = run_mode(driver, ctx, args.iterations, args.warmup, selected)
+        finally:
+            if mode != "client":
+                driver.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as out:
+        json.dump(report, out, indent=2, sort_keys=True)
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.floor_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline} "
+                  f"(commit {baseline.get('meta', {}).get('commit')}):")
+            for line in regressions:
+                print("  " + line)
+            raise SystemExit(1)
+        print(f"no regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import random
+import sqlite3
+from datetime import date, timedelta
+
+import bitsets
+import migrate
+import rollup
+
+DEPARTMENTS = ["BCA", "BBA", "BSC", "MCA", "BCOM"]
+COURSES_PER_DEPARTMENT = 4
+
+# weekdays in a year; `years=` is turned into this many days each
+SCHOOL_DAYS_PER_YEAR = 261
+
+# every generated teacher logs in as "<dept>_teacher<n>" with this password
+TEACHER_PASSWORD = "bench"
+TEACHER_HASH_METHOD = "pbkdf2:sha256:1000"
+
+
+# ---------- SYNTHETIC DATA ----------
+# Fills an empty database in bulk (executemany, journaling off) so the
+# benchmarks can work with realistic sizes in seconds instead of minutes.
+
+def school_days(start, count):
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day.isoformat())
+        day += timedelta(days=1)
+    return days
+
+
+def department_names(count):
+    # the five real ones first, then DEPT6, DEPT7, ...
+    return (DEPARTMENTS + [f"DEPT{n + 1}" for n in range(len(DEPARTMENTS), count)])[:count]
+
+
+def build_db(path, students=50_000, days=200, schema_version=None,
+             start=date(2024, 1, 1), present_rate=0.85, seed=42,
+             departments=len(DEPARTMENTS), courses_per_department=COURSES_PER_DEPARTMENT,
+             teachers_per_department=0, years=None):
+    # Students are dealt round-robin over the departments and then over
+    # each department's courses; every student gets a row for every school
+    # day. Returns the list of dates. Same arguments, same database.
+    migrate.upgrade(path, target=schema_version)
+    rng = random.Random(seed)
+    names = department_names(departments)
+    if years is not None:
+        days = round(years * SCHOOL_DAYS_PER_YEAR)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    def student_rows():
+        for n in range(students):
+            department = names[n % len(names)]
+            course = f"{department}-{n // len(names) % courses_per_department + 1}"
+            yield (f"R{n:07d}", f"Student {n}", f"s{n}@example.edu",
+                   course, n % 6 + 1, None, department)
+
+    conn.executemany(
+        """
+        INSERT INTO students (roll_no, name, email, course, semester, phone, department)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        student_rows(),
+    )
+    conn.commit()
+
+    if teachers_per_department:
+        # one hash shared by everyone; a cheap method keeps setup fast
+        from werkzeug.security import generate_password_hash
+
+        password_hash = generate_password_hash(TEACHER_PASSWORD, TEACHER_HASH_METHOD)
+        conn.executemany(
+            "INSERT INTO teachers (username, password_hash, name, department) VALUES (?, ?, ?, ?)",
+            [
+                (teacher_username(department, n), password_hash, f"{department} Teacher {n}", department)
+                for department in names
+                for n in range(1, teachers_per_department + 1)
+            ],
+        )
+        conn.commit()
+
+    ids = [r[0] for r in conn.execute("SELECT id FROM students ORDER BY id")]
+    dates = school_days(start, days)
+
+    def attendance_rows():
+        for day in dates:
+            for sid in ids:
+                status = "Present" if rng.random() < present_rate else "Absent"
+                yield (sid, day, status)
+
+    conn.executemany(
+        "INSERT INTO attendance (student_id, date, status) VALUES (?, ?, ?)",
+        attendance_rows(),
+    )
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+    if "attendance_bits" in tables:
+        bitsets.rebuild(conn)
+    if "daily_rollup" in tables:
+        rollup.rebuild(conn)
+    conn.commit()
+    conn.close()
+    return dates
+
+
+def teacher_username(department, n=1):
+    return f"{department.lower()}_teacher{n}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic students database.")
+    parser.add_argument("path")
+    parser.add_argument("--departments", type=int, default=len(DEPARTMENTS))
+    parser.add_argument("--courses", type=int, default=COURSES_PER_DEPARTMENT, help="per department")
+    parser.add_argument("--students", type=int, default=50_000)
+    parser.add_argument("--teachers", type=int, default=1, help="per department")
+    parser.add_argument("--years", type=float, default=1.0, help="of daily attendance")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    dates = build_db(
+        args.path, students=args.students, start=args.start, seed=args.seed,
+        departments=args.departments, courses_per_department=args.courses,
+        teachers_per_department=args.teachers, years=args.years,
+    )
+    print(f"{args.path}: {args.students} students in {args.departments} departments, "
+          f"{len(dates)} days ({dates[0] if dates else '-'} .. {dates[-1] if dates else '-'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import sqlite3
+from datetime import date, timedelta
+
+import db
+import partitions
+
+DB_NAME = "students.db"
+
+# ---------- LAYOUT ----------
+# attendance_bits holds one row per (student, term) with two bitmaps over
+# the calendar days of the term: bit n (least significant bit of byte 0
+# first) is term start + n days. `marked` has a bit for every day the
+# student was marked, `present` for the days they were marked present, so
+# present is always a subset of marked. A term is at most 184 days, i.e.
+# 23 bytes per bitmap. The row-per-day `attendance` table stays the
+# record of truth; save_course_attendance() keeps both in step.
+
+UPSERT_BITS_SQL = """
+INSERT INTO attendance_bits (student_id, term, present, marked)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (student_id, term) DO UPDATE SET
+    present = excluded.present,
+    marked = excluded.marked
+"""
+
+STUDENT_BITS_SQL = """
+SELECT term, present, marked
+FROM attendance_bits
+WHERE student_id = ?
+ORDER BY term DESC
+"""
+
+BY_DATE_BITS_SQL = """
+SELECT s.roll_no, s.name, b.present, b.marked
+FROM students s
+LEFT JOIN attendance_bits b
+  ON b.student_id = s.id AND b.term = ?
+WHERE s.department = ?
+ORDER BY s.roll_no
+"""
+
+DEPARTMENT_BITS_SQL = """
+SELECT s.id, b.present, b.marked
+FROM students s
+JOIN attendance_bits b ON b.student_id = s.id AND b.term = ?
+WHERE s.department = ?
+"""
+
+
+def term_days(term):
+    return (date.fromisoformat(term.date_to) - date.fromisoformat(term.date_from)).days + 1
+
+
+def mask_size(term):
+    return (term_days(term) + 7) // 8
+
+
+def offset(term, day):
+    return (date.fromisoformat(day) - date.fromisoformat(term.date_from)).days
+
+
+def day_at(term, n):
+    return (date.fromisoformat(term.date_from) + timedelta(days=n)).isoformat()
+
+
+def popcount(mask):
+    return int.from_bytes(mask, "little").bit_count()
+
+
+def is_set(mask, n):
+    return mask is not None and bool(mask[n >> 3] & (1 << (n & 7)))
+
+
+def terms_between(date_from, date_to):
+    terms = []
+    term = partitions.term_for(date_from)
+    while term.date_from <= date_to:
+        terms.append(term)
+        term = partitions.term_for(date.fromisoformat(term.date_to) + timedelta(days=1))
+    return terms
+
+
+# ---------- WRITE ----------
+
+def set_days(conn, changes):
+    # Applies (student_id, date, status) rows that were just upserted into
+    # `attendance`: one read and one upsert per student and term touched.
+    by_term = {}
+    for sid, day, status in changes:
+        by_term.setdefault(partitions.term_for(day), []).append((sid, day, status))
+
+    for term, rows in by_term.items():
+        ids = sorted({sid for sid, _, _ in rows})
+        current = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            current.update(
+                (sid, (present, marked))
+                for sid, present, marked in conn.execute(
+                    "SELECT student_id, present, marked FROM attendance_bits "
+                    f"WHERE term = ? AND student_id IN ({','.join('?' * len(chunk))})",
+                    [term.name, *chunk],
+                )
+            )
+
+        size = mask_size(term)
+        masks = {}
+        for sid, day, status in rows:
+            if sid not in masks:
+                present, marked = current.get(sid, (size, size))
+                masks[sid] = (bytearray(present), bytearray(marked))
+            present, marked = masks[sid]
+            n = offset(term, day)
+            marked[n >> 3] |= 1 << (n & 7)
+            if status == "Present":
+                present[n >> 3] |= 1 << (n & 7)
+            else:
+                present[n >> 3] &= ~(1 << (n & 7)) & 0xFF
+
+        conn.executemany(
+            UPSERT_BITS_SQL,
+            [(sid, term.name, bytes(present), bytes(marked)) for sid, (present, marked) in masks.items()],
+        )
+
+
+def encode(rows, student_ids):
+    # (student_id, date, status) rows ordered by student_id, date ->
+    # (student_id, term, present, marked) rows
+    key = None
+    present = marked = None
+    for sid, day, status in rows:
+        if sid not in student_ids:
+            continue
+        term = partitions.term_for(day)
+        if key != (sid, term):
+            if key is not None:
+                yield key[0], key[1].name, bytes(present), bytes(marked)
+            key = (sid, term)
+            present = bytearray(mask_size(term))
+            marked = bytearray(mask_size(term))
+        n = offset(term, day)
+        marked[n >> 3] |= 1 << (n & 7)
+        if status == "Present":
+            present[n >> 3] |= 1 << (n & 7)
+    if key is not None:
+        yield key[0], key[1].name, bytes(present), bytes(marked)
+
+
+ROWS_SQL = "SELECT student_id, date, status FROM attendance ORDER BY student_id, date"
+
+
+def expected_bits(conn):
+    # bitmap rows as they should be, from the hot table and every archived
+    # term. Archives are opened on their own connection rather than
+    # attached, so this also works inside a transaction (migrations).
+    student_ids = {row[0] for row in conn.execute("SELECT id FROM students")}
+    yield from encode(conn.execute(ROWS_SQL), student_ids)
+    for (path,) in conn.execute("SELECT path FROM attendance_archives ORDER BY date_from").fetchall():
+        archive = sqlite3.connect(partitions.archive_uri(conn, path), uri=True)
+        try:
+            yield from encode(archive.execute(ROWS_SQL), student_ids)
+        finally:
+            archive.close()
+
+
+def rebuild(conn):
+    # the caller commits
+    conn.execute("DELETE FROM attendance_bits")
+    conn.executemany(
+        "INSERT INTO attendance_bits (student_id, term, present, marked) VALUES (?, ?, ?, ?)",
+        expected_bits(conn),
+    )
+
+
+def find_drift(conn):
+    expected = {(r[0], r[1]): (r[2], r[3]) for r in expected_bits(conn)}
+    stored = {
+        (r[0], r[1]): (r[2], r[3])
+        for r in conn.execute("SELECT student_id, term, present, marked FROM attendance_bits")
+    }
+    return sorted(
+        key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key)
+    )
+
+
+# ---------- READ ----------
+
+def student_history(conn, student_id):
+    return history_from_rows(conn.execute(STUDENT_BITS_SQL, (student_id,)))
+
+
+def history_from_rows(rows):
+    # STUDENT_BITS_SQL rows -> (records newest first, (presents, absents,
+    # total)); the counts are popcounts of the bitmaps
+    records = []
+    presents = total = 0
+    for term_name, present, marked in rows:
+        term = partitions.term_named(term_name)
+        presents += popcount(present)
+        total += popcount(marked)
+        present_bits = int.from_bytes(present, "little")
+        marked_bits = int.from_bytes(marked, "little")
+        start = date.fromisoformat(term.date_from).toordinal()
+        while marked_bits:
+            n = marked_bits.bit_length() - 1
+            marked_bits ^= 1 << n
+            records.append({
+                "date": date.fromordinal(start + n).isoformat(),
+                "status": "Present" if present_bits >> n & 1 else "Absent",
+            })
+
+    return records, (presents, total - presents, total)
+
+
+def department_range(conn, department):
+    # (first day, last day) of the terms holding any of the department's
+    # bitmaps, or None
+    first, last = conn.execute(
+        """
+        SELECT MIN(b.term), MAX(b.term)
+        FROM students s
+        JOIN attendance_bits b ON b.student_id = s.id
+        WHERE s.department = ?
+        """,
+        (department,),
+    ).fetchone()
+    if first is None:
+        return None
+    return partitions.term_named(first).date_from, partitions.term_named(last).date_to
+
+
+def statuses_on(rows, term, day):
+    # BY_DATE_BITS_SQL rows -> roll_no/name/status rows for one day
+    n = offset(term, day)
+    records = []
+    for roll_no, name, present, marked in rows:
+        if not is_set(marked, n):
+            status = None
+        elif is_set(present, n):
+            status = "Present"
+        else:
+            status = "Absent"
+        records.append({"roll_no": roll_no, "name": name, "status": status})
+    return records
+
+
+def by_date(conn, department, day):
+    term = partitions.term_for(day)
+    return statuses_on(conn.execute(BY_DATE_BITS_SQL, (term.name, department)), term, day)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or rebuild the attendance_bits bitmaps.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--db", default=DB_NAME, help="path to the SQLite database")
+    args = parser.parse_args(argv)
+
+    conn = db.connect(args.db)
+    drift = find_drift(conn)
+    for sid, term in drift:
+        print(f"student {sid}, term {term}: bitmap out of sync")
+    print(f"{len(drift)} bitmap row(s) out of sync.")
+
+    if args.command == "rebuild":
+        rebuild(conn)
+        conn.commit()
+        print("attendance_bits rebuilt from the attendance rows.")
+    conn.close()
+
+    if args.command == "verify" and drift:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
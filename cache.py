@@ -0,0 +1,233 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# ---------- IN-PROCESS CACHE ----------
+
+class TTLCache:
+    # Small thread-safe LRU cache whose entries also expire after `ttl`
+    # seconds. maxsize=0 turns caching off (every get is a miss).
+
+    def __init__(self, maxsize=256, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, match):
+        # drop every key for which match(key) is true
+        with self._lock:
+            for key in [k for k in self._data if match(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# ---------- CROSS-PROCESS CACHE ----------
+
+class SharedCache:
+    # TTLCache's interface over a small SQLite file that every worker
+    # process opens, so a value computed by one worker serves all of them
+    # and invalidate() reaches every worker at once. Keys and values must
+    # be JSON-serialisable (tuple keys come back as tuples). Kept out of
+    # the main database so cache writes never wait on its write lock.
+
+    def __init__(self, path, namespace, maxsize=256, ttl=60.0):
+        self.path = path
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        # connections are per thread and per process: a forked worker
+        # opens its own instead of using the parent's
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._forget_connections)
+
+    def _forget_connections(self):
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # losing the newest entries on a power cut is harmless
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, expires FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, self._key(key)),
+        ).fetchone()
+        if row is not None and row[1] > time.time():
+            self.hits += 1
+            return json.loads(row[0])
+        self.misses += 1
+        return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+            (self.namespace, self._key(key), json.dumps(value), time.time() + self.ttl),
+        )
+        # expired entries first, then the soonest to expire beyond maxsize
+        removed = conn.execute(
+            """
+            DELETE FROM cache WHERE namespace = ? AND key IN (
+                SELECT key FROM cache WHERE namespace = ?
+                ORDER BY expires DESC LIMIT -1 OFFSET ?
+            ) OR (namespace = ? AND expires <= ?)
+            """,
+            (self.namespace, self.namespace, self.maxsize, self.namespace, time.time()),
+        ).rowcount
+        self.evictions += removed
+
+    def invalidate(self, match):
+        conn = self._conn()
+        keys = [
+            key for (key,) in conn.execute("SELECT key FROM cache WHERE namespace = ?", (self.namespace,))
+            if match(_as_key(json.loads(key)))
+        ]
+        conn.executemany(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?",
+            [(self.namespace, key) for key in keys],
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def stats(self):
+        size = self._conn().execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def _as_key(value):
+    # JSON turns tuples into lists; give them back as tuples
+    return tuple(_as_key(v) for v in value) if isinstance(value, list) else value
+
+
+# ---------- DB-VERSIONED VALUE ----------
+
+class VersionedValue:
+    # Keeps one computed value per process and reloads it only when the
+    # matching counter in the cache_versions table has moved. Checking the
+    # counter is a primary-key lookup, so it is safe to do on every request.
+    # With a SharedCache, a value loaded by one worker for a version is
+    # picked up from there by the others instead of being loaded again.
+
+    def __init__(self, name, load, shared=None):
+        self.name = name
+        self.load = load
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self, conn):
+        return self.get_versioned(conn)[1]
+
+    def get_versioned(self, conn):
+        # (version, value); pages put the version in their ETag
+        row = conn.execute(
+            "SELECT version FROM cache_versions WHERE name = ?", (self.name,)
+        ).fetchone()
+        version = row[0] if row else None
+
+        with self._lock:
+            if version is not None and version == self._version:
+                self.hits += 1
+                return version, self._value
+
+        value = None
+        if self.shared is not None and version is not None:
+            value = self.shared.get((self.name, version))
+        if value is None:
+            value = self.load(conn)
+            if self.shared is not None and version is not None:
+                self.shared.set((self.name, version), value)
+        with self._lock:
+            self.misses += 1
+            self._version = version
+            self._value = value
+        return version, value
+
+    def stats(self):
+        with self._lock:
+            return {"version": self._version, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,179 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g
+
+# Applied to every new connection. journal_mode=WAL lets readers keep going
+# while a teacher is saving attendance; the rest trade a little durability
+# on power loss (synchronous=NORMAL) for far fewer fsyncs.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",      # 16 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",    # 256 MB memory-mapped reads
+    "PRAGMA temp_store = MEMORY",
+)
+
+# sqlite3 keeps this many compiled statements per connection, so the
+# same route SQL is only prepared once per pooled connection.
+STATEMENT_CACHE_SIZE = 256
+
+
+class TimedConnection(sqlite3.Connection):
+    # Reports (sql, seconds) for every execute()/executemany() to
+    # `timing_callback` when one is set. For a SELECT that is the time to
+    # the first row; fetching the rest happens later, on the cursor.
+    timing_callback = None
+
+    def execute(self, sql, parameters=()):
+        callback = self.timing_callback
+        if callback is None:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            callback(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        callback = self.timing_callback
+        if callback is None:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            callback(sql, time.perf_counter() - start)
+
+
+def connect(db_name):
+    conn = sqlite3.connect(
+        db_name,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=TimedConnection,
+        # lets partitions.py ATTACH archived terms with ?mode=ro
+        uri=True,
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# ---------- POOL ----------
+
+class ConnectionPool:
+    def __init__(self, db_name, max_size=8, timeout=10.0):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._inherited = []
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._forget_connections)
+
+    def _forget_connections(self):
+        # SQLite connections must not cross a fork. A worker process starts
+        # with an empty pool; the parent's connections are kept referenced
+        # (never used or closed here) so garbage collection cannot close
+        # them underneath the parent.
+        while True:
+            try:
+                self._inherited.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return connect(self.db_name)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError("Timed out waiting for a database connection.")
+
+    def release(self, conn):
+        # never hand a half-finished transaction to the next request
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+# ---------- FLASK INTEGRATION ----------
+
+def init_app(app, db_name, max_size=8):
+    app.config.setdefault("DB_QUERY_COUNT_HEADER", False)
+    app.extensions["db_pool"] = ConnectionPool(db_name, max_size=max_size)
+    app.teardown_appcontext(release_db)
+    app.after_request(_query_count_header)
+
+
+def _count_statement(sql):
+    # statements run by triggers are reported as "-- ..." comments
+    if not sql.startswith("--"):
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def get_db():
+    # one pooled connection per app context (i.e. per request)
+    if "db" not in g:
+        g.db = current_app.extensions["db_pool"].acquire()
+        g.db.set_trace_callback(_count_statement)
+        # installed by metrics.init_app()
+        g.db.timing_callback = current_app.extensions.get("db_statement_timer")
+    return g.db
+
+
+def query_count():
+    # SQL statements run on this request's connection so far
+    return g.get("query_count", 0)
+
+
+def _query_count_header(response):
+    if current_app.config["DB_QUERY_COUNT_HEADER"]:
+        response.headers["X-Query-Count"] = str(query_count())
+    return response
+
+
+def release_db(exception=None):
+    conn = g.pop("db", None)
+    if conn is not None:
+        conn.set_trace_callback(None)
+        conn.timing_callback = None
+        current_app.extensions["db_pool"].release(conn)
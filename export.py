@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import zlib
+from contextlib import closing
+
+import partitions
+
+COLUMNS = ("date", "roll_no", "name", "course", "status")
+
+BATCH_SIZE = 5000
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+# ---------- ROW SOURCE ----------
+
+def attendance_batches(conn, department, date_from=None, date_to=None, batch_size=BATCH_SIZE):
+    # Walks the date index in order and hands rows out fetchmany() batches
+    # at a time, so memory does not depend on the range. CROSS JOIN pins
+    # attendance as the outer loop; otherwise SQLite may start from the
+    # department's students and sort every row in a temp b-tree.
+    # Archived terms are read oldest first, then the hot table, which keeps
+    # the whole stream in date order.
+    with closing(partitions.sources(conn, date_from, date_to)) as tables:
+        for table in tables:
+            cursor = conn.execute(
+                f"""
+                SELECT a.date, s.roll_no, s.name, s.course, a.status
+                FROM {table} a
+                CROSS JOIN main.students s ON s.id = a.student_id
+                WHERE a.date BETWEEN ? AND ? AND s.department = ?
+                ORDER BY a.date
+                """,
+                (date_from or "", date_to or "9999-12-31", department),
+            )
+            try:
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    yield [tuple(row) for row in batch]
+            finally:
+                cursor.close()
+
+
+# ---------- ENCODERS ----------
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def jsonl_chunks(batches):
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in batch
+        ).encode()
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def parquet_chunks(batches):
+    # one row group per batch; the writer flushes into a small buffer that is
+    # drained after every batch
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, pa.string()) for name in COLUMNS])
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    for batch in batches:
+        columns = list(zip(*batch))
+        writer.write_table(pa.table(
+            {name: pa.array(values, pa.string()) for name, values in zip(COLUMNS, columns)},
+            schema=schema,
+        ))
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    writer.close()
+    yield sink.getvalue()
+
+
+ENCODERS = {
+    "csv": csv_chunks,
+    "jsonl": jsonl_chunks,
+    "parquet": parquet_chunks,
+}
+
+
+def gzip_chunks(chunks, level=6):
+    # wbits=31 writes a gzip header/trailer around the deflate stream
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(conn, department, date_from, date_to, fmt, batch_size=BATCH_SIZE):
+    return ENCODERS[fmt](attendance_batches(conn, department, date_from, date_to, batch_size))
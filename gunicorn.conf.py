@@ -0,0 +1,42 @@
+# Production server settings, read by `gunicorn -c gunicorn.conf.py wsgi:application`.
+#
+# Prefork: one worker process per core (WEB_CONCURRENCY overrides), each
+# with a few threads for requests waiting on SQLite or the network. The app
+# is imported once in the master (preload_app) and the workers fork from it.
+import multiprocessing
+import os
+import secrets
+import sys
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", 4))
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+accesslog = os.environ.get("ACCESS_LOG")   # e.g. "-" for stdout; off by default
+
+# Settings create_app() reads when wsgi.py is preloaded, before the fork:
+# - sessions are signed with SECRET_KEY, which must be the same in every
+#   worker and should survive restarts
+# - the workers share dashboard / course caches through a SQLite file
+# - password hashes are checked inline: there already is a process per core
+if not os.environ.get("SECRET_KEY"):
+    os.environ["SECRET_KEY"] = secrets.token_hex(32)
+    print("SECRET_KEY is not set; using a random key, sessions end on restart.", file=sys.stderr)
+os.environ.setdefault(
+    "SHARED_CACHE_PATH",
+    os.path.splitext(os.environ.get("STUDENTS_DB", "students.db"))[0] + "-cache.db",
+)
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+
+def post_fork(server, worker):
+    # anything holding threads or processes is rebuilt per worker (see the
+    # register_at_fork hooks in db, cache, passwords and attendance_store);
+    # a hashing pool, if configured, is started here rather than on the
+    # first login
+    import passwords
+
+    passwords.start()
@@ -0,0 +1,165 @@
+import argparse
+import codecs
+import csv
+import sqlite3
+import zipfile
+from itertools import islice
+
+import migrate
+
+DB_NAME = "students.db"
+
+CHUNK_SIZE = 2000
+
+COLUMNS = ("roll_no", "name", "email", "course", "semester", "phone")
+
+INSERT_SQL = """
+INSERT INTO students (roll_no, name, email, course, semester, phone, department)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# ---------- READERS ----------
+# Both readers yield (line_number, {column: value}) one row at a time, so a
+# large upload is never held in memory as a whole.
+
+def _header_key(value):
+    return str(value or "").strip().lower().replace(" ", "_").replace(".", "")
+
+
+def read_csv(binary_file):
+    text = codecs.getreader("utf-8-sig")(binary_file)
+    reader = csv.reader(text)
+    header = [_header_key(h) for h in next(reader, [])]
+    for line, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield line, dict(zip(header, values))
+
+
+def read_xlsx(binary_file):
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise ValueError("Excel import needs openpyxl installed on the server.")
+
+    try:
+        workbook = load_workbook(binary_file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError):
+        # not a zip, or a zip without the workbook parts
+        raise ValueError("The file is not a readable .xlsx workbook.") from None
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_header_key(h) for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(v not in (None, "") for v in values):
+                yield line, {
+                    key: "" if value is None else str(value)
+                    for key, value in zip(header, values)
+                }
+    finally:
+        workbook.close()
+
+
+def read_rows(binary_file, filename):
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return read_csv(binary_file)
+    if name.endswith(".xlsx"):
+        return read_xlsx(binary_file)
+    raise ValueError("Upload a .csv or .xlsx file.")
+
+
+# ---------- VALIDATION ----------
+
+def clean_row(raw):
+    row = {column: str(raw.get(column) or "").strip() for column in COLUMNS}
+    if not row["roll_no"] or not row["name"]:
+        return None, "Roll No and Name are required."
+    if row["semester"]:
+        # Excel hands numbers back as "3.0"; "1e400", "nan" and "2.5" are not
+        # semesters, and SQLite integers stop at 64 bits
+        try:
+            value = float(row["semester"])
+        except ValueError:
+            value = None
+        if value is None or not value.is_integer() or abs(value) >= 2 ** 63:
+            return None, f"Semester must be a whole number, got {row['semester']!r}."
+        row["semester"] = int(value)
+    return row, None
+
+
+# ---------- IMPORT ----------
+
+def import_rows(conn, rows, department, chunk_size=CHUNK_SIZE):
+    # Validates and inserts `rows` in chunks, one transaction per chunk.
+    # Returns {"inserted": n, "errors": [{"line", "roll_no", "error"}]}.
+    taken = {
+        r[0] for r in conn.execute(
+            "SELECT roll_no FROM students WHERE department = ?", (department,)
+        )
+    }
+    inserted = 0
+    errors = []
+
+    rows = iter(rows)
+    while True:
+        try:
+            chunk = list(islice(rows, chunk_size))
+        except ValueError as exc:
+            # earlier chunks are committed; say so rather than hide them
+            if inserted:
+                raise ValueError(f"{exc} The {inserted} students before it were imported.") from exc
+            raise
+        if not chunk:
+            break
+
+        batch = []
+        for line, raw in chunk:
+            row, error = clean_row(raw)
+            if row is None:
+                errors.append({"line": line, "roll_no": raw.get("roll_no", ""), "error": error})
+                continue
+            if row["roll_no"] in taken:
+                errors.append({
+                    "line": line,
+                    "roll_no": row["roll_no"],
+                    "error": f"Roll No {row['roll_no']} already exists in {department}.",
+                })
+                continue
+            taken.add(row["roll_no"])
+            batch.append(tuple(row[c] for c in COLUMNS) + (department,))
+
+        if batch:
+            with conn:
+                conn.executemany(INSERT_SQL, batch)
+            inserted += len(batch)
+
+    return {"inserted": inserted, "errors": errors}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import students from a CSV or XLSX file.")
+    parser.add_argument("file", help="CSV/XLSX with columns roll_no, name, email, course, semester, phone")
+    parser.add_argument("--department", required=True, help="department the students belong to")
+    parser.add_argument("--db", default=DB_NAME, help="path to the SQLite database")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    migrate.upgrade(args.db)
+    conn = sqlite3.connect(args.db)
+    try:
+        with open(args.file, "rb") as upload:
+            result = import_rows(conn, read_rows(upload, args.file), args.department, args.chunk_size)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    finally:
+        conn.close()
+
+    for error in result["errors"]:
+        print(f"line {error['line']}: {error['error']}")
+    print(f"Imported {result['inserted']} students, {len(result['errors'])} rows rejected.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import json
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:   # optional: pip install orjson
+    orjson = None
+
+# ---------- SERIALIZATION ----------
+# jsonify() for the whole app: no indenting, no spaces after separators and
+# keys in the order the view built them. orjson does the encoding when it
+# is installed; the stdlib encoder gives the same bytes otherwise.
+
+class CompactJSONProvider(DefaultJSONProvider):
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=self.default).decode()
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        kwargs.setdefault("separators", (",", ":"))
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is not None:
+            body = orjson.dumps(obj, default=self.default)
+        else:
+            body = self.dumps(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+# ---------- REQUEST ARGUMENTS ----------
+
+class ApiError(Exception):
+    # turned into {"error": message} with this status by app.py
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def fields_arg(value, allowed):
+    # "?fields=roll_no,name" -> ("roll_no", "name"); all of `allowed` when
+    # missing. Unknown names are an error rather than silently dropped.
+    names = tuple(dict.fromkeys(f.strip() for f in (value or "").split(",") if f.strip()))
+    if not names:
+        return allowed
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ApiError(400, f"unknown field(s) {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return names
+
+
+def pick(rows, fields):
+    # rows are sqlite3.Row or dicts
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+def ids_arg(value, limit):
+    # "?ids=3,1,2" -> [3, 1, 2], duplicates dropped, order kept
+    try:
+        ids = list(dict.fromkeys(int(v) for v in (value or "").split(",") if v.strip()))
+    except ValueError:
+        raise ApiError(400, "ids must be a comma-separated list of integers") from None
+    if not ids:
+        raise ApiError(400, "ids is required")
+    if len(ids) > limit:
+        raise ApiError(400, f"at most {limit} ids per request")
+    return ids
+
+
+def date_value(value, name):
+    # ISO date string (or None when missing); malformed dates are an error
+    if value is None or value == "":
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be an ISO date (YYYY-MM-DD)") from None
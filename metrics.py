@@ -0,0 +1,250 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, before_render_template, g, request, template_rendered
+
+import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 500)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+# ---------- METRIC TYPES ----------
+# Just enough of the Prometheus text format (version 0.0.4) to be scraped;
+# no client library needed.
+
+def _labels(names, values):
+    if not names:
+        return ""
+    escaped = (
+        str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values
+    )
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts, then sum and count
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, series):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    # read at scrape time: collect() returns {label values: number}
+    def __init__(self, name, help, labelnames, collect):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---------- SLOW REQUEST PROFILER ----------
+
+def _fold(frame):
+    # root-first "func (file:line);..." as flamegraph.pl / speedscope expect
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SlowRequestProfiler:
+    # Samples the stacks of threads that are serving a request every
+    # `interval` seconds. When a request took longer than `threshold_ms`
+    # its samples are written to `directory` in collapsed-stack format
+    # ("stack count" per line); faster requests are simply dropped.
+
+    def __init__(self, threshold_ms, directory, interval=0.005):
+        self.threshold_ms = threshold_ms
+        self.directory = directory
+        self.interval = interval
+        self.dumps = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start_request(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def finish_request(self, endpoint, seconds):
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+            if not self._active:
+                self._wake.clear()
+        if not samples or seconds * 1000 < self.threshold_ms:
+            return None
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{seconds * 1000:.0f}ms.folded",
+        )
+        with open(path, "w") as out:
+            for stack, count in samples.most_common():
+                out.write(f"{stack} {count}\n")
+        self.dumps += 1
+        return path
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != me:
+                        samples[_fold(frame)] += 1
+
+
+# ---------- FLASK INTEGRATION ----------
+
+def _operation(sql):
+    words = sql.lstrip().split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def init_app(app):
+    app.config.setdefault("METRICS_ENABLED", True)
+    app.config.setdefault("PROFILE_SLOW_REQUESTS_MS", None)   # e.g. 500; None = off
+    app.config.setdefault("PROFILE_DIR", "profiles")
+
+    registry = Registry()
+    request_latency = registry.add(Histogram(
+        "http_request_duration_seconds", "Time to build the response, by route.",
+        ("endpoint", "method", "status"),
+    ))
+    statements_per_request = registry.add(Histogram(
+        "db_statements_per_request", "SQL statements run on the request connection.",
+        ("endpoint",), COUNT_BUCKETS,
+    ))
+    statement_latency = registry.add(Histogram(
+        "db_statement_duration_seconds", "execute()/executemany() time (to first row for SELECTs).",
+        ("endpoint", "operation"), STATEMENT_BUCKETS,
+    ))
+    template_latency = registry.add(Histogram(
+        "template_render_seconds", "Jinja render time, by template.",
+        ("template",),
+    ))
+
+    profiler = None
+    if app.config["PROFILE_SLOW_REQUESTS_MS"] is not None:
+        profiler = SlowRequestProfiler(app.config["PROFILE_SLOW_REQUESTS_MS"], app.config["PROFILE_DIR"])
+
+    app.extensions["metrics"] = registry
+    app.extensions["profiler"] = profiler
+    if not app.config["METRICS_ENABLED"]:
+        return registry
+
+    def endpoint():
+        return request.endpoint or "unmatched"
+
+    def time_statement(sql, seconds):
+        statement_latency.observe((endpoint(), _operation(sql)), seconds)
+
+    app.extensions["db_statement_timer"] = time_statement
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        if profiler is not None:
+            profiler.start_request()
+
+    @app.after_request
+    def record_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request(exception=None):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        seconds = time.perf_counter() - start
+        status = g.pop("metrics_status", 500)
+        request_latency.observe((endpoint(), request.method, str(status)), seconds)
+        statements_per_request.observe((endpoint(),), db.query_count())
+        if profiler is not None:
+            profiler.finish_request(endpoint(), seconds)
+
+    def render_started(sender, template, context, **extra):
+        g.setdefault("template_starts", []).append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        starts = g.get("template_starts")
+        if starts:
+            template_latency.observe((template.name or "",), time.perf_counter() - starts.pop())
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+    return registry
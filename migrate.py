@@ -0,0 +1,551 @@
+import argparse
+import sqlite3
+
+DB_NAME = "students.db"
+
+
+def _column_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+# ---------- MIGRATIONS ----------
+# Each migration runs exactly once, in order, inside its own transaction.
+# The version that has been applied is kept in PRAGMA user_version, so an
+# existing students.db created by the old init_db.py (user_version = 0)
+# is picked up and upgraded in place.
+
+def m001_base_tables(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        roll_no TEXT NOT NULL,
+        name TEXT NOT NULL,
+        email TEXT,
+        course TEXT,
+        semester INTEGER,
+        phone TEXT,
+        department TEXT NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS attendance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        status TEXT NOT NULL,
+        FOREIGN KEY (student_id) REFERENCES students(id)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS teachers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        name TEXT NOT NULL,
+        department TEXT NOT NULL
+    )
+    """)
+
+
+def m002_student_login_columns(conn):
+    # set_student_login() / student_login() use these, init_db.py never made them
+    columns = _column_names(conn, "students")
+    if "student_username" not in columns:
+        conn.execute("ALTER TABLE students ADD COLUMN student_username TEXT")
+    if "student_password_hash" not in columns:
+        conn.execute("ALTER TABLE students ADD COLUMN student_password_hash TEXT")
+
+
+def m003_query_indexes(conn):
+    # per-student history + the (student_id, date) LEFT JOIN in attendance_by_date()
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_attendance_student_date
+    ON attendance (student_id, date, status)
+    """)
+    # today's counts on home(), covering so the table itself is never read
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_attendance_date_status
+    ON attendance (date, status, student_id)
+    """)
+    # department / course scoped listings, already in roll_no order
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_students_department_roll
+    ON students (department, roll_no)
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_students_course_roll
+    ON students (course, roll_no)
+    """)
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_students_username
+    ON students (student_username)
+    """)
+    conn.execute("ANALYZE")
+
+
+def m004_unique_attendance_day(conn):
+    # one row per student per day, so saves can upsert instead of delete+insert;
+    # keep the most recent row if older data has duplicates
+    conn.execute("""
+    DELETE FROM attendance
+    WHERE id NOT IN (
+        SELECT MAX(id) FROM attendance GROUP BY student_id, date
+    )
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_attendance_student_date")
+    conn.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date
+    ON attendance (student_id, date)
+    """)
+
+
+def m005_attendance_stats(conn):
+    # per-student counters kept current by triggers, so summaries read one
+    # row per student instead of aggregating the whole attendance history
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS attendance_stats (
+        student_id INTEGER PRIMARY KEY,
+        presents INTEGER NOT NULL DEFAULT 0,
+        absents INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0,
+        last_date TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_stats_insert
+    AFTER INSERT ON attendance
+    BEGIN
+        INSERT INTO attendance_stats (student_id, presents, absents, total, last_date)
+        VALUES (new.student_id, new.status = 'Present', new.status = 'Absent', 1, new.date)
+        ON CONFLICT (student_id) DO UPDATE SET
+            presents = presents + excluded.presents,
+            absents = absents + excluded.absents,
+            total = total + 1,
+            last_date = MAX(COALESCE(last_date, ''), excluded.last_date);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_stats_update
+    AFTER UPDATE OF status ON attendance
+    WHEN old.status IS NOT new.status
+    BEGIN
+        UPDATE attendance_stats SET
+            presents = presents - (old.status = 'Present') + (new.status = 'Present'),
+            absents = absents - (old.status = 'Absent') + (new.status = 'Absent')
+        WHERE student_id = new.student_id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_attendance_stats_delete
+    AFTER DELETE ON attendance
+    BEGIN
+        UPDATE attendance_stats SET
+            presents = presents - (old.status = 'Present'),
+            absents = absents - (old.status = 'Absent'),
+            total = total - 1,
+            last_date = (SELECT MAX(date) FROM attendance WHERE student_id = old.student_id)
+        WHERE student_id = old.student_id;
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_students_stats_delete
+    AFTER DELETE ON students
+    BEGIN
+        DELETE FROM attendance_stats WHERE student_id = old.id;
+    END
+    """)
+    conn.execute("DELETE FROM attendance_stats")
+    conn.execute("""
+    INSERT INTO attendance_stats (student_id, presents, absents, total, last_date)
+    SELECT student_id,
+           SUM(status = 'Present'),
+           SUM(status = 'Absent'),
+           COUNT(*),
+           MAX(date)
+    FROM attendance
+    WHERE student_id IN (SELECT id FROM students)
+    GROUP BY student_id
+    """)
+
+
+def m006_students_listing_index(conn):
+    # keyset pagination of /students: department, then (course, roll_no, id)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_students_department_course_roll
+    ON students (department, course, roll_no)
+    """)
+
+
+def m007_students_fts(conn):
+    # full-text index over the searchable student columns, stored as an
+    # external-content table over students and kept in sync by triggers
+    conn.execute("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+        roll_no, name, course,
+        content = 'students',
+        content_rowid = 'id',
+        prefix = '1 2 3'
+    )
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_students_fts_insert
+    AFTER INSERT ON students
+    BEGIN
+        INSERT INTO students_fts (rowid, roll_no, name, course)
+        VALUES (new.id, new.roll_no, new.name, new.course);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_students_fts_delete
+    AFTER DELETE ON students
+    BEGIN
+        INSERT INTO students_fts (students_fts, rowid, roll_no, name, course)
+        VALUES ('delete', old.id, old.roll_no, old.name, old.course);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_students_fts_update
+    AFTER UPDATE OF roll_no, name, course ON students
+    BEGIN
+        INSERT INTO students_fts (students_fts, rowid, roll_no, name, course)
+        VALUES ('delete', old.id, old.roll_no, old.name, old.course);
+        INSERT INTO students_fts (rowid, roll_no, name, course)
+        VALUES (new.id, new.roll_no, new.name, new.course);
+    END
+    """)
+    conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+
+
+def m008_cache_versions(conn):
+    # write counters that in-process caches compare against, so every
+    # worker notices a change made by any other worker
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('courses', 0)")
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_courses_version_insert
+    AFTER INSERT ON students
+    BEGIN
+        UPDATE cache_versions SET version = version + 1 WHERE name = 'courses';
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_courses_version_update
+    AFTER UPDATE OF course ON students
+    WHEN old.course IS NOT new.course
+    BEGIN
+        UPDATE cache_versions SET version = version + 1 WHERE name = 'courses';
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_courses_version_delete
+    AFTER DELETE ON students
+    BEGIN
+        UPDATE cache_versions SET version = version + 1 WHERE name = 'courses';
+    END
+    """)
+
+
+def m009_attendance_archives(conn):
+    # closed terms moved out of `attendance` into read-only files (see
+    # partitions.py). Rows deleted because their term was archived keep
+    # counting in attendance_stats, so the delete trigger skips them.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS attendance_archives (
+        term TEXT PRIMARY KEY,
+        date_from TEXT NOT NULL,
+        date_to TEXT NOT NULL,
+        path TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("DROP TRIGGER IF EXISTS trg_attendance_stats_delete")
+    conn.execute("""
+    CREATE TRIGGER trg_attendance_stats_delete
+    AFTER DELETE ON attendance
+    WHEN NOT EXISTS (
+        SELECT 1 FROM attendance_archives
+        WHERE old.date BETWEEN date_from AND date_to
+    )
+    BEGIN
+        UPDATE attendance_stats SET
+            presents = presents - (old.status = 'Present'),
+            absents = absents - (old.status = 'Absent'),
+            total = total - 1,
+            last_date = (SELECT MAX(date) FROM attendance WHERE student_id = old.student_id)
+        WHERE student_id = old.student_id;
+    END
+    """)
+
+
+def m010_attendance_bits(conn):
+    # attendance as one bitmap row per student and term (see bitsets.py);
+    # the attendance pages read these instead of a row per day
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS attendance_bits (
+        student_id INTEGER NOT NULL,
+        term TEXT NOT NULL,
+        present BLOB NOT NULL,
+        marked BLOB NOT NULL,
+        PRIMARY KEY (student_id, term)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_students_bits_delete
+    AFTER DELETE ON students
+    BEGIN
+        DELETE FROM attendance_bits WHERE student_id = old.id;
+    END
+    """)
+    # encoding the existing rows needs Python; imported here because
+    # bitsets (through partitions) imports this module
+    import bitsets
+
+    bitsets.rebuild(conn)
+
+
+def _bump_department(department_expr):
+    # upsert of the "department:<name>" counter read by rendering.py
+    return f"""
+        INSERT INTO cache_versions (name, version, changed_at)
+        SELECT 'department:' || {department_expr}, 1, CAST(strftime('%s', 'now') AS INTEGER)
+        WHERE {department_expr} IS NOT NULL
+        ON CONFLICT (name) DO UPDATE SET
+            version = version + 1,
+            changed_at = excluded.changed_at;
+    """
+
+
+def m011_department_versions(conn):
+    # a data version per department, so the department pages can answer
+    # conditional GETs (ETag / Last-Modified) without rendering
+    if "changed_at" not in _column_names(conn, "cache_versions"):
+        conn.execute("ALTER TABLE cache_versions ADD COLUMN changed_at INTEGER")
+
+    student_department = "(SELECT department FROM students WHERE id = {row}.student_id)"
+    triggers = {
+        "trg_department_version_student_insert": (
+            "AFTER INSERT ON students", _bump_department("new.department")),
+        "trg_department_version_student_update": (
+            "AFTER UPDATE ON students",
+            _bump_department("old.department")
+            + _bump_department("CASE WHEN new.department IS NOT old.department THEN new.department END")),
+        "trg_department_version_student_delete": (
+            "AFTER DELETE ON students", _bump_department("old.department")),
+        "trg_department_version_attendance_insert": (
+            "AFTER INSERT ON attendance", _bump_department(student_department.format(row="new"))),
+        "trg_department_version_attendance_update": (
+            "AFTER UPDATE OF status ON attendance WHEN old.status IS NOT new.status",
+            _bump_department(student_department.format(row="new"))),
+        "trg_department_version_attendance_delete": (
+            "AFTER DELETE ON attendance", _bump_department(student_department.format(row="old"))),
+    }
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def _mark_course_stale(row):
+    return f"""
+        INSERT OR IGNORE INTO daily_rollup_stale (department, course)
+        SELECT {row}.department, {row}.course WHERE {row}.course IS NOT NULL;
+    """
+
+
+def m012_daily_rollup(conn):
+    # per (department, course, day) attendance counts for the calendar
+    # page and range queries (see rollup.py)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS daily_rollup (
+        department TEXT NOT NULL,
+        course TEXT NOT NULL,
+        date TEXT NOT NULL,
+        present INTEGER NOT NULL,
+        absent INTEGER NOT NULL,
+        not_marked INTEGER NOT NULL,
+        PRIMARY KEY (department, date, course)
+    ) WITHOUT ROWID
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS daily_rollup_stale (
+        department TEXT NOT NULL,
+        course TEXT NOT NULL,
+        PRIMARY KEY (department, course)
+    ) WITHOUT ROWID
+    """)
+    # enrolment changes: recomputed by the next reader of the course
+    triggers = {
+        "trg_students_rollup_insert": ("AFTER INSERT ON students", _mark_course_stale("new")),
+        "trg_students_rollup_delete": ("AFTER DELETE ON students", _mark_course_stale("old")),
+        "trg_students_rollup_update": (
+            "AFTER UPDATE OF department, course ON students "
+            "WHEN old.department IS NOT new.department OR old.course IS NOT new.course",
+            _mark_course_stale("old") + _mark_course_stale("new")),
+    }
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    # rollup imports partitions, which imports this module
+    import rollup
+
+    rollup.rebuild(conn)
+
+
+def m013_scheduled_jobs(conn):
+    # nightly jobs (scheduler.py) and what they produce (snapshots.py)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        name TEXT PRIMARY KEY,
+        schedule TEXT NOT NULL,
+        next_run REAL NOT NULL,
+        lease_owner TEXT,
+        lease_expires REAL,
+        last_status TEXT,
+        last_duration REAL,
+        last_success REAL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS job_runs (
+        id INTEGER PRIMARY KEY,
+        job TEXT NOT NULL,
+        owner TEXT,
+        started_at REAL NOT NULL,
+        finished_at REAL,
+        status TEXT NOT NULL,
+        error TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs (job, started_at)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS summary_snapshots (
+        department TEXT PRIMARY KEY,
+        computed_at REAL NOT NULL,
+        report TEXT NOT NULL
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS attendance_alerts (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL,
+        department TEXT NOT NULL,
+        percent REAL NOT NULL,
+        created_at REAL NOT NULL,
+        resolved_at REAL,
+        notified_at REAL
+    )
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_attendance_alerts_open
+    ON attendance_alerts (department, student_id) WHERE resolved_at IS NULL
+    """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS trg_students_alerts_delete
+    AFTER DELETE ON students
+    BEGIN
+        DELETE FROM attendance_alerts WHERE student_id = old.id;
+    END
+    """)
+
+
+def m014_principal_versions(conn):
+    # one counter for every field a cached Teacher / Student principal
+    # holds, so each worker drops its cached principals after a change made
+    # by another worker (a deleted student, a new username, ...)
+    conn.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('principals', 0)")
+    bump = "UPDATE cache_versions SET version = version + 1 WHERE name = 'principals';"
+    triggers = {
+        "trg_principals_version_student_update": (
+            "AFTER UPDATE OF roll_no, name, email, course, semester, phone, department, student_username "
+            "ON students"),
+        "trg_principals_version_student_delete": "AFTER DELETE ON students",
+        "trg_principals_version_teacher_update": "AFTER UPDATE OF username, name, department ON teachers",
+        "trg_principals_version_teacher_delete": "AFTER DELETE ON teachers",
+    }
+    for name, event in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {bump} END")
+
+
+MIGRATIONS = [
+    (1, "base tables", m001_base_tables),
+    (2, "student login columns", m002_student_login_columns),
+    (3, "query indexes", m003_query_indexes),
+    (4, "unique attendance per student and day", m004_unique_attendance_day),
+    (5, "attendance stats counters", m005_attendance_stats),
+    (6, "students listing index", m006_students_listing_index),
+    (7, "students full-text search", m007_students_fts),
+    (8, "cache version counters", m008_cache_versions),
+    (9, "archived attendance terms", m009_attendance_archives),
+    (10, "attendance bitmaps per term", m010_attendance_bits),
+    (11, "department data versions", m011_department_versions),
+    (12, "daily attendance rollup", m012_daily_rollup),
+    (13, "scheduled jobs, summary snapshots and alerts", m013_scheduled_jobs),
+    (14, "principal cache version", m014_principal_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ---------- RUNNER ----------
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def upgrade(db_name=DB_NAME, target=None, verbose=False):
+    if target is None:
+        target = LATEST_VERSION
+
+    conn = sqlite3.connect(db_name, isolation_level=None)
+    applied = []
+    try:
+        version = current_version(conn)
+        for number, description, migration in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if current_version(conn) >= number:
+                    # another process applied it while we waited for the lock
+                    conn.execute("COMMIT")
+                    continue
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append(number)
+            if verbose:
+                print(f"Applied migration {number}: {description}")
+    finally:
+        conn.close()
+    return applied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create or upgrade the database schema.")
+    parser.add_argument("--db", default=DB_NAME, help="path to the SQLite database")
+    parser.add_argument("--target", type=int, default=None, help="stop at this version")
+    parser.add_argument("--status", action="store_true", help="only show the current version")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        conn = sqlite3.connect(args.db)
+        version = current_version(conn)
+        conn.close()
+        print(f"{args.db}: schema version {version} (latest {LATEST_VERSION})")
+        return
+
+    applied = upgrade(args.db, target=args.target, verbose=True)
+    if not applied:
+        print("Database schema is already up to date.")
+    else:
+        print("Database schema upgraded successfully.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import base64
+import json
+
+
+# ---------- KEYSET CURSORS ----------
+# A cursor is the sort key of the last row on a page, (course, roll_no, id),
+# packed into a URL-safe token. The next page starts strictly after it, so
+# page N costs the same as page 1 (no OFFSET scanning).
+
+def encode_cursor(row):
+    raw = json.dumps([row["course"], row["roll_no"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        course, roll_no, sid = json.loads(base64.urlsafe_b64decode(padded))
+        return (str(course), str(roll_no), int(sid))
+    except (ValueError, TypeError):
+        # a mangled link just starts again from the first page
+        return None
+
+
+def page_size(value, default, maximum):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
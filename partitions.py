@@ -0,0 +1,264 @@
+import argparse
+import os
+import re
+import sqlite3
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, timedelta
+from urllib.parse import quote
+
+import db
+import migrate
+
+DB_NAME = "students.db"
+
+# (month, day) on which each academic term begins; a term runs until the
+# day before the next one starts
+TERM_STARTS = ((1, 1), (7, 1))
+
+ARCHIVE_DIR = "archive"
+
+Term = namedtuple("Term", "name date_from date_to")
+
+
+# ---------- TERMS ----------
+
+def term_for(day):
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    starts = [date(day.year, month, dom) for month, dom in TERM_STARTS]
+    if day < starts[0]:
+        return term_for(date(day.year - 1, 12, 31))
+    i = max(n for n, start in enumerate(starts) if start <= day)
+    if i + 1 < len(starts):
+        end = starts[i + 1] - timedelta(days=1)
+    else:
+        end = date(day.year + 1, *TERM_STARTS[0]) - timedelta(days=1)
+    return Term(f"{day.year}-T{i + 1}", starts[i].isoformat(), end.isoformat())
+
+
+def term_named(name):
+    # "2024-T2" -> Term
+    year, n = name.split("-T")
+    return term_for(date(int(year), *TERM_STARTS[int(n) - 1]))
+
+
+def closed_terms(first_day, before):
+    # every term from the one holding first_day up to, not including, the
+    # term that holds `before`
+    current = term_for(before)
+    terms = []
+    term = term_for(first_day)
+    while term.date_from < current.date_from:
+        terms.append(term)
+        term = term_for(date.fromisoformat(term.date_to) + timedelta(days=1))
+    return terms
+
+
+# ---------- ROUTING ----------
+# Hot data (the current term, and any term not archived yet) lives in the
+# `attendance` table. Each archived term is its own file with the same
+# `attendance` table, attached read-only only while a query needs it.
+
+def archives(conn):
+    return conn.execute(
+        "SELECT term, date_from, date_to, path FROM attendance_archives ORDER BY date_from"
+    ).fetchall()
+
+
+def has_archives(conn):
+    return conn.execute("SELECT 1 FROM attendance_archives LIMIT 1").fetchone() is not None
+
+
+def archived_term(conn, day):
+    # the archive row covering `day`, or None when the day is hot
+    return conn.execute(
+        "SELECT term, date_from, date_to, path FROM attendance_archives "
+        "WHERE ? BETWEEN date_from AND date_to",
+        (day,),
+    ).fetchone()
+
+
+def _main_dir(conn):
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return os.path.dirname(os.path.abspath(path))
+    return os.getcwd()
+
+
+def _schema_name(term):
+    return "term_" + re.sub(r"\W", "_", term).lower()
+
+
+def archive_uri(conn, path):
+    # read-only URI for an archive path as stored in attendance_archives
+    return f"file:{quote(os.path.join(_main_dir(conn), path))}?mode=ro"
+
+
+def attach(conn, archive):
+    # returns (schema, attached_here); an archive already attached by an
+    # outer caller is reused and left for that caller to detach
+    schema = _schema_name(archive["term"])
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    if schema in attached:
+        return schema, False
+    # needs a connection opened with uri=True (db.connect does that)
+    conn.execute("ATTACH DATABASE ? AS " + schema, (archive_uri(conn, archive["path"]),))
+    return schema, True
+
+
+def sources(conn, date_from=None, date_to=None, newest_first=False):
+    # Yields the attendance tables to read for the date range, in date
+    # order: the archived terms that overlap it, then the hot table. Each
+    # archive is attached just before it is yielded and detached after, so
+    # only one is ever attached at a time. Consume it fully (or close it).
+    low = date_from or ""
+    high = date_to or "9999-12-31"
+    needed = [a for a in archives(conn) if a["date_from"] <= high and a["date_to"] >= low]
+    order = needed + [None]
+    if newest_first:
+        order.reverse()
+
+    for archive in order:
+        if archive is None:
+            yield "main.attendance"
+            continue
+        schema, attached_here = attach(conn, archive)
+        try:
+            yield f"{schema}.attendance"
+        finally:
+            if attached_here:
+                conn.execute("DETACH DATABASE " + schema)
+
+
+@contextmanager
+def table_for(conn, day):
+    # the one attendance table holding `day`, attached for the duration
+    archive = archived_term(conn, day)
+    if archive is None:
+        yield "main.attendance"
+        return
+    schema, attached_here = attach(conn, archive)
+    try:
+        yield f"{schema}.attendance"
+    finally:
+        if attached_here:
+            conn.execute("DETACH DATABASE " + schema)
+
+
+# ---------- ARCHIVAL ----------
+
+ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE attendance (
+        student_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        status TEXT NOT NULL,
+        PRIMARY KEY (student_id, date)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX idx_attendance_date_status ON attendance (date, status, student_id)",
+)
+
+
+def archive_term(conn, term, db_dir):
+    # copies one closed term into its own file, registers it and deletes
+    # the rows from the hot table; returns the number of rows moved
+    relative = os.path.join(ARCHIVE_DIR, f"attendance-{term.name}.db")
+    path = os.path.join(db_dir, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            # left over from an interrupted run; the hot rows are still here
+            os.remove(path + suffix)
+
+    out = sqlite3.connect(path)
+    out.execute("PRAGMA journal_mode = DELETE")
+    for statement in ARCHIVE_SCHEMA:
+        out.execute(statement)
+    out.commit()
+    out.close()
+
+    conn.execute("ATTACH DATABASE ? AS archive_out", (path,))
+    try:
+        with conn:
+            moved = conn.execute(
+                """
+                INSERT INTO archive_out.attendance (student_id, date, status)
+                SELECT student_id, date, status FROM main.attendance
+                WHERE date BETWEEN ? AND ?
+                ORDER BY student_id, date
+                """,
+                (term.date_from, term.date_to),
+            ).rowcount
+    finally:
+        conn.execute("DETACH DATABASE archive_out")
+
+    # compact: the file is written once and only read from now on
+    out = sqlite3.connect(path)
+    out.execute("ANALYZE")
+    out.execute("VACUUM")
+    out.close()
+
+    # register first: the delete trigger leaves attendance_stats alone for
+    # dates inside an archived term
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO attendance_archives (term, date_from, date_to, path, rows) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (term.name, term.date_from, term.date_to, relative, moved),
+        )
+        conn.execute(
+            "DELETE FROM main.attendance WHERE date BETWEEN ? AND ?",
+            (term.date_from, term.date_to),
+        )
+    return moved
+
+
+def archive_closed_terms(conn, db_dir, before=None, verbose=False):
+    # archives every term that ended before the term holding `before`
+    # (default today), oldest first, so the hot table only ever holds the
+    # newest dates
+    before = before or date.today().isoformat()
+    first = conn.execute("SELECT MIN(date) FROM main.attendance").fetchone()[0]
+    if first is None:
+        return []
+
+    done = []
+    for term in closed_terms(first, before):
+        if archived_term(conn, term.date_from) is not None:
+            continue
+        moved = archive_term(conn, term, db_dir)
+        done.append((term, moved))
+        if verbose:
+            print(f"Archived {term.name} ({term.date_from} .. {term.date_to}): {moved} rows")
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move closed academic terms out of the hot attendance table.")
+    parser.add_argument("--db", default=DB_NAME, help="path to the SQLite database")
+    parser.add_argument("--before", help="archive terms that ended before this date's term (default today)")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the main database afterwards")
+    parser.add_argument("--list", action="store_true", help="only list archived terms")
+    args = parser.parse_args(argv)
+
+    migrate.upgrade(args.db)
+    conn = db.connect(args.db)
+    try:
+        if not args.list:
+            done = archive_closed_terms(
+                conn, os.path.dirname(os.path.abspath(args.db)), args.before, verbose=True,
+            )
+            if not done:
+                print("No closed terms left to archive.")
+            elif args.vacuum:
+                conn.execute("VACUUM")
+        for archive in archives(conn):
+            print(f"{archive['term']}: {archive['date_from']} .. {archive['date_to']} -> {archive['path']}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
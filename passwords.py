@@ -0,0 +1,196 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as PoolTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Set from app.config by init_app(); these defaults match werkzeug's.
+settings = {
+    "method": "scrypt:32768:8:1",
+    "workers": 0,           # 0 = hash on the request thread
+    "max_pending": 64,      # verifications allowed to queue for the pool
+    "timeout": 10.0,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = None
+_method_prefix = None   # settings["method"] as werkzeug writes it, see needs_rehash()
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def init_app(app):
+    app.config.setdefault("PASSWORD_HASH_METHOD", settings["method"])
+    app.config.setdefault("PASSWORD_HASH_WORKERS", settings["workers"])
+    app.config.setdefault("PASSWORD_HASH_MAX_PENDING", settings["max_pending"])
+    app.config.setdefault("PASSWORD_HASH_TIMEOUT", settings["timeout"])
+    # the pool itself starts with the first hash (or start())
+    configure(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+    )
+
+
+def configure(method=None, workers=None, max_pending=None, timeout=None):
+    global _pending, _method_prefix
+    shutdown()
+    if method is not None:
+        settings["method"] = method
+        _method_prefix = None
+    if workers is not None:
+        settings["workers"] = workers
+    if max_pending is not None:
+        settings["max_pending"] = max_pending
+    if timeout is not None:
+        settings["timeout"] = timeout
+    _pending = threading.BoundedSemaphore(settings["max_pending"])
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# ---------- WORKER POOL ----------
+
+def _start_method():
+    # fork is cheap and does not re-import the caller's __main__ in every
+    # worker. The pool is usually forked from a request thread; its workers only
+    # run werkzeug's hashing, so locks other threads held at the fork are
+    # never touched in them.
+    return "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings["workers"],
+                mp_context=multiprocessing.get_context(_start_method()),
+            )
+        return _executor
+
+
+def _forget_executor():
+    # A forked web worker inherits the parent's executor object but none of
+    # its threads; it starts a pool of its own on first use.
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_executor)
+
+
+def start():
+    # bring the workers up now rather than on the first login (gunicorn's
+    # post_fork, benchmarks)
+    if settings["workers"]:
+        _get_executor().submit(int).result()
+
+
+def _run(fn, *args, wait=False):
+    if not settings["workers"]:
+        return fn(*args)
+
+    # a full queue means the pool is saturated; logins fail fast instead of
+    # letting request threads pile up behind it
+    acquired = _pending.acquire(timeout=settings["timeout"]) if wait else _pending.acquire(blocking=False)
+    if not acquired:
+        raise HashingBusy()
+    try:
+        return _get_executor().submit(fn, *args).result(timeout=settings["timeout"])
+    except PoolTimeout:
+        # the pool is too slow to answer: same as a full queue
+        raise HashingBusy() from None
+    finally:
+        _pending.release()
+
+
+# ---------- HASHING ----------
+
+def hash_password(password):
+    # new hashes are rare (registration, rehash after a successful login), so
+    # they wait for a free slot rather than failing
+    return _run(generate_password_hash, password, settings["method"], wait=True)
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def method_prefix():
+    # werkzeug fills in defaults ("scrypt" -> "scrypt:32768:8:1", "pbkdf2" ->
+    # "pbkdf2:sha256:<iterations>"), so the configured method is compared in
+    # the form a fresh hash carries; worked out once, on first use
+    global _method_prefix
+    if _method_prefix is None:
+        _method_prefix = generate_password_hash("", settings["method"]).split("$", 1)[0]
+    return _method_prefix
+
+
+def needs_rehash(password_hash):
+    # werkzeug hashes look like "method:params$salt$hash"
+    return password_hash.split("$", 1)[0] != method_prefix()
+
+
+# ---------- FAILED LOGIN THROTTLE ----------
+
+class LoginThrottle:
+    # Counts failed logins per key (e.g. username + IP) inside a sliding
+    # window. Once a key reaches max_failures it is refused without touching
+    # the database or the password hash until old failures age out.
+
+    def __init__(self, max_failures=5, window=300.0, max_keys=10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        times = self._failures.get(key)
+        if times is None:
+            return None
+        while times and times[0] <= now - self.window:
+            times.popleft()
+        if not times:
+            del self._failures[key]
+            return None
+        return times
+
+    def blocked(self, key):
+        with self._lock:
+            times = self._recent(key, time.monotonic())
+            return times is not None and len(times) >= self.max_failures
+
+    def record_failure(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._failures and len(self._failures) >= self.max_keys:
+                # forget the key whose latest failure is oldest
+                oldest = min(self._failures, key=lambda k: self._failures[k][-1])
+                del self._failures[oldest]
+            times = self._failures.setdefault(key, deque(maxlen=self.max_failures))
+            times.append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
@@ -0,0 +1,98 @@
+from flask import g
+
+# Logged-in teachers and the students routes act on, loaded once per request
+# (memoised on flask.g) and kept in a shared LRU across requests. Password
+# hashes are never part of a principal, so a cached object is safe to hand
+# to templates. Cached entries carry the 'principals' counter from
+# cache_versions (migration 14) and are reloaded once it moves, so a change
+# made in another worker process is seen on its next request.
+
+
+class Teacher:
+    __slots__ = ("id", "username", "name", "department")
+
+    def __init__(self, id, username, name, department):
+        self.id = id
+        self.username = username
+        self.name = name
+        self.department = department
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row["id"], row["username"], row["name"], row["department"])
+
+    def can_manage(self, student):
+        return student is not None and student.department == self.department
+
+
+class Student:
+    __slots__ = (
+        "id", "roll_no", "name", "email", "course", "semester", "phone",
+        "department", "student_username",
+    )
+
+    def __init__(self, id, roll_no, name, email, course, semester, phone,
+                 department, student_username):
+        self.id = id
+        self.roll_no = roll_no
+        self.name = name
+        self.email = email
+        self.course = course
+        self.semester = semester
+        self.phone = phone
+        self.department = department
+        self.student_username = student_username
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*(row[field] for field in cls.__slots__))
+
+
+TEACHER_SQL = "SELECT id, username, name, department FROM teachers WHERE id = ?"
+STUDENT_SQL = (
+    "SELECT id, roll_no, name, email, course, semester, phone, department, student_username "
+    "FROM students WHERE id = ?"
+)
+VERSION_SQL = "SELECT version FROM cache_versions WHERE name = 'principals'"
+
+
+def _version(conn):
+    # read once per request, before any principal row
+    if "principals_version" not in g:
+        row = conn.execute(VERSION_SQL).fetchone()
+        g.principals_version = row[0] if row else None
+    return g.principals_version
+
+
+def _load(conn, cache, kind, sql, factory, id):
+    memo = g.setdefault("principals", {})
+    key = (kind, id)
+    if key in memo:
+        return memo[key]
+
+    version = _version(conn)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == version:
+        principal = entry[1]
+    else:
+        row = conn.execute(sql, (id,)).fetchone()
+        principal = factory(row) if row else None
+        if principal is not None:
+            cache.set(key, (version, principal))
+    memo[key] = principal
+    return principal
+
+
+def load_teacher(conn, cache, id):
+    return _load(conn, cache, "teacher", TEACHER_SQL, Teacher.from_row, id)
+
+
+def load_student(conn, cache, id):
+    return _load(conn, cache, "student", STUDENT_SQL, Student.from_row, id)
+
+
+def forget_student(cache, id):
+    # call after any write to the student's row (other workers notice the
+    # write through the version counter)
+    cache.invalidate(lambda key: key == ("student", id))
+    g.get("principals", {}).pop(("student", id), None)
@@ -0,0 +1,131 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+from flask import current_app, g, request, session
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+
+import cache
+
+# ---------- TEMPLATE BYTECODE ----------
+# Compiled templates are written to TEMPLATE_CACHE_DIR, so the next worker
+# or restart loads them from there instead of parsing and compiling the
+# source again. They are compiled on first render, or all at once here
+# with TEMPLATE_PRECOMPILE.
+
+def init_app(app):
+    app.config.setdefault("TEMPLATE_CACHE_DIR", "template_cache")
+    app.config.setdefault("TEMPLATE_PRECOMPILE", False)
+    app.config.setdefault("ROW_FRAGMENT_CACHE_SIZE", 50_000)   # 0 = off
+
+    directory = app.config["TEMPLATE_CACHE_DIR"]
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    if app.config["TEMPLATE_PRECOMPILE"]:
+        for name in app.jinja_env.list_templates(extensions=("html",)):
+            app.jinja_env.get_template(name)
+
+    fragments = RowFragments(app.config["ROW_FRAGMENT_CACHE_SIZE"])
+    app.jinja_env.globals["row_fragment"] = fragments.render
+    app.extensions["row_fragments"] = fragments
+    # changes whenever a template file does, so a deploy never answers
+    # 304 with a page rendered by the old templates
+    app.extensions["template_token"] = template_token(app)
+    app.after_request(_set_validators)
+    return fragments
+
+
+def template_token(app):
+    digest = hashlib.sha1()
+    for name in sorted(app.jinja_env.list_templates()):
+        _, filename, _ = app.jinja_env.loader.get_source(app.jinja_env, name)
+        if filename:
+            digest.update(f"{name}:{os.stat(filename).st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
+
+# ---------- ROW FRAGMENTS ----------
+# Large tables render each <tr> through row_fragment("_x_row.html", row).
+# The row's version is the tuple of the fields its fragment shows, so the
+# key changes exactly when the output would; nothing has to be
+# invalidated and an unchanged row is never rendered twice.
+
+ROW_FIELDS = {
+    "_student_row.html": ("id", "roll_no", "name", "course", "semester", "phone"),
+    "_summary_row.html": (
+        "roll_no", "name", "presents", "absents", "total", "percent",
+        "absence_streak", "recent_alert", "category",
+    ),
+}
+
+
+class RowFragments:
+    def __init__(self, maxsize):
+        self.cache = cache.TTLCache(maxsize=maxsize, ttl=24 * 3600)
+
+    def render(self, name, row):
+        key = (name, request.script_root, tuple(row[field] for field in ROW_FIELDS[name]))
+        html = self.cache.get(key)
+        if html is None:
+            html = Markup(current_app.jinja_env.get_template(name).render(s=row))
+            self.cache.set(key, html)
+        return html
+
+
+# ---------- CONDITIONAL GET ----------
+# Department pages carry an ETag built from the department's data version
+# (cache_versions row "department:<name>", bumped by triggers on students
+# and attendance) plus whatever else the page depends on. A matching
+# If-None-Match / If-Modified-Since gets a 304 before any query runs.
+
+def department_version(conn, department):
+    row = conn.execute(
+        "SELECT version, changed_at FROM cache_versions WHERE name = ?",
+        ("department:" + department,),
+    ).fetchone()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def start_of_day(day):
+    # unix time of local midnight, for pages that change with the date
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+def not_modified(conn, department, *parts, since=None):
+    # Returns a 304 response when the client's copy is current, else None
+    # and the validators are added to the response that gets rendered.
+    # `since` is a unix time the page also depends on (e.g. today's date).
+    if session.get("_flashes"):
+        # a pending flash message changes the page without a data change
+        return None
+
+    version, changed_at = department_version(conn, department)
+    etag = hashlib.sha1(repr((
+        current_app.extensions["template_token"], department, version,
+        session.get("teacher_id"), session.get("teacher_name"), request.full_path, parts,
+    )).encode()).hexdigest()
+    stamps = [t for t in (changed_at, since) if t is not None]
+    last_modified = datetime.fromtimestamp(max(stamps), timezone.utc) if stamps else None
+
+    g.validators = (etag, last_modified)
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = current_app.response_class(status=304)
+    _set_validators(response)
+    return response
+
+
+def _set_validators(response):
+    validators = g.pop("validators", None)
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = validators
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # per-teacher pages: browsers may keep them but must revalidate
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,218 @@
+import argparse
+import json
+import sqlite3
+from datetime import date, timedelta
+
+import db
+import partitions
+
+DB_NAME = "students.db"
+
+# ---------- DAILY ROLLUP ----------
+# daily_rollup holds one row per (department, course, date) on which the
+# course took attendance: how many of the course's current students were
+# present, absent and not marked. The calendar page and
+# /api/v1/attendance/daily read any range of days with one scan of the
+# primary key (department, date, course), where the by-date page joins
+# every student of the department against `attendance` for a single day.
+#
+# Attendance saves refresh the (course, date) they wrote. Adding, deleting
+# or moving a student changes every day of its course; the triggers from
+# migration 12 only note the (department, course) in daily_rollup_stale
+# and the next read recomputes it. Archiving a term keeps its rows.
+
+REFRESH_DAY_SQL = """
+INSERT INTO daily_rollup (department, course, date, present, absent, not_marked)
+SELECT s.department, s.course, ?1,
+       COALESCE(SUM(a.status = 'Present'), 0), COALESCE(SUM(a.status = 'Absent'), 0), SUM(a.status IS NULL)
+FROM students s
+LEFT JOIN attendance a ON a.student_id = s.id AND a.date = ?1
+WHERE s.course = ?2
+GROUP BY s.department
+HAVING COUNT(a.student_id) > 0
+ON CONFLICT (department, date, course) DO UPDATE SET
+    present = excluded.present,
+    absent = excluded.absent,
+    not_marked = excluded.not_marked
+"""
+
+DAYS_SQL = """
+SELECT date, SUM(present), SUM(absent), SUM(not_marked)
+FROM daily_rollup
+WHERE department = ? AND date BETWEEN ? AND ?{course}
+GROUP BY date
+ORDER BY date
+"""
+
+ROWS_SQL = "SELECT student_id, date, status FROM attendance"
+
+
+# ---------- WRITE ----------
+
+def refresh_day(conn, course, day):
+    # after a save of `course` on `day`; the caller commits
+    conn.execute(REFRESH_DAY_SQL, (day, course))
+
+
+def expected_rows(conn, students=None):
+    # (department, course, date, present, absent, not_marked) for every day
+    # the given {student_id: (department, course)} (default: all students)
+    # have a mark, from the hot table and every archived term. Archives are
+    # opened on their own connection, so this also runs inside a
+    # transaction (migrations).
+    if students is None:
+        students = {
+            sid: (department, course)
+            for sid, department, course in conn.execute("SELECT id, department, course FROM students")
+            if course is not None
+        }
+    enrolled = {}
+    for key in students.values():
+        enrolled[key] = enrolled.get(key, 0) + 1
+
+    sql = ROWS_SQL + " WHERE student_id IN (SELECT value FROM json_each(?))"
+    params = (json.dumps(list(students)),)
+    counts = {}
+
+    def add(rows):
+        for sid, day, status in rows:
+            key = students.get(sid)
+            if key is None:
+                continue
+            entry = counts.setdefault((*key, day), [0, 0])
+            entry[status != "Present"] += 1
+
+    add(conn.execute(sql, params))
+    for (path,) in conn.execute("SELECT path FROM attendance_archives ORDER BY date_from").fetchall():
+        archive = sqlite3.connect(partitions.archive_uri(conn, path), uri=True)
+        try:
+            add(archive.execute(sql, params))
+        finally:
+            archive.close()
+
+    for (department, course, day), (present, absent) in sorted(counts.items()):
+        yield department, course, day, present, absent, enrolled[department, course] - present - absent
+
+
+def refresh_course(conn, department, course):
+    # recomputes every day of one course; the caller commits
+    students = {
+        sid: (department, course)
+        for (sid,) in conn.execute(
+            "SELECT id FROM students WHERE department = ? AND course = ?", (department, course)
+        )
+    }
+    conn.execute("DELETE FROM daily_rollup WHERE department = ? AND course = ?", (department, course))
+    conn.executemany(
+        "INSERT INTO daily_rollup (department, course, date, present, absent, not_marked) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        expected_rows(conn, students),
+    )
+
+
+def refresh_stale(conn, department=None):
+    # brings the courses marked stale up to date; returns how many there
+    # were (the caller commits when that is not 0)
+    sql = "SELECT department, course FROM daily_rollup_stale"
+    params = ()
+    if department is not None:
+        sql += " WHERE department = ?"
+        params = (department,)
+    stale = conn.execute(sql, params).fetchall()
+    for dept, course in stale:
+        refresh_course(conn, dept, course)
+        conn.execute("DELETE FROM daily_rollup_stale WHERE department = ? AND course = ?", (dept, course))
+    return len(stale)
+
+
+def rebuild(conn):
+    # the caller commits
+    conn.execute("DELETE FROM daily_rollup")
+    conn.execute("DELETE FROM daily_rollup_stale")
+    conn.executemany(
+        "INSERT INTO daily_rollup (department, course, date, present, absent, not_marked) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        expected_rows(conn),
+    )
+
+
+def find_drift(conn):
+    expected = {tuple(r[:3]): tuple(r[3:]) for r in expected_rows(conn)}
+    stored = {
+        tuple(r[:3]): tuple(r[3:])
+        for r in conn.execute(
+            "SELECT department, course, date, present, absent, not_marked FROM daily_rollup"
+        )
+    }
+    return sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+
+
+# ---------- READ ----------
+
+def days(conn, department, date_from, date_to, course=None):
+    # per-day totals of the department (or one course) over the range,
+    # only for days on which attendance was taken
+    sql = DAYS_SQL.format(course=" AND course = ?" if course else "")
+    params = [department, date_from, date_to] + ([course] if course else [])
+    return [
+        {
+            "date": day,
+            "present": present,
+            "absent": absent,
+            "not_marked": not_marked,
+            "percent": round(present / (present + absent) * 100, 1) if present + absent else None,
+        }
+        for day, present, absent, not_marked in conn.execute(sql, params)
+    ]
+
+
+def month_range(value):
+    # "2024-03" -> ("2024-03-01", "2024-03-31"); ValueError when malformed
+    first = date.fromisoformat(value + "-01")
+    last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return first.isoformat(), last.isoformat()
+
+
+def weeks(date_from, date_to, by_day):
+    # Monday-first rows of 7 cells covering the range; a cell is
+    # (date, by_day.get(date)) inside the range and None outside it
+    first = date.fromisoformat(date_from)
+    last = date.fromisoformat(date_to)
+    day = first - timedelta(days=first.weekday())
+    rows = []
+    while day <= last:
+        row = []
+        for _ in range(7):
+            iso = day.isoformat()
+            row.append((iso, by_day.get(iso)) if first <= day <= last else None)
+            day += timedelta(days=1)
+        rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify or rebuild the daily_rollup table.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--db", default=DB_NAME, help="path to the SQLite database")
+    args = parser.parse_args(argv)
+
+    conn = db.connect(args.db)
+    refresh_stale(conn)
+    conn.commit()
+    drift = find_drift(conn)
+    for department, course, day in drift:
+        print(f"{department} {course} {day}: rollup out of sync")
+    print(f"{len(drift)} rollup row(s) out of sync.")
+
+    if args.command == "rebuild":
+        rebuild(conn)
+        conn.commit()
+        print("daily_rollup rebuilt from the attendance rows.")
+    conn.close()
+
+    if args.command == "verify" and drift:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
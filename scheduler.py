@@ -0,0 +1,187 @@
+import logging
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import db
+
+# ---------- JOBS ----------
+# A job is a function of a connection, run once a day at `at` ("HH:MM",
+# local time). Its schedule and last outcome live in the `jobs` table
+# (migration 13), so restarts keep them and every web worker can run a
+# scheduler thread: a due run is claimed with a lease, and only the worker
+# whose UPDATE took the lease runs it. A job whose previous run still
+# holds the lease is not started again (overlap protection across threads
+# and processes); a worker that dies mid-run leaves a lease that expires
+# after `max_runtime` seconds.
+
+Job = namedtuple("Job", "name run at max_runtime", defaults=(3600,))
+
+REGISTER_SQL = """
+INSERT INTO jobs (name, schedule, next_run) VALUES (?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    next_run = CASE WHEN schedule IS excluded.schedule THEN next_run ELSE excluded.next_run END,
+    schedule = excluded.schedule
+"""
+
+CLAIM_SQL = """
+UPDATE jobs SET lease_owner = ?, lease_expires = ?
+WHERE name = ? AND next_run <= ? AND (lease_expires IS NULL OR lease_expires < ?)
+"""
+
+RUN_HISTORY_DAYS = 90
+
+log = logging.getLogger(__name__)
+
+
+def next_daily(at, after):
+    # unix time of the first `at` (local "HH:MM") strictly after `after`
+    hour, minute = (int(part) for part in at.split(":"))
+    moment = datetime.fromtimestamp(after)
+    candidate = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate <= moment:
+        candidate += timedelta(days=1)
+    return candidate.timestamp()
+
+
+class Scheduler:
+    # on_finish(name, status, seconds) is called after every run (metrics)
+
+    def __init__(self, db_name, jobs, poll=60, on_finish=None):
+        self.db_name = db_name
+        self.jobs = {job.name: job for job in jobs}
+        self.poll = poll
+        self.on_finish = on_finish
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # a forked web worker starts its own thread on its first request
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._forget_thread)
+
+    def _forget_thread(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_running(self):
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self):
+        # errors outside a job (e.g. "database is locked" while claiming)
+        # are logged and retried at the next poll, so one bad moment does
+        # not end scheduling in this worker
+        conn = None
+        registered = False
+        try:
+            while not self._stop.is_set():
+                try:
+                    if conn is None:
+                        conn = db.connect(self.db_name)
+                    if not registered:
+                        self.register(conn)
+                        registered = True
+                    self.run_due(conn)
+                except Exception:
+                    log.exception("scheduler poll failed; retrying in %ss", self.poll)
+                    if conn is not None and conn.in_transaction:
+                        conn.rollback()
+                self._stop.wait(self.poll)
+        finally:
+            if conn is not None:
+                conn.close()
+            # anything that still ends the thread lets ensure_running()
+            # start a new one
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def register(self, conn, now=None):
+        now = time.time() if now is None else now
+        conn.executemany(REGISTER_SQL, [
+            (job.name, job.at, next_daily(job.at, now)) for job in self.jobs.values()
+        ])
+        conn.commit()
+
+    def run_due(self, conn, now=None):
+        # runs every job that is due and not leased; returns their names
+        now = time.time() if now is None else now
+        ran = []
+        for job in self.jobs.values():
+            if self._claim(conn, job, now, due=now):
+                self._execute(conn, job)
+                ran.append(job.name)
+        return ran
+
+    def run_now(self, conn, name):
+        # runs one job regardless of its schedule, unless a run holds the
+        # lease; returns whether it ran
+        job = self.jobs[name]
+        now = time.time()
+        if not self._claim(conn, job, now, due=float("inf")):
+            return False
+        self._execute(conn, job)
+        return True
+
+    def _claim(self, conn, job, now, due):
+        claimed = conn.execute(CLAIM_SQL, (self.owner, now + job.max_runtime, job.name, due, now)).rowcount
+        conn.commit()
+        return claimed == 1
+
+    def _execute(self, conn, job):
+        started = time.time()
+        run_id = conn.execute(
+            "INSERT INTO job_runs (job, started_at, status, owner) VALUES (?, ?, 'running', ?)",
+            (job.name, started, self.owner),
+        ).lastrowid
+        conn.commit()
+
+        status, error = "ok", None
+        try:
+            job.run(conn)
+        except Exception as exc:   # a failed run is recorded, the thread goes on
+            if conn.in_transaction:
+                conn.rollback()
+            status, error = "failed", f"{type(exc).__name__}: {exc}"
+        finished = time.time()
+
+        conn.execute(
+            "UPDATE job_runs SET finished_at = ?, status = ?, error = ? WHERE id = ?",
+            (finished, status, error, run_id),
+        )
+        conn.execute(
+            """
+            UPDATE jobs SET
+                next_run = ?, lease_owner = NULL, lease_expires = NULL,
+                last_status = ?, last_duration = ?,
+                last_success = CASE WHEN ? = 'ok' THEN ? ELSE last_success END
+            WHERE name = ?
+            """,
+            (next_daily(job.at, finished), status, finished - started, status, finished, job.name),
+        )
+        conn.execute(
+            "DELETE FROM job_runs WHERE job = ? AND started_at < ?",
+            (job.name, finished - RUN_HISTORY_DAYS * 86400),
+        )
+        conn.commit()
+        if self.on_finish is not None:
+            self.on_finish(job.name, status, finished - started)
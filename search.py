@@ -0,0 +1,38 @@
+import re
+
+# letters/digits runs; everything else (quotes, operators, "-") is dropped so
+# user input can never be read as FTS5 query syntax
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+# ---------- FULL-TEXT SEARCH ----------
+
+def fts_query(text):
+    # "bca ram" -> '"bca"* "ram"*' : every word must match as a prefix
+    tokens = _TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def matching_ids_sql():
+    # filter clause for queries over students; takes one MATCH parameter
+    return "id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)"
+
+
+def top_matches(conn, department, text, limit=10):
+    # best matches first (bm25), roll number and name weighted over course
+    match = fts_query(text)
+    if match is None:
+        return []
+    return conn.execute(
+        """
+        SELECT s.id, s.roll_no, s.name, s.course
+        FROM students_fts f
+        JOIN students s ON s.id = f.rowid
+        WHERE students_fts MATCH ? AND s.department = ?
+        ORDER BY bm25(students_fts, 10.0, 5.0, 1.0)
+        LIMIT ?
+        """,
+        (match, department, limit),
+    ).fetchall()
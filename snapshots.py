@@ -0,0 +1,105 @@
+import argparse
+import json
+import time
+
+import db
+
+DB_NAME = "students.db"
+
+# ---------- SUMMARY SNAPSHOTS ----------
+# The nightly job computes each department's all-time summary (what
+# /attendance/summary shows without a date range) and keeps the latest one
+# in summary_snapshots, so the page loads it instead of crunching the
+# department on every view. The same run keeps attendance_alerts in step
+# with the below-75% list: a student who falls under the threshold gets an
+# open alert row, and the alert is resolved once they are back above it.
+# notified_at is left for a mailer to fill in.
+
+SNAPSHOT_SQL = "SELECT computed_at, report FROM summary_snapshots WHERE department = ?"
+
+OPEN_ALERTS_SQL = """
+SELECT al.id, al.student_id, s.roll_no, s.name, al.percent, al.created_at
+FROM attendance_alerts al
+JOIN students s ON s.id = al.student_id
+WHERE al.department = ? AND al.resolved_at IS NULL
+ORDER BY al.created_at DESC, s.roll_no
+"""
+
+
+def recompute(conn, bits=True):
+    # every department: store the snapshot, update the alerts; one commit
+    # per department. Returns {department: new alerts}.
+    import analytics
+
+    departments = [r[0] for r in conn.execute("SELECT DISTINCT department FROM students ORDER BY department")]
+    new_alerts = {}
+    for department in departments:
+        report = analytics.build_summary(conn, department, bits=bits)
+        now = time.time()
+        conn.execute(
+            """
+            INSERT INTO summary_snapshots (department, computed_at, report) VALUES (?, ?, ?)
+            ON CONFLICT (department) DO UPDATE SET
+                computed_at = excluded.computed_at,
+                report = excluded.report
+            """,
+            (department, now, json.dumps(report, separators=(",", ":"))),
+        )
+        new_alerts[department] = update_alerts(conn, department, report["low_students"], now)
+        conn.commit()
+    conn.execute("DELETE FROM summary_snapshots WHERE department NOT IN (SELECT department FROM students)")
+    conn.commit()
+    return new_alerts
+
+
+def update_alerts(conn, department, low_students, now):
+    # opens alerts for students newly under the threshold, resolves the
+    # ones who recovered; returns how many were opened
+    low = {entry["id"]: entry["percent"] for entry in low_students}
+    opened = dict(conn.execute(
+        "SELECT student_id, id FROM attendance_alerts WHERE department = ? AND resolved_at IS NULL",
+        (department,),
+    ).fetchall())
+
+    new = [(sid, department, percent, now) for sid, percent in low.items() if sid not in opened]
+    conn.executemany(
+        "INSERT INTO attendance_alerts (student_id, department, percent, created_at) VALUES (?, ?, ?, ?)",
+        new,
+    )
+    conn.executemany(
+        "UPDATE attendance_alerts SET resolved_at = ? WHERE id = ?",
+        [(now, alert_id) for sid, alert_id in opened.items() if sid not in low],
+    )
+    return len(new)
+
+
+def latest(conn, department):
+    # (report, computed_at) of the newest snapshot, or None
+    row = conn.execute(SNAPSHOT_SQL, (department,)).fetchone()
+    return (json.loads(row[1]), row[0]) if row else None
+
+
+def computed_at(conn, department):
+    row = conn.execute(
+        "SELECT computed_at FROM summary_snapshots WHERE department = ?", (department,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def open_alerts(conn, department):
+    return conn.execute(OPEN_ALERTS_SQL, (department,)).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute the summary snapshots and alerts now.")
+    parser.add_argument("--db", default=DB_NAME, help="path to the SQLite database")
+    args = parser.parse_args(argv)
+
+    conn = db.connect(args.db)
+    for department, count in recompute(conn).items():
+        print(f"{department}: snapshot stored, {count} new alert(s)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
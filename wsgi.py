@@ -0,0 +1,11 @@
+# WSGI entry point for production servers:
+#
+#     pip install gunicorn
+#     SECRET_KEY=... gunicorn -c gunicorn.conf.py wsgi:application
+#
+# gunicorn.conf.py preloads this module in the master before the workers
+# fork. create_app() only reads settings; each worker checks the schema on
+# its first request and compiles templates as it first renders them.
+from app import create_app
+
+application = create_app()